@@ -9,9 +9,11 @@ import datetime
 import base64
 import logging
 import sys
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-import requests
 import jwt
 import urllib.parse
 from flask import (
@@ -37,14 +39,24 @@ from database import (
     close_connection,
     query_db,
     execute_db,
+    insert_urls,
+    url_fts_available,
     init_db,
     ensure_schema,
     create_new_db,
+    connect_db,
+    checkpoint_db,
+    backup_db,
+    bulk_ingest,
+    remove_db_files,
+    remove_db_sidecars,
+    sqlite_settings_report,
     _sanitize_db_name,
     _sanitize_export_name,
 )
 from retrorecon import (
     progress as progress_mod,
+    bulk_actions,
     saved_tags as saved_tags_mod,
     notes_utils,
     text_notes_utils,
@@ -55,6 +67,19 @@ from retrorecon import (
     subdomain_utils,
     status as status_mod,
     har_utils,
+    import_utils,
+    json_stream,
+    warc_utils,
+    cdx_utils,
+    cdx_watermarks,
+    columnar,
+    count_cache,
+    jobs as jobs_mod,
+    pagination,
+    response_cache,
+    url_export,
+    url_filter,
+    url_parts,
 )
 from retrorecon.filters import manifest_links, oci_obj, manifest_table, wb_timestamp
 from mcp_manager import start_mcp_sqlite
@@ -141,8 +166,13 @@ IMPORT_PROGRESS_FILE = os.path.join(app.root_path, 'data', 'import_progress.json
 DEMO_DATA_FILE = os.path.join(app.root_path, 'data', 'demo_data.json')
 SAVED_TAGS_FILE = os.path.join(app.root_path, 'data', 'saved_tags.json')
 
+# Import decode workers started with forkserver/spawn load this script again
+# as ``__mp_main__``; they must not touch the progress file or the database.
+_WORKER_PROCESS = __name__ == '__mp_main__'
+
 # Clear any stale import progress from previous runs
-progress_mod.clear_progress(IMPORT_PROGRESS_FILE)
+if not _WORKER_PROCESS:
+    progress_mod.clear_progress(IMPORT_PROGRESS_FILE)
 
 # Temporary database handling
 TEMP_DB_NAME = 'temp.db'
@@ -153,14 +183,15 @@ def _create_temp_db() -> None:
     """Create a fresh temporary database for this session."""
     app.config['DATABASE'] = os.path.join(get_db_folder(), TEMP_DB_NAME)
     if os.path.exists(app.config['DATABASE']):
-        os.remove(app.config['DATABASE'])
+        remove_db_files(app.config['DATABASE'])
     init_db()
     app.mcp_server = start_mcp_sqlite(app.config['DATABASE'])
 
 
-if not env_db:
+if not env_db and not _WORKER_PROCESS:
     with app.app_context():
         _create_temp_db()
+        sqlite_settings_report()
 
 def _db_loaded() -> bool:
     """Return True if a database file is currently configured and exists."""
@@ -243,8 +274,30 @@ def export_jwt_cookie_data(ids: Optional[List[int]] = None) -> List[Dict[str, An
     return jwt_utils.export_cookie_data(ids)
 
 
-def export_url_data(ids: Optional[List[int]] = None, query: str = '') -> List[Dict[str, Any]]:
-    """Return URL records filtered by ids or search query."""
+def url_search_where(query: str) -> Tuple[List[str], List[Any]]:
+    """Return WHERE clauses and parameters selecting URLs matching ``query``.
+
+    Falls back to a substring match across the main columns when ``query``
+    is not a valid search expression.
+    """
+    if not query:
+        return [], []
+    try:
+        search_sql, search_params = search_utils.build_search_sql(query, fts=url_fts_available())
+        return [search_sql], list(search_params)
+    except Exception:
+        return [
+            "("
+            "url LIKE ? OR tags LIKE ? OR "
+            "CAST(timestamp AS TEXT) LIKE ? OR "
+            "CAST(status_code AS TEXT) LIKE ? OR "
+            "mime_type LIKE ?"
+            ")"
+        ], [f"%{query}%"] * 5
+
+
+def export_url_where(ids: Optional[List[int]] = None, query: str = '') -> Tuple[str, List[Any]]:
+    """Return the WHERE clause and parameters selecting URLs to export."""
     where = []
     params: List[Any] = []
     if ids:
@@ -252,38 +305,17 @@ def export_url_data(ids: Optional[List[int]] = None, query: str = '') -> List[Di
         where.append(f'id IN ({placeholders})')
         params.extend(ids)
     if query:
-        try:
-            search_sql, search_params = search_utils.build_search_sql(query)
-            where.append(search_sql)
-            params.extend(search_params)
-        except Exception:
-            where.append(
-                '('
-                'url LIKE ? OR tags LIKE ? OR '
-                'CAST(timestamp AS TEXT) LIKE ? OR '
-                'CAST(status_code AS TEXT) LIKE ? OR '
-                'mime_type LIKE ?'
-                ')'
-            )
-            params.extend([f'%{query}%'] * 5)
+        search_where, search_params = url_search_where(query)
+        where.extend(search_where)
+        params.extend(search_params)
     where_sql = 'WHERE ' + ' AND '.join(where) if where else ''
-    rows = query_db(
-        f"SELECT id, url, timestamp, status_code, mime_type, tags FROM urls {where_sql} ORDER BY id",
-        params,
-    )
-    result = []
-    for r in rows:
-        result.append(
-            {
-                'id': r['id'],
-                'url': r['url'],
-                'timestamp': r['timestamp'],
-                'status_code': r['status_code'],
-                'mime_type': r['mime_type'],
-                'tags': r['tags'],
-            }
-        )
-    return result
+    return where_sql, params
+
+
+def export_url_data(ids: Optional[List[int]] = None, query: str = '') -> List[Dict[str, Any]]:
+    """Return URL records filtered by ids or search query."""
+    where_sql, params = export_url_where(ids, query)
+    return [r for chunk in url_export.iter_row_chunks(get_db(), where_sql, params) for r in chunk]
 
 
 SCREENSHOT_DIR = os.path.join(app.root_path, 'static', 'screenshots')
@@ -438,65 +470,68 @@ def index() -> str:
     if items_per_page not in ITEMS_PER_PAGE_OPTIONS:
         items_per_page = ITEMS_PER_PAGE
 
+    after = request.args.get('after') or None
+    before = request.args.get('before') or None
+    next_cursor = prev_cursor = None
+
     if _db_loaded():
-        where_clauses = []
-        params = []
-        if q:
-            try:
-                search_sql, search_params = search_utils.build_search_sql(q)
-                where_clauses.append(search_sql)
-                params.extend(search_params)
-            except Exception:
-                where_clauses.append(
-                    "("
-                    "url LIKE ? OR tags LIKE ? OR "
-                    "CAST(timestamp AS TEXT) LIKE ? OR "
-                    "CAST(status_code AS TEXT) LIKE ? OR "
-                    "mime_type LIKE ?"
-                    ")"
-                )
-                params.extend([f"%{q}%"] * 5)
+        where_clauses, params = url_search_where(q)
         where_sql = ""
         if where_clauses:
             where_sql = "WHERE " + " AND ".join(where_clauses)
 
-        sort_map = {
-            'url': 'url',
-            'timestamp': 'timestamp',
-            'status_code': 'status_code',
-            'mime_type': 'mime_type',
-            'request_method': 'request_method',
-            'response_time_ms': 'response_time_ms',
-            'source_type': 'source_type',
-            'id': 'id'
-        }
-        sort_col = sort_map.get(sort, 'id')
-
-        count_sql = f"SELECT COUNT(*) AS cnt FROM urls {where_sql}"
-        count_row = query_db(count_sql, params, one=True)
-        total_count = count_row['cnt'] if count_row else 0
+        if sort not in pagination.SORT_COLUMNS:
+            sort = 'id'
+        sort_col = pagination.SORT_COLUMNS[sort]
+
+        count = count_cache.count_urls(
+            get_db(), app.config['DATABASE'], where_sql, params,
+            estimate_limit=app.config.get('COUNT_ESTIMATE_LIMIT', 0),
+            use_cache=app.config.get('COUNT_CACHE', True),
+        )
+        total_count = count.value
+        count_exact = count.exact
 
         total_pages = max(1, (total_count + items_per_page - 1) // items_per_page)
 
         if page < 1:
             page = 1
-        elif page > total_pages:
+        elif page > total_pages and count_exact:
             page = total_pages
 
-        offset = (page - 1) * items_per_page
-        select_sql = f"""
-            SELECT id, url, timestamp, status_code, mime_type, tags,
-                   request_method, response_time_ms, content_size, source_type
-            FROM urls
-            {where_sql}
-            ORDER BY {sort_col} {direction.upper()}
-            LIMIT ? OFFSET ?
-        """
-        rows = query_db(select_sql, params + [items_per_page, offset])
+        rows = None
+        if after or before:
+            # Prev/next links carry a cursor so stepping through deep pages
+            # seeks through the index instead of discarding OFFSET rows.
+            try:
+                result = pagination.fetch_page(
+                    get_db(), where_clauses, params, sort, direction,
+                    items_per_page, after=after, before=before,
+                )
+                rows = result.rows
+            except ValueError:
+                rows = None
+        if rows is None:
+            offset = (page - 1) * items_per_page
+            select_sql = f"""
+                SELECT {', '.join(pagination.URL_LIST_COLUMNS)}
+                FROM urls
+                {where_sql}
+                ORDER BY {sort_col} {direction.upper()}, id {direction.upper()}
+                LIMIT ? OFFSET ?
+            """
+            rows = query_db(select_sql, params + [items_per_page, offset])
+        if rows:
+            next_cursor = pagination.row_cursor(rows[-1], sort)
+            prev_cursor = pagination.row_cursor(rows[0], sort)
+        if not count_exact and len(rows) == items_per_page:
+            # The estimate is a lower bound, so always offer one more page.
+            total_pages = max(total_pages, page + 1)
     else:
         rows = []
         total_pages = 1
         total_count = 0
+        count_exact = True
 
     if _db_loaded():
         actual_name = os.path.basename(app.config['DATABASE'])
@@ -557,23 +592,340 @@ def index() -> str:
         current_background=current_background,
         panel_opacity=panel_opacity,
         total_count=total_count,
+        count_exact=count_exact,
         items_per_page=items_per_page,
         db_name=db_name,
         saved_dbs=saved_dbs,
         search_history=search_history,
         current_sort=sort,
         current_dir=direction,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
         open_tool=tool,
         select_all_matching=select_all_matching,
         app_version=APP_VERSION
     )
 
 
+_JOB_LOCK = threading.Lock()
+_ACTIVE_JOBS: set = set()
+# Global cap on CDX jobs running in background threads at the same time.
+_CDX_JOB_SLOTS = threading.BoundedSemaphore(max(1, int(app.config.get('CDX_MAX_JOBS', 2))))
+
+
+def _claim_job(job_id: int) -> bool:
+    """Mark ``job_id`` as running in this process; ``False`` if it already is."""
+    with _JOB_LOCK:
+        if job_id in _ACTIVE_JOBS:
+            return False
+        _ACTIVE_JOBS.add(job_id)
+        return True
+
+
+def _release_job(job_id: int) -> None:
+    with _JOB_LOCK:
+        _ACTIVE_JOBS.discard(job_id)
+
+
+def _background_work_running() -> bool:
+    """Return True while a job or file import is writing to the database."""
+    with _JOB_LOCK:
+        if _ACTIVE_JOBS:
+            return True
+    return get_import_progress().get('status') == 'in_progress'
+
+
+def configure_response_cache() -> Optional[response_cache.ResponseCache]:
+    """Point the shared response cache at ``RESPONSE_CACHE_DIR`` (``data/cache``)."""
+    if not app.config.get('RESPONSE_CACHE', True):
+        return response_cache.configure(None)
+    directory = app.config.get('RESPONSE_CACHE_DIR') or os.path.join(app.root_path, 'data', 'cache')
+    return response_cache.configure(
+        directory,
+        max_bytes=int(app.config.get('RESPONSE_CACHE_MAX_MB', 512)) * 1024 * 1024,
+        ttls=app.config.get('RESPONSE_CACHE_TTL'),
+        compress=bool(app.config.get('RESPONSE_CACHE_COMPRESS', True)),
+    )
+
+
+def known_url_filter() -> Optional[url_filter.KnownUrlFilter]:
+    """Return a prefilter of URLs already stored or ``None`` when disabled.
+
+    The stored URLs are only loaded once the session has seen
+    ``URL_PREFILTER_MIN_ROWS`` URLs, so small imports and delta refreshes
+    skip the table scan.
+    """
+    if not app.config.get('URL_PREFILTER', True):
+        return None
+    return url_filter.KnownUrlFilter.lazy(
+        app.config['DATABASE'],
+        max_rows=int(app.config.get('URL_PREFILTER_MAX_ROWS', 0)),
+        min_rows=int(app.config.get('URL_PREFILTER_MIN_ROWS', 0)),
+        profile=app.config.get('SQLITE_TUNING'),
+    )
+
+
+def _run_cdx_job(
+    job_id: int, known: Optional[url_filter.KnownUrlFilter] = None
+) -> Tuple[int, str]:
+    """Run CDX job ``job_id`` from its last checkpoint and return ``(inserted, message)``.
+
+    Must be called inside an application context. The job row is updated
+    after every stored page so an interrupted fetch can be resumed. ``known``
+    is shared by a crawl so the stored URLs are only loaded once.
+    """
+    db = get_db()
+    job = jobs_mod.get_job(db, job_id)
+    if job is None:
+        raise ValueError(f"CDX job {job_id} not found")
+    if known is None:
+        known = known_url_filter()
+    domain = job['domain']
+    checkpoint = cdx_utils.CdxCheckpoint(
+        page_count=job['page_count'],
+        next_page=job['next_page'] or 0,
+        resume_key=job['resume_key'] or '',
+        pages_done=job['progress'] or 0,
+    )
+    totals = {'inserted': job['inserted'] or 0, 'skipped': 0, 'max_timestamp': job['max_timestamp']}
+    cdx_status_msg = f"[ cdx: {domain} : limit {cdx_utils.CDX_LIMIT} ]"
+
+    def _store_rows(rows: List[cdx_utils.CdxRow]) -> int:
+        newest = max((r[1] for r in rows if r[1]), default=None)
+        if newest and (not totals['max_timestamp'] or newest > totals['max_timestamp']):
+            totals['max_timestamp'] = newest
+        if known is not None:
+            fresh = list(known.filter(rows))
+            totals['skipped'] += len(rows) - len(fresh)
+            rows = fresh
+            if not rows:
+                return 0
+        count = insert_urls(
+            (
+                (original_url, urllib.parse.urlsplit(original_url).hostname or domain,
+                 timestamp, status_code, mime_type, "")
+                for original_url, timestamp, status_code, mime_type in rows
+            ),
+            db=db,
+        )
+        totals['inserted'] += count
+        return count
+
+    def _page_done(cp: cdx_utils.CdxCheckpoint) -> None:
+        jobs_mod.update_job(
+            db,
+            job_id,
+            progress=cp.pages_done,
+            page_count=cp.page_count,
+            next_page=cp.next_page,
+            resume_key=cp.resume_key,
+            inserted=totals['inserted'],
+            max_timestamp=totals['max_timestamp'],
+        )
+        status_mod.push_status(
+            'cdx_page_processed',
+            f"{cp.pages_done}/{cp.page_count}" if cp.page_count else str(cp.pages_done),
+        )
+        if cp.resume_key:
+            status_mod.push_status('cdx_resume_key', cp.resume_key)
+
+    jobs_mod.update_job(db, job_id, status='running')
+    cdx_utils.set_rate_limit(float(app.config.get('CDX_RATE_LIMIT', 1) or 0))
+    configure_response_cache()
+    status_mod.push_status('cdx_api_waiting', domain)
+    status_mod.push_status('cdx_api_downloading', cdx_status_msg)
+    try:
+        with bulk_ingest(db):
+            cdx_utils.fetch_domain(
+                domain,
+                _store_rows,
+                concurrency=max(1, int(app.config.get('CDX_CONCURRENCY', 1))),
+                checkpoint=checkpoint,
+                on_page=_page_done,
+                from_timestamp=job['from_timestamp'],
+            )
+    except Exception as e:
+        jobs_mod.update_job(db, job_id, status='failed', result=str(e), inserted=totals['inserted'])
+        raise
+    status_mod.push_status('cdx_api_download_complete', cdx_status_msg)
+
+    inserted = totals['inserted']
+    message = f"Fetched CDX for {domain}: inserted {inserted} new URLs."
+    if totals['skipped']:
+        message += f" Skipped {totals['skipped']} already stored."
+    cdx_watermarks.update_watermark(db, domain, totals['max_timestamp'])
+    jobs_mod.update_job(db, job_id, status='done', result=message, inserted=inserted)
+    status_mod.push_status('cdx_import_complete', str(inserted))
+    subdomain_utils.mark_cdxed(domain)
+    try:
+        subdomain_utils.scrape_from_urls(domain)
+    except Exception:
+        pass
+    return inserted, message
+
+
+def _background_cdx_job(job_id: int, known: Optional[url_filter.KnownUrlFilter] = None) -> int:
+    """Background thread handler for a persistent CDX job.
+
+    Waits for a free slot under ``CDX_MAX_JOBS`` before running and returns
+    the number of inserted rows, or ``0`` if the job failed.
+    """
+    try:
+        with _CDX_JOB_SLOTS:
+            with app.app_context():
+                return _run_cdx_job(job_id, known)[0]
+    except Exception as e:
+        logger.warning("CDX job %s failed: %s", job_id, e)
+        return 0
+    finally:
+        _release_job(job_id)
+
+
+def start_cdx_job(job_id: int) -> bool:
+    """Run ``job_id`` in a background thread unless it is already running."""
+    if not _claim_job(job_id):
+        return False
+    threading.Thread(target=_background_cdx_job, args=(job_id,), daemon=True).start()
+    return True
+
+
+def _background_cdx_crawl(crawl_id: int) -> None:
+    """Fetch CDX for every un-indexed subdomain of a crawl job's root domain.
+
+    One ``cdx`` job is created per subdomain and run on a pool limited to
+    ``CDX_MAX_JOBS``. Each completed job marks its subdomain as CDX indexed.
+    Subdomains that already have an unfinished ``cdx`` job, for example one
+    resumed after a restart, are left to that job.
+    """
+    try:
+        with app.app_context():
+            db = get_db()
+            crawl = jobs_mod.get_job(db, crawl_id)
+            root = crawl['domain']
+            busy = set(jobs_mod.unfinished_domains(db, 'cdx'))
+            subs = [s for s in subdomain_utils.list_unindexed_subdomains(root) if s not in busy]
+            done = crawl['progress'] or 0
+            inserted = crawl['inserted'] or 0
+            jobs_mod.update_job(db, crawl_id, status='running', page_count=done + len(subs))
+            status_mod.push_status('cdx_crawl_start', f"{root}:{len(subs)}")
+            workers = max(1, int(app.config.get('CDX_MAX_JOBS', 2)))
+            known = known_url_filter() if subs else None
+            with bulk_ingest(db), ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = []
+                for sub in subs:
+                    job_id = jobs_mod.create_job(db, 'cdx', sub)
+                    if _claim_job(job_id):
+                        futures.append(pool.submit(_background_cdx_job, job_id, known))
+                for fut in as_completed(futures):
+                    count = fut.result()
+                    inserted += count
+                    done += 1
+                    jobs_mod.update_job(db, crawl_id, progress=done, inserted=inserted)
+                    status_mod.push_status('cdx_crawl_progress', f"{root}:{done}")
+            remaining = set(subdomain_utils.list_unindexed_subdomains(root))
+            failed = sum(1 for sub in subs if sub in remaining)
+            message = f"Crawled CDX for {len(subs) - failed} of {len(subs)} subdomains of {root}: inserted {inserted} new URLs."
+            jobs_mod.update_job(db, crawl_id, status='done', result=message, inserted=inserted)
+            status_mod.push_status('cdx_crawl_done', f"{root}:{inserted}")
+    except Exception as e:
+        logger.warning("CDX crawl %s failed: %s", crawl_id, e)
+        with app.app_context():
+            jobs_mod.update_job(get_db(), crawl_id, status='failed', result=str(e))
+    finally:
+        _release_job(crawl_id)
+
+
+def start_cdx_crawl(crawl_id: int) -> bool:
+    """Run crawl job ``crawl_id`` in a background thread unless it is already running."""
+    if not _claim_job(crawl_id):
+        return False
+    threading.Thread(target=_background_cdx_crawl, args=(crawl_id,), daemon=True).start()
+    return True
+
+
+def _background_url_parse(job_id: int) -> None:
+    """Fill the parsed URL columns of rows stored before they existed.
+
+    Rows are processed in ``id`` order and the last id is checkpointed in
+    ``next_page`` so an interrupted backfill resumes where it stopped.
+    """
+    try:
+        with app.app_context():
+            db = get_db()
+            job = jobs_mod.get_job(db, job_id)
+            last_id = job['next_page'] or 0
+            done = job['progress'] or 0
+            pending = db.execute(
+                "SELECT COUNT(*) FROM urls WHERE id > ? AND scheme IS NULL", [last_id]
+            ).fetchone()[0]
+            jobs_mod.update_job(db, job_id, status='running', page_count=done + pending)
+            while True:
+                rows = db.execute(
+                    "SELECT id, url FROM urls WHERE id > ? AND scheme IS NULL ORDER BY id LIMIT ?",
+                    [last_id, url_parts.BACKFILL_BATCH_SIZE],
+                ).fetchall()
+                if not rows:
+                    break
+                with db:
+                    db.executemany(
+                        "UPDATE urls SET scheme = ?, host = ?, port = ?, path = ?, ext = ?, query_keys = ? WHERE id = ?",
+                        [url_parts.parse_url(r['url']) + (r['id'],) for r in rows],
+                    )
+                last_id = rows[-1]['id']
+                done += len(rows)
+                jobs_mod.update_job(db, job_id, progress=done, next_page=last_id, inserted=done)
+            jobs_mod.update_job(db, job_id, status='done', result=f"Parsed {done} URLs.", inserted=done)
+    except Exception as e:
+        logger.warning("URL parse job %s failed: %s", job_id, e)
+        with app.app_context():
+            jobs_mod.update_job(get_db(), job_id, status='failed', result=str(e))
+    finally:
+        _release_job(job_id)
+
+
+def start_url_parse_job(job_id: int) -> bool:
+    """Run backfill job ``job_id`` in a background thread unless it is already running."""
+    if not _claim_job(job_id):
+        return False
+    threading.Thread(target=_background_url_parse, args=(job_id,), daemon=True).start()
+    return True
+
+
+def resume_jobs() -> List[int]:
+    """Restart CDX jobs, crawls, URL parse backfills and bulk actions left unfinished.
+
+    Jobs are left unfinished by a previous process or, for backfills, queued
+    by the schema migration when a database is loaded.
+    """
+    if not _db_loaded():
+        return []
+    with app.app_context():
+        db = get_db()
+        ids = jobs_mod.unfinished_job_ids(db, 'cdx')
+        crawl_ids = jobs_mod.unfinished_job_ids(db, 'cdx_crawl')
+        parse_ids = jobs_mod.unfinished_job_ids(db, 'url_parse')
+        bulk_ids = jobs_mod.unfinished_job_ids(db, 'bulk_action')
+    started = [job_id for job_id in ids if start_cdx_job(job_id)]
+    started += [crawl_id for crawl_id in crawl_ids if start_cdx_crawl(crawl_id)]
+    started += [parse_id for parse_id in parse_ids if start_url_parse_job(parse_id)]
+    started += [bulk_id for bulk_id in bulk_ids if start_bulk_action_job(bulk_id)]
+    return started
+
+
 @app.route('/fetch_cdx', methods=['POST'])
 def fetch_cdx() -> Response:
-    """Fetch CDX data for a domain and insert new URLs with pagination."""
+    """Fetch CDX data for a domain and insert new URLs with pagination.
+
+    Every fetch is recorded as a ``cdx`` job. With ``background=1`` the job
+    runs in a background thread and the response returns immediately. With
+    ``refresh=1`` only captures newer than the domain's recorded high-water
+    timestamp are requested.
+    """
     domain = request.form.get('domain', '').strip().lower()
     resume_key = request.form.get('resume_key', '').strip()
+    background = request.form.get('background') == '1'
+    refresh = request.form.get('refresh') == '1'
+    wants_json = request.form.get('ajax') == '1' or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     if not domain:
         flash("No domain provided for CDX fetch.", "error")
         return redirect(url_for('index'))
@@ -584,205 +936,221 @@ def fetch_cdx() -> Response:
         flash("No database loaded.", "error")
         return redirect(url_for('index'))
 
-    base_api = (
-        'https://web.archive.org/cdx/search/cdx'
-        '?url=*.{domain}/*&output=json&fl=original,timestamp,statuscode,mimetype'
-        '&collapse=urlkey&limit=1000&showResumeKey=true'
-    ).format(domain=domain)
-
-    inserted = 0
-    page = 0
-    while True:
-        url = base_api
-        if resume_key:
-            url += f"&resumeKey={resume_key}"
-
-        status_mod.push_status('cdx_api_waiting', domain)
-        try:
-            # Create a truncated status message format
-            cdx_status_msg = f"[ cdx: {domain} : limit 1000 ]"
-            status_mod.push_status('cdx_api_downloading', cdx_status_msg)
-            resp = requests.get(url, timeout=20)
-            resp.raise_for_status()
-            data = resp.json()
-            status_mod.push_status('cdx_api_download_complete', cdx_status_msg)
-        except Exception as e:
-            flash(f"Error fetching CDX data: {e}", "error")
-            return redirect(url_for('index'))
-
-        next_key = None
-        if data and isinstance(data[-1], list) and len(data[-1]) == 1:
-            next_key = str(data[-1][0])
-            data = data[:-1]
-        elif data and isinstance(data[-1], dict) and 'resumeKey' in data[-1]:
-            next_key = str(data[-1].get('resumeKey'))
-            data = data[:-1]
-
-        for idx, row in enumerate(data):
-            if idx == 0 or not row:
-                continue
-            original_url = row[0]
-            timestamp = row[1] if len(row) > 1 else None
-            if len(row) > 2:
-                status_raw = str(row[2])
-                status_code = int(status_raw) if status_raw.isdigit() else None
-            else:
-                status_code = None
-            mime_type = row[3] if len(row) > 3 else None
-            existing = query_db(
-                "SELECT id FROM urls WHERE url = ?",
-                [original_url],
-                one=True
-            )
-            if existing:
-                continue
-            entry_domain = urllib.parse.urlsplit(original_url).hostname or domain
-            execute_db(
-                "INSERT INTO urls (url, domain, timestamp, status_code, mime_type, tags) VALUES (?, ?, ?, ?, ?, ?)",
-                [original_url, entry_domain, timestamp, status_code, mime_type, ""]
-            )
-            inserted += 1
-
-        page += 1
-        status_mod.push_status('cdx_page_processed', str(page))
+    from_timestamp = cdx_watermarks.get_watermark(get_db(), domain) if refresh else None
+    job_id = jobs_mod.create_job(
+        get_db(), 'cdx', domain, resume_key=resume_key or None, from_timestamp=from_timestamp
+    )
 
-        if not next_key:
-            break
-        resume_key = next_key
-        status_mod.push_status('cdx_resume_key', resume_key)
+    if background:
+        start_cdx_job(job_id)
+        message = f"CDX fetch for {domain} started as job {job_id}."
+        if wants_json:
+            return jsonify({"job_id": job_id, "message": message})
+        flash(message, "success")
+        return redirect(url_for('index'))
 
-    message = f"Fetched CDX for {domain}: inserted {inserted} new URLs."
-    status_mod.push_status('cdx_import_complete', str(inserted))
+    _claim_job(job_id)
     try:
-        subdomain_utils.scrape_from_urls(domain)
-    except Exception:
-        pass
-    if request.form.get('ajax') == '1' or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return jsonify({"inserted": inserted, "message": message})
+        inserted, message = _run_cdx_job(job_id)
+    except Exception as e:
+        flash(f"Error fetching CDX data: {e}", "error")
+        return redirect(url_for('index'))
+    finally:
+        _release_job(job_id)
+    if wants_json:
+        return jsonify({"inserted": inserted, "message": message, "job_id": job_id})
     flash(message, "success")
     return redirect(url_for('index'))
 
-def _background_import(file_content: bytes) -> None:
-    """Background thread handler for JSON/line-delimited imports."""
+def _import_workers(total_bytes: int) -> int:
+    """Return how many processes should decode an import of ``total_bytes``."""
+    workers = int(app.config.get('IMPORT_WORKERS', 0))
+    if workers <= 0:
+        workers = min(os.cpu_count() or 1, 8)
+    if total_bytes < int(app.config.get('IMPORT_PARALLEL_MIN_MB', 64)) * 1024 * 1024:
+        return 1
+    return workers
+
+
+def _background_import(file_path: str, filename: str = '') -> None:
+    """Background thread handler for JSON/line-delimited imports.
+
+    ``file_path`` is streamed as a JSON array or NDJSON, decompressing gzip,
+    zstd or zip uploads on the fly, and inserted in batches so memory use does
+    not grow with the upload. Large NDJSON files are decoded on a process
+    pool and written in order by this thread. The file is removed once the
+    import finishes.
+    """
     try:
-        content = file_content.decode('utf-8').strip()
-        records = []
-
-        # Try JSON array first
+        total_bytes = os.path.getsize(file_path)
+        set_import_progress('in_progress', '', 0, total_bytes)
+        workers = _import_workers(total_bytes)
+        db = connect_db(app.config['DATABASE'], app.config['SQLITE_TUNING'])
         try:
-            data = json.loads(content)
-            if isinstance(data, list) and all(isinstance(item, str) for item in data):
-                records = [{"url": url, "tags": ""} for url in data]
-            elif isinstance(data, list) and all(isinstance(item, dict) for item in data):
-                records = [
-                    {
-                        "url": rec.get('url', '').strip(),
-                        "timestamp": rec.get('timestamp'),
-                        "status_code": rec.get('status_code'),
-                        "mime_type": rec.get('mime_type'),
-                        "tags": rec.get('tags', '').strip()
-                    }
-                    for rec in data if rec.get('url', '').strip()
-                ]
-        except Exception:
-            for line in content.splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    rec = json.loads(line)
-                    url = rec.get('url', '').strip()
-                    if url:
-                        records.append({
-                            "url": url,
-                            "timestamp": rec.get('timestamp'),
-                            "status_code": rec.get('status_code'),
-                            "mime_type": rec.get('mime_type'),
-                            "tags": rec.get('tags', '').strip()
-                        })
-                except Exception:
-                    continue
-
-        total = len(records)
-        set_import_progress('in_progress', '', 0, total)
-        db = sqlite3.connect(app.config['DATABASE'])
-        c = db.cursor()
-        inserted = 0
-        for idx, rec in enumerate(records):
-            try:
-                c.execute(
-                    "INSERT OR IGNORE INTO urls (url, timestamp, status_code, mime_type, tags) VALUES (?, ?, ?, ?, ?)",
-                    (
-                        rec['url'],
-                        rec.get('timestamp'),
-                        rec.get('status_code'),
-                        rec.get('mime_type'),
-                        rec['tags']
+            with import_utils.open_upload(file_path, filename) as upload:
+                position = {'bytes': 0}
+                parallel = workers > 1 and json_stream.peek_start(upload.stream) != b'['
+
+                def _report(writer: import_utils.BatchWriter) -> None:
+                    set_import_progress(
+                        'in_progress',
+                        f"Imported {writer.inserted} of {writer.processed} records...",
+                        position['bytes'] if parallel else upload.raw.tell(),
+                        total_bytes,
                     )
-                )
-            except Exception:
-                continue
-            inserted += 1
-            # Update progress every 10 or on last
-            if idx % 10 == 0 or idx + 1 == total:
-                set_import_progress('in_progress', '', idx + 1, total)
-        db.commit()
-        db.close()
-        set_import_progress('done', f"Imported {inserted} of {total} records.", inserted, total)
+
+                with bulk_ingest(db), import_utils.BatchWriter(
+                    db, import_utils.IMPORT_COLUMNS, on_progress=_report, known=known_url_filter()
+                ) as writer:
+                    if parallel:
+                        for rows, offset in import_utils.iter_parallel_rows(upload, workers):
+                            position['bytes'] = offset
+                            writer.extend(rows)
+                    else:
+                        for rec in import_utils.iter_records(upload.stream):
+                            writer.add(import_utils.record_row(rec))
+        finally:
+            db.close()
+        message = f"Imported {writer.inserted} of {writer.processed} records."
+        if writer.skipped:
+            message += f" Skipped {writer.skipped} already stored."
+        set_import_progress('done', message, writer.inserted, writer.processed)
     except Exception as e:
         set_import_progress('failed', str(e), 0, 0)
+    finally:
+        _remove_upload(file_path)
+
 
+def _background_har_import(file_path: str, filename: str = '') -> None:
+    """Background thread handler for HAR file imports.
 
-def _background_har_import(file_content: bytes) -> None:
-    """Background thread handler for HAR file imports."""
+    Entries are streamed from ``file_path`` one at a time with their bodies
+    skipped, so memory does not grow with the size of the capture.
+    """
     try:
-        # Parse HAR file and extract entries
-        records = har_utils.parse_har_file(file_content)
-        
-        total = len(records)
-        set_import_progress('in_progress', f'Processing HAR file...', 0, total)
-        
-        db = sqlite3.connect(app.config['DATABASE'])
-        c = db.cursor()
-        inserted = 0
-        
-        for idx, rec in enumerate(records):
-            try:
-                c.execute(
-                    """INSERT OR IGNORE INTO urls (
-                        url, domain, timestamp, status_code, mime_type, tags,
-                        request_method, response_time_ms, content_size,
-                        request_headers, response_headers, source_type
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        rec['url'],
-                        rec['domain'],
-                        rec.get('timestamp'),
-                        rec.get('status_code'),
-                        rec.get('mime_type'),
-                        rec['tags'],
-                        rec['request_method'],
-                        rec.get('response_time_ms'),
-                        rec.get('content_size'),
-                        rec.get('request_headers'),
-                        rec.get('response_headers'),
-                        rec['source_type']
+        total_bytes = os.path.getsize(file_path)
+        set_import_progress('in_progress', 'Processing HAR file...', 0, total_bytes)
+        db = connect_db(app.config['DATABASE'], app.config['SQLITE_TUNING'])
+        try:
+            with import_utils.open_upload(file_path, filename) as upload:
+
+                def _report(writer: import_utils.BatchWriter) -> None:
+                    set_import_progress(
+                        'in_progress', f'Processed {writer.processed} entries...', upload.raw.tell(), total_bytes
                     )
-                )
-                inserted += 1
-            except Exception as e:
-                # Skip invalid entries but continue processing
-                continue
-            
-            # Update progress every 10 records or on last
-            if idx % 10 == 0 or idx + 1 == total:
-                set_import_progress('in_progress', f'Processed {idx + 1} of {total} entries...', idx + 1, total)
-        
-        db.commit()
-        db.close()
-        set_import_progress('done', f"Imported {inserted} of {total} HAR entries.", inserted, total)
+
+                with bulk_ingest(db), import_utils.BatchWriter(
+                    db, import_utils.HAR_COLUMNS, on_progress=_report, known=known_url_filter()
+                ) as writer:
+                    for rec in har_utils.iter_har_records(upload.stream):
+                        writer.add(import_utils.record_row(rec, import_utils.HAR_COLUMNS))
+        finally:
+            db.close()
+        message = f"Imported {writer.inserted} of {writer.processed} HAR entries."
+        if writer.skipped:
+            message += f" Skipped {writer.skipped} already stored."
+        set_import_progress('done', message, writer.inserted, writer.processed)
     except Exception as e:
         set_import_progress('failed', f"HAR import failed: {str(e)}", 0, 0)
+    finally:
+        _remove_upload(file_path)
+
+
+def _background_archive_import(file_path: str, filename: str = '', kind: str = 'cdxj') -> None:
+    """Background thread handler for CDXJ/CDX index and WARC imports."""
+    label = kind.upper()
+    try:
+        total_bytes = os.path.getsize(file_path)
+        set_import_progress('in_progress', f'Processing {label} file...', 0, total_bytes)
+        reader = warc_utils.iter_warc_records if kind == 'warc' else warc_utils.iter_cdxj_records
+        db = connect_db(app.config['DATABASE'], app.config['SQLITE_TUNING'])
+        try:
+            with import_utils.open_upload(file_path, filename) as upload:
+
+                def _report(writer: import_utils.BatchWriter) -> None:
+                    set_import_progress(
+                        'in_progress',
+                        f'Imported {writer.inserted} of {writer.processed} {label} records...',
+                        upload.raw.tell(),
+                        total_bytes,
+                    )
+
+                with bulk_ingest(db), import_utils.BatchWriter(
+                    db, warc_utils.ARCHIVE_COLUMNS, on_progress=_report, known=known_url_filter()
+                ) as writer:
+                    for rec in reader(upload.stream):
+                        writer.add(import_utils.record_row(rec, warc_utils.ARCHIVE_COLUMNS))
+        finally:
+            db.close()
+        message = f"Imported {writer.inserted} of {writer.processed} {label} records."
+        if writer.skipped:
+            message += f" Skipped {writer.skipped} already stored."
+        set_import_progress('done', message, writer.inserted, writer.processed)
+    except Exception as e:
+        set_import_progress('failed', f"{label} import failed: {str(e)}", 0, 0)
+    finally:
+        _remove_upload(file_path)
+
+
+def _background_columnar_import(file_path: str, filename: str = '') -> None:
+    """Background thread handler for Parquet/Arrow imports of ``urls`` or ``domains``."""
+    try:
+        source = columnar.read_file(file_path)
+        label = 'domain' if source.table == 'domains' else 'URL'
+        set_import_progress('in_progress', f'Importing {label} records...', 0, source.num_rows)
+        db = connect_db(app.config['DATABASE'], app.config['SQLITE_TUNING'])
+        try:
+            if source.table == 'domains':
+                processed = inserted = 0
+                for rows in source.batches:
+                    inserted += columnar.insert_domains(db, source.columns, rows)
+                    processed += len(rows)
+                    set_import_progress(
+                        'in_progress', f'Imported {inserted} of {processed} domain records...',
+                        processed, source.num_rows,
+                    )
+                skipped = 0
+            else:
+
+                def _report(writer: import_utils.BatchWriter) -> None:
+                    set_import_progress(
+                        'in_progress',
+                        f"Imported {writer.inserted} of {writer.processed} URL records...",
+                        writer.processed,
+                        source.num_rows,
+                    )
+
+                with bulk_ingest(db), import_utils.BatchWriter(
+                    db, source.columns, on_progress=_report, known=known_url_filter()
+                ) as writer:
+                    for rows in source.batches:
+                        writer.extend(rows)
+                processed, inserted, skipped = writer.processed, writer.inserted, writer.skipped
+        finally:
+            db.close()
+        message = f"Imported {inserted} of {processed} {label} records."
+        if skipped:
+            message += f" Skipped {skipped} already stored."
+        set_import_progress('done', message, inserted, processed)
+    except Exception as e:
+        set_import_progress('failed', f"Columnar import failed: {str(e)}", 0, 0)
+    finally:
+        _remove_upload(file_path)
+
+
+def _save_upload(file: Any, suffix: str) -> str:
+    """Copy an uploaded file to a temporary path without reading it into memory."""
+    fd, path = tempfile.mkstemp(prefix='retrorecon_import_', suffix=suffix)
+    with os.fdopen(fd, 'wb') as fh:
+        shutil.copyfileobj(file.stream, fh, 1 << 20)
+    return path
+
+
+def _remove_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
 
 @app.route('/import_file', methods=['POST'])
 @app.route('/import_json', methods=['POST'])
@@ -799,8 +1167,11 @@ def import_file() -> Response:
     filename = file.filename or ''
     ext = filename.rsplit('.', 1)[-1].lower()
 
-    if ext not in ['json', 'har']:
-        flash('Please upload a JSON or HAR file.', 'error')
+    if ext not in import_utils.UPLOAD_EXTENSIONS:
+        flash(
+            'Please upload a JSON, HAR, CDXJ, WARC, Parquet or Arrow file, optionally compressed as .gz, .gzip, .zst, .zstd or .zip.',
+            'error',
+        )
         return redirect(url_for('index'))
 
     if not _db_loaded():
@@ -808,16 +1179,30 @@ def import_file() -> Response:
         return redirect(url_for('index'))
 
     clear_import_progress()
-    file_content = file.read()
-    
+    file_path = _save_upload(file, '.' + ext)
+    try:
+        kind = import_utils.upload_kind(file_path, filename)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        _remove_upload(file_path)
+        flash(f'Could not read upload: {e}', 'error')
+        return redirect(url_for('index'))
+
     # Determine file type and processing function
-    if ext == 'har':
+    if kind in ('cdxj', 'warc'):
+        set_import_progress('starting', f'Starting {kind.upper()} import...', 0, 0)
+        thread = threading.Thread(target=_background_archive_import, args=(file_path, filename, kind))
+        flash(f'{kind.upper()} import started! Progress will be shown below.', 'success')
+    elif kind in ('parquet', 'arrow'):
+        set_import_progress('starting', f'Starting {kind.capitalize()} import...', 0, 0)
+        thread = threading.Thread(target=_background_columnar_import, args=(file_path, filename))
+        flash(f'{kind.capitalize()} import started! Progress will be shown below.', 'success')
+    elif kind == 'har':
         set_import_progress('starting', 'Starting HAR import...', 0, 0)
-        thread = threading.Thread(target=_background_har_import, args=(file_content,))
+        thread = threading.Thread(target=_background_har_import, args=(file_path, filename))
         flash('HAR import started! Progress will be shown below.', 'success')
     else:
         set_import_progress('starting', 'Starting JSON import...', 0, 0)
-        thread = threading.Thread(target=_background_import, args=(file_content,))
+        thread = threading.Thread(target=_background_import, args=(file_path, filename))
         flash('JSON import started! Progress will be shown below.', 'success')
     
     thread.start()
@@ -879,96 +1264,126 @@ def add_tag() -> Response:
     flash(f"Added tag '{new_tag}' to entry {entry_id}.", "success")
     return redirect(url_for('index'))
 
-@app.route('/bulk_action', methods=['POST'])
-def bulk_action() -> Response:
-    """Apply a bulk action (tag or delete) to selected URLs."""
-    if not _db_loaded():
-        flash('No database loaded.', 'error')
-        return redirect(url_for('index'))
-    action = request.form.get('action', '')
-    tag = request.form.get('tag', '').strip()
-    selected_ids = request.form.getlist('selected_ids')
-    select_all_matching = (request.form.get('select_all_matching', 'false').lower() == 'true')
+_BULK_MESSAGES = {
+    'add_tag': "Added tag '{tag}' to {count} entries.",
+    'remove_tag': "Removed tag '{tag}' from {count} entries.",
+    'clear_tags': "Cleared tags from {count} entries.",
+    'delete': "Deleted {count} entries.",
+}
 
-    if select_all_matching:
-        q = request.form.get('q', '').strip()
 
-        where_sql = ""
-        params: List[str] = []
-        if q:
-            try:
-                search_sql, params = search_utils.build_search_sql(q)
-                where_sql = f"WHERE {search_sql}"
-            except Exception:
-                where_sql = (
-                    "WHERE ("
-                    "url LIKE ? OR tags LIKE ? OR "
-                    "CAST(timestamp AS TEXT) LIKE ? OR "
-                    "CAST(status_code AS TEXT) LIKE ? OR "
-                    "mime_type LIKE ?"
-                    ")"
+def _bulk_selection(spec: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    """Return WHERE clauses for a bulk action ``spec`` (``q`` or ``ids``)."""
+    if spec.get('ids') is not None:
+        return bulk_actions.selection_sql(ids=spec['ids'])
+    where, params = url_search_where(spec.get('q', ''))
+    return bulk_actions.selection_sql(where=where, params=params)
+
+
+def _background_bulk_action(job_id: int) -> None:
+    """Apply the bulk action stored in job ``job_id`` one ``id`` window at a time.
+
+    The action spec is kept as JSON in ``spec``, the last id handled in
+    ``next_page`` and the id upper bound in ``page_count``, so an interrupted
+    job resumes where it stopped without touching rows added since.
+    """
+    try:
+        with app.app_context():
+            db = get_db()
+            job = jobs_mod.get_job(db, job_id)
+            spec = json.loads(job['spec'])
+            where, params = _bulk_selection(spec)
+            end_id = job['page_count']
+            if end_id is None:
+                end_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM urls").fetchone()[0]
+            jobs_mod.update_job(db, job_id, status='running', page_count=end_id)
+            changed = {'count': job['inserted'] or 0}
+
+            def _checkpoint(last_id: int, count: int) -> None:
+                changed['count'] += count
+                jobs_mod.update_job(
+                    db, job_id, progress=last_id, next_page=last_id, inserted=changed['count']
                 )
-                params = [f"%{q}%"] * 5
 
-        rows = query_db(f"SELECT id FROM urls {where_sql}", params)
-        selected_ids = [str(r['id']) for r in rows]
+            bulk_actions.apply_in_batches(
+                db, spec['action'], spec.get('tag', ''), where, params,
+                start_id=job['next_page'] or 0, end_id=end_id, on_batch=_checkpoint,
+            )
+            message = _BULK_MESSAGES[spec['action']].format(tag=spec.get('tag', ''), count=changed['count'])
+            jobs_mod.update_job(db, job_id, status='done', result=message, inserted=changed['count'])
+    except Exception as e:
+        logger.warning("Bulk action job %s failed: %s", job_id, e)
+        with app.app_context():
+            jobs_mod.update_job(get_db(), job_id, status='failed', result=str(e))
+    finally:
+        _release_job(job_id)
+
+
+def start_bulk_action_job(job_id: int) -> bool:
+    """Run bulk action job ``job_id`` in a background thread unless it is already running."""
+    if not _claim_job(job_id):
+        return False
+    threading.Thread(target=_background_bulk_action, args=(job_id,), daemon=True).start()
+    return True
 
-    if not selected_ids:
-        flash("No entries selected for bulk action.", "error")
+
+@app.route('/bulk_action', methods=['POST'])
+def bulk_action() -> Response:
+    """Apply a bulk action (tag or delete) to selected URLs.
+
+    The action runs as one set-based statement over the selected ids or, with
+    ``select_all_matching``, the compiled search predicate. With
+    ``background=1``, or when a select-all set reaches
+    ``BULK_BACKGROUND_THRESHOLD`` rows, it is queued as a ``bulk_action`` job
+    instead.
+    """
+    wants_json = request.form.get('ajax') == '1' or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+    def _done(message: str, category: str, **payload: Any) -> Response:
+        if wants_json:
+            status = 400 if category == 'error' else 200
+            return jsonify({'message': message, **payload}), status
+        flash(message, category)
         return redirect(url_for('index'))
 
-    if action == 'add_tag':
-        if not tag:
-            flash("No tag provided for bulk add.", "error")
-            return redirect(url_for('index'))
-        count = 0
-        for sid in selected_ids:
-            row = query_db("SELECT tags FROM urls WHERE id = ?", [sid], one=True)
-            if not row:
-                continue
-            old_tags = row['tags'] or ""
-            tag_list = [t.strip() for t in old_tags.split(',') if t.strip()]
-            if tag not in tag_list:
-                tag_list.append(tag)
-                updated_tags = ','.join(tag_list)
-                execute_db("UPDATE urls SET tags = ? WHERE id = ?", [updated_tags, sid])
-                count += 1
-        flash(f"Added tag '{tag}' to {count} entries.", "success")
-
-    elif action == 'remove_tag':
-        if not tag:
-            flash("No tag provided for removal.", "error")
-            return redirect(url_for('index'))
-        count = 0
-        for sid in selected_ids:
-            row = query_db("SELECT tags FROM urls WHERE id = ?", [sid], one=True)
-            if not row:
-                continue
-            old_tags = row['tags'] or ""
-            tag_list = [t.strip() for t in old_tags.split(',') if t.strip() and t.strip() != tag]
-            updated_tags = ','.join(tag_list)
-            execute_db("UPDATE urls SET tags = ? WHERE id = ?", [updated_tags, sid])
-            count += 1
-        flash(f"Removed tag '{tag}' from {count} entries.", "success")
-
-    elif action == 'clear_tags':
-        count = 0
-        for sid in selected_ids:
-            execute_db("UPDATE urls SET tags = '' WHERE id = ?", [sid])
-            count += 1
-        flash(f"Cleared tags from {count} entries.", "success")
-
-    elif action == 'delete':
-        count = 0
-        for sid in selected_ids:
-            execute_db("DELETE FROM urls WHERE id = ?", [sid])
-            count += 1
-        flash(f"Deleted {count} entries.", "success")
+    if not _db_loaded():
+        return _done('No database loaded.', 'error')
+    action = request.form.get('action', '')
+    tag = request.form.get('tag', '').strip()
+    select_all_matching = (request.form.get('select_all_matching', 'false').lower() == 'true')
+    background = request.form.get('background') == '1'
+
+    if action not in bulk_actions.BULK_ACTIONS:
+        return _done(f"Unknown bulk action: {action}", 'error')
+    if action in ('add_tag', 'remove_tag') and not tag:
+        missing = "No tag provided for bulk add." if action == 'add_tag' else "No tag provided for removal."
+        return _done(missing, 'error')
 
+    spec: Dict[str, Any] = {'action': action, 'tag': tag}
+    if select_all_matching:
+        spec['q'] = request.form.get('q', '').strip()
+        threshold = int(app.config.get('BULK_BACKGROUND_THRESHOLD', 0))
+        if not background and threshold > 0:
+            where, params = url_search_where(spec['q'])
+            where_sql = 'WHERE ' + ' AND '.join(where) if where else ''
+            count = count_cache.count_urls(
+                get_db(), app.config['DATABASE'], where_sql, params,
+                estimate_limit=threshold, use_cache=app.config.get('COUNT_CACHE', True),
+            )
+            background = count.value >= threshold
     else:
-        flash(f"Unknown bulk action: {action}", "error")
+        spec['ids'] = [int(i) for i in request.form.getlist('selected_ids') if i.isdigit()]
+        if not spec['ids']:
+            return _done("No entries selected for bulk action.", 'error')
 
-    return redirect(url_for('index'))
+    if background:
+        job_id = jobs_mod.create_job(get_db(), 'bulk_action', '', spec=json.dumps(spec))
+        started = start_bulk_action_job(job_id)
+        return _done(f"Bulk action queued as job {job_id}.", 'success', job_id=job_id, started=started)
+
+    where, params = _bulk_selection(spec)
+    count = bulk_actions.apply(get_db(), action, tag, where, params)
+    return _done(_BULK_MESSAGES[action].format(tag=tag, count=count), 'success', affected=count)
 
 
 
@@ -990,6 +1405,7 @@ from retrorecon.routes import (
     dynamic_bp,
     chat_bp,
     mcp_config_bp,
+    jobs_bp,
 )
 app.register_blueprint(notes_bp)
 app.register_blueprint(tools_bp)
@@ -1008,6 +1424,7 @@ app.register_blueprint(help_bp)
 app.register_blueprint(dynamic_bp)
 app.register_blueprint(chat_bp)
 app.register_blueprint(mcp_config_bp)
+app.register_blueprint(jobs_bp)
 
 
 
@@ -1025,7 +1442,12 @@ if __name__ == '__main__':
                 create_new_db(os.path.splitext(os.path.basename(env_db))[0])
             else:
                 ensure_schema()
+            sqlite_settings_report()
         app.mcp_server = start_mcp_sqlite(app.config['DATABASE'])
+        # With the reloader on this block also runs in the parent process,
+        # which only watches files; resume jobs in the serving child alone.
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            resume_jobs()
     host = os.environ.get('RETRORECON_LISTEN', '127.0.0.1')
     port = int(os.environ.get('RETRORECON_PORT', '5000'))
-    app.run(debug=True, host=host, port=port)
+    app.run(debug=True, use_reloader=True, host=host, port=port)
@@ -1,6 +1,8 @@
 import os
 import json
 
+from retrorecon import sqlite_tuning
+
 
 def load_secrets_file(path: str = "secrets.json") -> None:
     """Load secrets from *path* into ``os.environ`` if the file exists.
@@ -46,6 +48,44 @@ class Config:
     VIRUSTOTAL_API = os.environ.get('VIRUSTOTAL_API')
     REGISTRY_USERNAME = os.environ.get('REGISTRY_USERNAME')
     REGISTRY_PASSWORD = os.environ.get('REGISTRY_PASSWORD')
+    CDX_CONCURRENCY = int(os.environ.get('RETRORECON_CDX_CONCURRENCY', '4'))
+    CDX_MAX_JOBS = int(os.environ.get('RETRORECON_CDX_MAX_JOBS', '2'))
+    # Requests per second to the Wayback CDX server, shared by all jobs (0 disables)
+    CDX_RATE_LIMIT = float(os.environ.get('RETRORECON_CDX_RATE_LIMIT', '1'))
+
+    # Drop already stored URLs in memory before they reach SQLite on ingest
+    URL_PREFILTER = os.environ.get('RETRORECON_URL_PREFILTER', '1') != '0'
+    URL_PREFILTER_MAX_ROWS = int(os.environ.get('RETRORECON_URL_PREFILTER_MAX_ROWS', '5000000'))
+    # Only load the stored URLs once an ingest has seen this many URLs
+    URL_PREFILTER_MIN_ROWS = int(os.environ.get('RETRORECON_URL_PREFILTER_MIN_ROWS', '50000'))
+
+    # Decode large NDJSON imports on a process pool (0 picks one per CPU, 1 disables)
+    IMPORT_WORKERS = int(os.environ.get('RETRORECON_IMPORT_WORKERS', '0'))
+    IMPORT_PARALLEL_MIN_MB = int(os.environ.get('RETRORECON_IMPORT_PARALLEL_MIN_MB', '64'))
+
+    # On-disk cache for CDX, crt.sh and VirusTotal responses
+    RESPONSE_CACHE = os.environ.get('RETRORECON_CACHE', '1') != '0'
+    RESPONSE_CACHE_DIR = os.environ.get('RETRORECON_CACHE_DIR')  # defaults to data/cache
+    RESPONSE_CACHE_MAX_MB = int(os.environ.get('RETRORECON_CACHE_MAX_MB', '512'))
+    RESPONSE_CACHE_COMPRESS = os.environ.get('RETRORECON_CACHE_COMPRESS', '1') != '0'
+    RESPONSE_CACHE_TTL = {
+        'cdx': int(os.environ.get('RETRORECON_CACHE_TTL_CDX', '86400')),
+        'crtsh': int(os.environ.get('RETRORECON_CACHE_TTL_CRTSH', '86400')),
+        'virustotal': int(os.environ.get('RETRORECON_CACHE_TTL_VIRUSTOTAL', '86400')),
+    }
+
+    # Reuse search result counts until the database changes; with a limit set
+    # counting stops there and the page shows "≥ N"
+    COUNT_CACHE = os.environ.get('RETRORECON_COUNT_CACHE', '1') != '0'
+    COUNT_ESTIMATE_LIMIT = int(os.environ.get('RETRORECON_COUNT_ESTIMATE_LIMIT', '0'))
+
+    # Bulk actions on "select all matching" sets at least this large run as a
+    # background job in id batches (0 only when requested with background=1)
+    BULK_BACKGROUND_THRESHOLD = int(os.environ.get('RETRORECON_BULK_BACKGROUND_THRESHOLD', '100000'))
+
+    # PRAGMAs applied to every SQLite connection (WAL, synchronous=NORMAL,
+    # cache, mmap, temp store, busy timeout); RETRORECON_SQLITE_TUNING=0 disables
+    SQLITE_TUNING = sqlite_tuning.profile_from_env()
 
     # Markdown editor storage
     MARKDOWN_STORAGE = os.path.join(os.getcwd(), 'docs')
@@ -1,20 +1,107 @@
 """SQLite database helpers for Retrorecon."""
 
+import functools
+import logging
 import os
 import re
 import sqlite3
-from typing import Any, List, Optional, Tuple, Union
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from flask import current_app, g
 
+from retrorecon import sqlite_tuning
+from retrorecon.facets import FACET_EXPRESSIONS, facet_sql
+from retrorecon.url_parts import URL_PART_COLUMNS, parse_url
 
-def _has_tag(tags: str, tag: str) -> int:
-    """SQLite helper to check if ``tag`` exists in comma-separated ``tags``."""
-    tag = tag.strip().lower()
-    for t in tags.split(','):
-        if t.strip().lower() == tag:
-            return 1
-    return 0
+logger = logging.getLogger(__name__)
+
+# Columns written by the bulk URL ingest helpers, in parameter order.
+URL_INSERT_COLUMNS = ('url', 'domain', 'timestamp', 'status_code', 'mime_type', 'tags')
+
+
+# Companion files SQLite keeps next to a database in WAL mode.
+_DB_SIDECARS = ('-wal', '-shm', '-journal')
+
+
+def connect_db(path: Optional[str] = None, profile: Optional[dict] = None) -> sqlite3.Connection:
+    """Open ``path`` (default the configured database) with the tuning profile.
+
+    ``profile`` defaults to the app's ``SQLITE_TUNING`` setting so connections
+    opened outside a request, e.g. by background importers, can pass it in.
+    """
+    if path is None:
+        path = current_app.config['DATABASE']
+    if profile is None:
+        profile = current_app.config.get('SQLITE_TUNING', sqlite_tuning.DEFAULT_PROFILE)
+    return sqlite_tuning.connect(path, profile)
+
+
+def checkpoint_db(path: Optional[str] = None) -> bool:
+    """Fold the WAL into the main database file so it can be copied alone.
+
+    Waits up to the profile's ``busy_timeout`` for readers and returns
+    ``False`` when frames are still left in the log, e.g. because another
+    connection holds an older snapshot. Only after ``True`` do the main file
+    and an empty WAL hold the same data.
+    """
+    path = path or current_app.config.get('DATABASE')
+    if not path or not os.path.exists(path):
+        return True
+    conn = connect_db(path)
+    try:
+        busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        conn.close()
+    if busy or log_frames != checkpointed:
+        logger.debug("WAL checkpoint of %s incomplete: busy=%s log=%s checkpointed=%s",
+                     path, busy, log_frames, checkpointed)
+        return False
+    return True
+
+
+def backup_db(dest: str, path: Optional[str] = None) -> None:
+    """Write a consistent standalone copy of the database to ``dest``.
+
+    Uses SQLite's online backup so committed changes still in the WAL are
+    included while other connections keep reading and writing.
+    """
+    src = connect_db(path)
+    dst = sqlite3.connect(dest)
+    try:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode = DELETE").fetchall()
+    finally:
+        dst.close()
+        src.close()
+
+
+def remove_db_sidecars(path: str) -> None:
+    """Delete the WAL, shared-memory and journal files left next to ``path``."""
+    for suffix in _DB_SIDECARS:
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def remove_db_files(path: str) -> None:
+    """Delete the database at ``path`` along with its sidecar files."""
+    os.remove(path)
+    remove_db_sidecars(path)
+
+
+def sqlite_settings_report() -> dict:
+    """Return and log the effective SQLite settings of the current database."""
+    profile = current_app.config.get('SQLITE_TUNING', sqlite_tuning.DEFAULT_PROFILE)
+    conn = connect_db()
+    try:
+        report = sqlite_tuning.self_check(conn, profile)
+    finally:
+        conn.close()
+    report['sqlite_version'] = sqlite3.sqlite_version
+    return report
 
 
 def init_db() -> None:
@@ -25,7 +112,7 @@ def init_db() -> None:
         raise FileNotFoundError('schema.sql not found')
     with open(schema_path, 'r', encoding='utf-8') as f:
         sql = f.read()
-    conn = sqlite3.connect(app.config['DATABASE'])
+    conn = connect_db()
     for statement in sql.split(';'):
         stmt = statement.strip()
         if not stmt:
@@ -33,15 +120,434 @@ def init_db() -> None:
         if stmt.upper().startswith('CREATE TABLE IF NOT EXISTS') or stmt.upper().startswith('CREATE INDEX IF NOT EXISTS'):
             conn.execute(stmt)
     conn.commit()
+    ensure_sort_indexes(conn)
+    _repair_bulk_ingest(conn)
+    ensure_url_search_index(conn)
+    ensure_url_parts(conn)
+    ensure_lookup_tables(conn)
+    ensure_facet_counts(conn)
     conn.close()
 
 
+def _has_trigger(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?", (name,)
+    ).fetchone() is not None
+
+
+def _drop_triggers(conn: sqlite3.Connection, prefix: str) -> None:
+    """Drop the ``{prefix}_ai``, ``_ad`` and ``_au`` triggers."""
+    for event in ('ai', 'ad', 'au'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {prefix}_{event}")
+
+
+# Trigram FTS5 shadow index over ``urls`` used for substring search. It is an
+# external content table so the text is not stored twice; the triggers keep it
+# in step with inserts, updates and deletes.
+_URL_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE urls_fts USING fts5("
+    "url, tags, mime_type, content='urls', content_rowid='id', tokenize='trigram')"
+)
+
+
+def _url_fts_triggers(scope: str = '') -> Tuple[str, str, str]:
+    return (
+        """CREATE TRIGGER IF NOT EXISTS urls_fts_ai AFTER INSERT ON urls BEGIN
+            INSERT INTO urls_fts(rowid, url, tags, mime_type)
+            VALUES (new.id, new.url, new.tags, new.mime_type);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS urls_fts_ad AFTER DELETE ON urls{scope} BEGIN
+            INSERT INTO urls_fts(urls_fts, rowid, url, tags, mime_type)
+            VALUES ('delete', old.id, old.url, old.tags, old.mime_type);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS urls_fts_au AFTER UPDATE OF url, tags, mime_type ON urls{scope} BEGIN
+            INSERT INTO urls_fts(urls_fts, rowid, url, tags, mime_type)
+            VALUES ('delete', old.id, old.url, old.tags, old.mime_type);
+            INSERT INTO urls_fts(rowid, url, tags, mime_type)
+            VALUES (new.id, new.url, new.tags, new.mime_type);
+        END""",
+    )
+
+
+def ensure_url_search_index(conn: sqlite3.Connection) -> bool:
+    """Create the ``urls_fts`` index and its triggers if they are missing.
+
+    Existing rows are indexed when the table is first created, and again if
+    the insert trigger is missing because a :func:`bulk_ingest` window was
+    never closed. Returns ``False`` when this SQLite build lacks FTS5 or the
+    trigram tokenizer, in which case searches keep using ``LIKE``.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='urls_fts'"
+    ).fetchone()
+    installed = _has_trigger(conn, 'urls_fts_ai')
+    try:
+        with conn:
+            if not exists:
+                conn.execute(_URL_FTS_TABLE)
+            if not exists or not installed:
+                _drop_triggers(conn, 'urls_fts')
+                conn.execute("INSERT INTO urls_fts(urls_fts) VALUES ('rebuild')")
+            for trigger in _url_fts_triggers():
+                conn.execute(trigger)
+    except sqlite3.OperationalError as exc:
+        logger.warning("URL full-text index unavailable: %s", exc)
+        return False
+    return True
+
+
+# SQL ``replace`` arguments escaping the characters a JSON string may not hold.
+_JSON_ESCAPES = (
+    (r"'\'", r"'\\'"),
+    ("""'"'""", r"""'\"'"""),
+    ('char(9)', r"'\t'"),
+    ('char(10)', r"'\n'"),
+    ('char(13)', r"'\r'"),
+)
+
+
+def tag_array_sql(column: str) -> str:
+    """Return SQL turning the comma separated ``column`` into a JSON array.
+
+    Any value that still is not valid JSON after escaping yields an empty
+    array rather than an error.
+    """
+    escaped = column
+    for char, repl in _JSON_ESCAPES:
+        escaped = f"replace({escaped}, {char}, {repl})"
+    arr = f"""'["' || replace({escaped}, ',', '","') || '"]'"""
+    return f"CASE WHEN json_valid({arr}) THEN {arr} ELSE '[]' END"
+
+
+# Lookup tables split from comma separated columns. The source column stays
+# the one every writer uses; triggers keep one indexed row per item so tag
+# and query parameter filters are index lookups instead of string parsing.
+# Each entry is (table, column, lookup table, id column, item column).
+_LOOKUP_TABLES = (
+    ('urls', 'tags', 'url_tags', 'url_id', 'tag'),
+    ('domains', 'tags', 'domain_tags', 'domain_id', 'tag'),
+    ('urls', 'query_keys', 'url_params', 'url_id', 'key'),
+)
+
+
+def _lookup_triggers(table: str, column: str, lookup: str, key: str, item: str, scope: str = ''):
+    fill = (
+        f"INSERT OR IGNORE INTO {lookup} ({key}, {item}) "
+        f"SELECT new.id, trim(value) FROM json_each({tag_array_sql('new.' + column)}) "
+        f"WHERE trim(value) <> ''"
+    )
+    return (
+        f"""CREATE TRIGGER IF NOT EXISTS {lookup}_ai AFTER INSERT ON {table}
+        WHEN new.{column} IS NOT NULL AND new.{column} <> '' BEGIN
+            {fill};
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {lookup}_ad AFTER DELETE ON {table}{scope} BEGIN
+            DELETE FROM {lookup} WHERE {key} = old.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {lookup}_au AFTER UPDATE OF {column} ON {table}{scope} BEGIN
+            DELETE FROM {lookup} WHERE {key} = old.id;
+            {fill};
+        END""",
+    )
+
+
+def _lookup_fill_sql(table: str, column: str, lookup: str, key: str, item: str, where: str = '') -> str:
+    """Return SQL splitting ``column`` of every ``table`` row matching ``where`` into ``lookup``."""
+    return (
+        f"INSERT OR IGNORE INTO {lookup} ({key}, {item}) "
+        f"SELECT t.id, trim(j.value) FROM {table} AS t, "
+        f"json_each({tag_array_sql('t.' + column)}) AS j "
+        f"WHERE t.{column} <> '' AND trim(j.value) <> ''{where}"
+    )
+
+
+def ensure_lookup_tables(conn: sqlite3.Connection) -> None:
+    """Populate ``url_tags``, ``domain_tags`` and ``url_params`` and their triggers.
+
+    Runs once per table: when the insert trigger is missing the lookup table
+    is rebuilt from its source column, migrating databases created before
+    the table existed or repairing one left behind by an unfinished
+    :func:`bulk_ingest`.
+    """
+    for table, column, lookup, key, item in _LOOKUP_TABLES:
+        cols = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+        if column not in cols:
+            continue
+        installed = _has_trigger(conn, f'{lookup}_ai')
+        with conn:
+            if not installed:
+                _drop_triggers(conn, lookup)
+                conn.execute(f"DELETE FROM {lookup}")
+                conn.execute(_lookup_fill_sql(table, column, lookup, key, item))
+            for trigger in _lookup_triggers(table, column, lookup, key, item):
+                conn.execute(trigger)
+
+
+# Parsed URL columns filled at ingest by :func:`insert_urls` and for older
+# rows by the ``url_parse`` backfill job. Their indexes live here rather than
+# in schema.sql because init_db runs before the columns are added.
+_URL_PART_TYPES = {
+    'scheme': 'TEXT',
+    'host': 'TEXT',
+    'port': 'INTEGER',
+    'path': 'TEXT',
+    'ext': 'TEXT',
+    'query_keys': 'TEXT',
+}
+_URL_PART_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_urls_host ON urls(host)",
+    "CREATE INDEX IF NOT EXISTS idx_urls_path ON urls(path)",
+    "CREATE INDEX IF NOT EXISTS idx_urls_ext ON urls(ext)",
+)
+
+
+# Indexes on the HAR columns offered as keyset sort keys by
+# retrorecon.pagination. Each index ends in the rowid, so it also serves the
+# ``(column, id)`` seek. They live here for the same reason as the parsed URL
+# indexes: older databases gain the columns only in :func:`ensure_schema`.
+_SORT_INDEXES = {
+    'request_method': "CREATE INDEX IF NOT EXISTS idx_urls_request_method ON urls(request_method)",
+    'response_time_ms': "CREATE INDEX IF NOT EXISTS idx_urls_response_time_ms ON urls(response_time_ms)",
+    'source_type': "CREATE INDEX IF NOT EXISTS idx_urls_source_type ON urls(source_type)",
+}
+
+
+def ensure_sort_indexes(conn: sqlite3.Connection) -> None:
+    """Create the sort column indexes whose column exists."""
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(urls)")}
+    with conn:
+        for col, stmt in _SORT_INDEXES.items():
+            if col in cols:
+                conn.execute(stmt)
+
+
+def ensure_url_parts(conn: sqlite3.Connection) -> bool:
+    """Add the parsed URL columns and indexes if missing.
+
+    When the columns are added to a table that already holds rows a
+    ``url_parse`` job is queued to fill them. Returns ``True`` in that case.
+    """
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(urls)")]
+    missing = [c for c in URL_PART_COLUMNS if c not in cols]
+    queued = False
+    with conn:
+        for col in missing:
+            conn.execute(f"ALTER TABLE urls ADD COLUMN {col} {_URL_PART_TYPES[col]}")
+        for stmt in _URL_PART_INDEXES:
+            conn.execute(stmt)
+        if missing and conn.execute("SELECT 1 FROM urls LIMIT 1").fetchone():
+            conn.execute(
+                "INSERT INTO jobs (type, domain, status, progress) VALUES ('url_parse', '', 'queued', 0)"
+            )
+            queued = True
+    return queued
+
+
+# Facet histograms of the whole table, one row per (facet, value). Each
+# trigger upserts one delta per facet so unfiltered histograms never scan
+# ``urls``; see retrorecon.facets.
+_FACET_COLUMNS = 'status_code, mime_type, ext, host, timestamp'
+
+
+def _facet_delta_sql(prefix: str, delta: int) -> str:
+    values = ', '.join(f"('{name}', {facet_sql(name, prefix)}, {delta})" for name in FACET_EXPRESSIONS)
+    return (
+        f"INSERT INTO url_facet_counts (facet, value, n) VALUES {values} "
+        "ON CONFLICT (facet, value) DO UPDATE SET n = n + excluded.n"
+    )
+
+
+def _facet_triggers(scope: str = '') -> Tuple[str, str, str]:
+    return (
+        f"""CREATE TRIGGER IF NOT EXISTS url_facet_counts_ai AFTER INSERT ON urls BEGIN
+            {_facet_delta_sql('new.', 1)};
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS url_facet_counts_ad AFTER DELETE ON urls{scope} BEGIN
+            {_facet_delta_sql('old.', -1)};
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS url_facet_counts_au AFTER UPDATE OF {_FACET_COLUMNS} ON urls{scope} BEGIN
+            {_facet_delta_sql('old.', -1)};
+            {_facet_delta_sql('new.', 1)};
+        END""",
+    )
+
+
+def _facet_counts_sql(where: str = '') -> str:
+    """Return a ``SELECT`` of ``(facet, value, n)`` over the ``urls`` rows matching ``where``."""
+    return ' UNION ALL '.join(
+        f"SELECT '{name}', {facet_sql(name)}, COUNT(*) FROM urls {where} GROUP BY 2"
+        for name in FACET_EXPRESSIONS
+    )
+
+
+def ensure_facet_counts(conn: sqlite3.Connection) -> None:
+    """Install the ``url_facet_counts`` triggers, rebuilding the table once.
+
+    Must run after :func:`ensure_url_parts` since the ``ext`` and ``host``
+    facets read the parsed URL columns.
+    """
+    installed = _has_trigger(conn, 'url_facet_counts_ai')
+    with conn:
+        if not installed:
+            _drop_triggers(conn, 'url_facet_counts')
+            conn.execute("DELETE FROM url_facet_counts")
+            conn.execute("INSERT INTO url_facet_counts (facet, value, n) " + _facet_counts_sql())
+        for trigger in _facet_triggers():
+            conn.execute(trigger)
+
+
+class _Upkeep(NamedTuple):
+    """Trigger-maintained side table of ``urls`` that :func:`bulk_ingest` defers.
+
+    ``triggers(scope)`` returns the ``{prefix}_ai``, ``_ad`` and ``_au``
+    statements with ``scope`` added to the delete and update triggers.
+    ``catch_up`` brings the table up to date for the rows listed in
+    ``urls_bulk_pending``.
+    """
+
+    prefix: str
+    triggers: Callable[[str], Tuple[str, ...]]
+    catch_up: str
+
+
+# Rows inserted during a bulk_ingest window. Ids are recorded rather than
+# compared with a watermark because without AUTOINCREMENT SQLite reuses the
+# ids of deleted rows at the top of the table.
+_BULK_PENDING_TABLE = "CREATE TABLE IF NOT EXISTS urls_bulk_pending (id INTEGER PRIMARY KEY)"
+_BULK_PENDING_TRIGGER = """CREATE TRIGGER IF NOT EXISTS urls_bulk_pending_ai AFTER INSERT ON urls BEGIN
+            INSERT OR IGNORE INTO urls_bulk_pending (id) VALUES (new.id);
+        END"""
+# Pending rows are not in the side tables yet, so deletes and updates of
+# them are left to the catch-up.
+_BULK_SCOPE = " WHEN old.id NOT IN (SELECT id FROM urls_bulk_pending)"
+_PENDING_IDS = "(SELECT id FROM urls_bulk_pending)"
+
+_BULK_UPKEEP: List[_Upkeep] = [
+    _Upkeep(
+        'urls_fts',
+        _url_fts_triggers,
+        "INSERT INTO urls_fts(rowid, url, tags, mime_type) "
+        f"SELECT id, url, tags, mime_type FROM urls WHERE id IN {_PENDING_IDS}",
+    ),
+    _Upkeep(
+        'url_facet_counts',
+        _facet_triggers,
+        "INSERT INTO url_facet_counts (facet, value, n) SELECT * FROM ("
+        + _facet_counts_sql(f'WHERE id IN {_PENDING_IDS}')
+        + ") WHERE true ON CONFLICT (facet, value) DO UPDATE SET n = n + excluded.n",
+    ),
+] + [
+    _Upkeep(
+        spec[2],
+        functools.partial(_lookup_triggers, *spec),
+        _lookup_fill_sql(*spec, f' AND t.id IN {_PENDING_IDS}'),
+    )
+    for spec in _LOOKUP_TABLES
+    if spec[0] == 'urls'
+]
+
+_bulk_lock = threading.Lock()
+# Database file -> (open bulk_ingest blocks, deferred prefixes)
+_bulk_windows: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+
+
+def _clear_bulk_pending(conn: sqlite3.Connection) -> None:
+    conn.execute("DROP TRIGGER IF EXISTS urls_bulk_pending_ai")
+    conn.execute("DELETE FROM urls_bulk_pending")
+
+
+def _defer_upkeep(conn: sqlite3.Connection) -> Tuple[str, ...]:
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        deferred = tuple(u.prefix for u in _BULK_UPKEEP if _has_trigger(conn, f'{u.prefix}_ai'))
+        if deferred:
+            conn.execute(_BULK_PENDING_TABLE)
+            _clear_bulk_pending(conn)
+            conn.execute(_BULK_PENDING_TRIGGER)
+        for upkeep in _BULK_UPKEEP:
+            if upkeep.prefix in deferred:
+                _drop_triggers(conn, upkeep.prefix)
+                for trigger in upkeep.triggers(_BULK_SCOPE)[1:]:
+                    conn.execute(trigger)
+    return deferred
+
+
+def _resume_upkeep(conn: sqlite3.Connection, deferred: Tuple[str, ...]) -> None:
+    if not deferred:
+        return
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for upkeep in _BULK_UPKEEP:
+            if upkeep.prefix in deferred:
+                conn.execute(upkeep.catch_up)
+                _drop_triggers(conn, upkeep.prefix)
+                for trigger in upkeep.triggers(''):
+                    conn.execute(trigger)
+        _clear_bulk_pending(conn)
+
+
+def _repair_bulk_ingest(conn: sqlite3.Connection) -> None:
+    """Stop recording pending ids left behind by an unfinished :func:`bulk_ingest`.
+
+    The side tables themselves are rebuilt afterwards by the ``ensure_*``
+    functions, which find their insert triggers missing.
+    """
+    if _has_trigger(conn, 'urls_bulk_pending_ai'):
+        with conn:
+            _clear_bulk_pending(conn)
+
+
+@contextmanager
+def bulk_ingest(conn: sqlite3.Connection) -> Iterator[None]:
+    """Defer the per-row upkeep of ``urls`` side tables during a bulk write.
+
+    Every row inserted into ``urls`` normally also writes the ``urls_fts``
+    index, splits its tags and query keys into ``url_tags`` and
+    ``url_params`` and upserts one count per facet in ``url_facet_counts``. Inside this block
+    the insert triggers are replaced by one that only records the new id in
+    ``urls_bulk_pending``, and the delete and update triggers skip recorded
+    rows. On exit the recorded rows are
+    indexed with one set-based statement per table and the triggers are
+    restored. Nested and concurrent blocks on one database share a window
+    that closes with the last of them. Until then new rows are missing from
+    full-text search, tag and query key filters and unfiltered
+    ``/api/facets`` results; if the process
+    dies first, :func:`ensure_url_search_index`, :func:`ensure_lookup_tables`
+    and :func:`ensure_facet_counts` rebuild the tables the next time the
+    database is opened.
+    """
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    with _bulk_lock:
+        depth, deferred = _bulk_windows.get(path, (0, ()))
+        if not depth:
+            deferred = _defer_upkeep(conn)
+        _bulk_windows[path] = (depth + 1, deferred)
+    try:
+        yield
+    finally:
+        with _bulk_lock:
+            depth, deferred = _bulk_windows.pop(path)
+            if depth > 1:
+                _bulk_windows[path] = (depth - 1, deferred)
+            else:
+                _resume_upkeep(conn, deferred)
+
+
+def url_fts_available(db: Optional[sqlite3.Connection] = None) -> bool:
+    """Return ``True`` if the database has the ``urls_fts`` search index."""
+    conn = db if db is not None else get_db()
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='urls_fts'"
+    ).fetchone()
+    return row is not None
+
+
 def ensure_schema() -> None:
     """Apply ``schema.sql`` to an existing database if tables are missing."""
     if os.path.exists(current_app.config['DATABASE']):
         init_db()
         # Add columns introduced in newer versions
-        conn = sqlite3.connect(current_app.config['DATABASE'])
+        conn = connect_db()
         try:
             cur = conn.execute("PRAGMA table_info(screenshots)")
             cols = [row[1] for row in cur.fetchall()]
@@ -82,6 +588,27 @@ def ensure_schema() -> None:
             if 'source_type' not in cols:
                 conn.execute("ALTER TABLE urls ADD COLUMN source_type TEXT DEFAULT 'cdx'")
             
+            cur = conn.execute("PRAGMA table_info(jobs)")
+            cols = [row[1] for row in cur.fetchall()]
+            if 'resume_key' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN resume_key TEXT")
+            if 'page_count' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN page_count INTEGER")
+            if 'next_page' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN next_page INTEGER DEFAULT 0")
+            if 'inserted' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN inserted INTEGER DEFAULT 0")
+            if 'started_at' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN started_at TIMESTAMP")
+            if 'updated_at' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN updated_at TIMESTAMP")
+            if 'from_timestamp' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN from_timestamp TEXT")
+            if 'max_timestamp' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN max_timestamp TEXT")
+            if 'spec' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN spec TEXT")
+
             cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='text_notes'")
             if not cur.fetchone():
                 conn.execute(
@@ -93,6 +620,8 @@ def ensure_schema() -> None:
                     )"""
                 )
             conn.commit()
+            ensure_sort_indexes(conn)
+            ensure_lookup_tables(conn)
         finally:
             conn.close()
 
@@ -124,7 +653,7 @@ def create_new_db(name: Optional[str] = None) -> str:
     os.makedirs(db_dir, exist_ok=True)
     db_path = os.path.join(db_dir, nm)
     if os.path.exists(db_path):
-        os.remove(db_path)
+        remove_db_files(db_path)
     current_app.config['DATABASE'] = db_path
     init_db()
     return nm
@@ -136,9 +665,8 @@ def get_db() -> sqlite3.Connection:
         raise RuntimeError('No database loaded.')
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(current_app.config['DATABASE'])
+        db = g._database = connect_db()
         db.row_factory = sqlite3.Row
-        db.create_function('has_tag', 2, _has_tag)
     return db
 
 
@@ -174,3 +702,28 @@ def executemany_db(query: str, args_list: List[Tuple]) -> int:
     db.commit()
     return cur.rowcount
 
+
+
+def insert_urls(
+    rows: Iterable[Sequence[Any]],
+    columns: Sequence[str] = URL_INSERT_COLUMNS,
+    db: Optional[sqlite3.Connection] = None,
+) -> int:
+    """Insert ``rows`` into ``urls`` in one transaction and return rows added.
+
+    The parsed URL columns (``scheme``, ``host``, ``path``...) are filled
+    from each row's URL. Rows whose URL already exists are skipped by
+    ``INSERT OR IGNORE``. The returned count is the cursor's row count, which
+    leaves out ignored duplicates and writes made by triggers. ``db``
+    defaults to the request connection.
+    """
+    conn = db if db is not None else get_db()
+    if 'url' in columns and not set(URL_PART_COLUMNS) & set(columns):
+        idx = list(columns).index('url')
+        rows = (tuple(row) + parse_url(row[idx]) for row in rows)
+        columns = tuple(columns) + URL_PART_COLUMNS
+    placeholders = ', '.join('?' for _ in columns)
+    sql = f"INSERT OR IGNORE INTO urls ({', '.join(columns)}) VALUES ({placeholders})"
+    with conn:
+        cur = conn.executemany(sql, rows)
+    return max(cur.rowcount, 0)
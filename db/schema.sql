@@ -11,7 +11,13 @@ CREATE TABLE IF NOT EXISTS urls (
     content_size INTEGER,
     request_headers TEXT,
     response_headers TEXT,
-    source_type TEXT DEFAULT 'cdx'
+    source_type TEXT DEFAULT 'cdx',
+    scheme TEXT,
+    host TEXT,
+    port INTEGER,
+    path TEXT,
+    ext TEXT,
+    query_keys TEXT
 );
 
 CREATE TABLE IF NOT EXISTS jobs (
@@ -21,7 +27,22 @@ CREATE TABLE IF NOT EXISTS jobs (
     status TEXT,
     progress INTEGER,
     result TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    resume_key TEXT,
+    page_count INTEGER,
+    next_page INTEGER DEFAULT 0,
+    inserted INTEGER DEFAULT 0,
+    from_timestamp TEXT,
+    max_timestamp TEXT,
+    spec TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS cdx_watermarks (
+    domain TEXT PRIMARY KEY,
+    last_timestamp TEXT,
+    refreshed_at TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS import_status (
@@ -99,7 +120,39 @@ CREATE TABLE IF NOT EXISTS domains (
     UNIQUE(subdomain, source)
 );
 
+CREATE TABLE IF NOT EXISTS url_tags (
+    url_id INTEGER NOT NULL,
+    tag TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (url_id, tag)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS url_params (
+    url_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (url_id, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS url_facet_counts (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (facet, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS domain_tags (
+    domain_id INTEGER NOT NULL,
+    tag TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (domain_id, tag)
+) WITHOUT ROWID;
+
 CREATE INDEX IF NOT EXISTS idx_urls_domain ON urls(domain);
+CREATE INDEX IF NOT EXISTS idx_urls_timestamp ON urls(timestamp);
+CREATE INDEX IF NOT EXISTS idx_urls_status_code ON urls(status_code);
+CREATE INDEX IF NOT EXISTS idx_urls_mime_type ON urls(mime_type);
+CREATE INDEX IF NOT EXISTS idx_url_tags_tag ON url_tags(tag, url_id);
+CREATE INDEX IF NOT EXISTS idx_domain_tags_tag ON domain_tags(tag, domain_id);
+CREATE INDEX IF NOT EXISTS idx_url_params_key ON url_params(key, url_id);
 CREATE INDEX IF NOT EXISTS idx_domains_root ON domains(root_domain);
 CREATE INDEX IF NOT EXISTS idx_domains_subdomain ON domains(subdomain);
 CREATE INDEX IF NOT EXISTS idx_assets_type ON assets(asset_type);
+CREATE INDEX IF NOT EXISTS idx_jobs_type_status ON jobs(type, status);
@@ -0,0 +1,121 @@
+"""Set-based bulk tag and delete actions over ``urls``.
+
+Each action is a single ``UPDATE`` or ``DELETE`` whose ``WHERE`` clause is
+the compiled search predicate and/or the selected ids, run in one
+transaction. Background jobs run the same statement over consecutive ``id``
+windows so the write lock is released between batches and progress can be
+checkpointed.
+"""
+
+import json
+import sqlite3
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from database import tag_array_sql
+
+BULK_ACTIONS = ('add_tag', 'remove_tag', 'clear_tags', 'delete')
+
+# Width of the ``id`` window handled per transaction by background jobs.
+BATCH_SIZE = 50000
+
+_HAS_TAG = "id IN (SELECT url_id FROM url_tags WHERE tag = ?)"
+
+
+def selection_sql(
+    ids: Optional[Sequence[int]] = None,
+    where: Sequence[str] = (),
+    params: Sequence[Any] = (),
+) -> Tuple[List[str], List[Any]]:
+    """Return clauses and parameters selecting ``ids`` and/or ``where`` rows.
+
+    Ids are passed as one JSON array parameter so any number can be given.
+    """
+    clauses = list(where)
+    values = list(params)
+    if ids is not None:
+        clauses.append("id IN (SELECT value FROM json_each(?))")
+        values.append(json.dumps([int(i) for i in ids]))
+    return clauses, values
+
+
+def action_sql(action: str, tag: str = '') -> Tuple[str, List[Any], List[str], List[Any]]:
+    """Return ``(statement, params, clauses, clause_params)`` for ``action``.
+
+    ``statement`` ends in ``WHERE`` and is completed with the selection and
+    ``clauses``, which skip rows the action would leave unchanged so the
+    reported count is the number of rows actually modified. Tags are matched
+    case-insensitively, like ``#tag`` searches.
+    """
+    if action == 'add_tag':
+        return (
+            "UPDATE urls SET tags = CASE WHEN trim(COALESCE(tags, ''), ', ') = '' THEN ? "
+            "ELSE rtrim(tags, ', ') || ',' || ? END WHERE",
+            [tag, tag],
+            [f"NOT {_HAS_TAG}"],
+            [tag],
+        )
+    if action == 'remove_tag':
+        # Rows listed in url_tags always hold a parseable tag list.
+        return (
+            "UPDATE urls SET tags = COALESCE(("
+            f"SELECT group_concat(trim(value), ',') FROM json_each({tag_array_sql('tags')}) "
+            "WHERE trim(value) <> '' AND trim(value) <> ? COLLATE NOCASE), '') WHERE",
+            [tag],
+            [_HAS_TAG],
+            [tag],
+        )
+    if action == 'clear_tags':
+        return "UPDATE urls SET tags = '' WHERE", [], ["COALESCE(tags, '') <> ''"], []
+    if action == 'delete':
+        return "DELETE FROM urls WHERE", [], [], []
+    raise ValueError(f"Unknown bulk action: {action}")
+
+
+def apply(
+    db: sqlite3.Connection,
+    action: str,
+    tag: str,
+    where: Sequence[str],
+    params: Sequence[Any],
+) -> int:
+    """Run ``action`` on the rows matching ``where`` in one transaction.
+
+    Returns the number of rows changed.
+    """
+    statement, values, clauses, clause_params = action_sql(action, tag)
+    all_clauses = list(where) + clauses
+    sql = f"{statement} {' AND '.join(f'({c})' for c in all_clauses) if all_clauses else '1'}"
+    with db:
+        cur = db.execute(sql, values + list(params) + clause_params)
+    return max(cur.rowcount, 0)
+
+
+def apply_in_batches(
+    db: sqlite3.Connection,
+    action: str,
+    tag: str,
+    where: Sequence[str],
+    params: Sequence[Any],
+    start_id: int = 0,
+    end_id: Optional[int] = None,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Run ``action`` window by window over ``start_id < id <= end_id``.
+
+    ``on_batch(last_id, changed)`` is called after each committed window.
+    ``end_id`` defaults to the current largest id. Returns rows changed.
+    """
+    if end_id is None:
+        end_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM urls").fetchone()[0]
+    step = batch_size or BATCH_SIZE
+    total = 0
+    last_id = start_id
+    while last_id < end_id:
+        upper = min(last_id + step, end_id)
+        changed = apply(db, action, tag, list(where) + ["id > ? AND id <= ?"], list(params) + [last_id, upper])
+        total += changed
+        last_id = upper
+        if on_batch is not None:
+            on_batch(last_id, changed)
+    return total
@@ -0,0 +1,415 @@
+"""Wayback Machine CDX fetching helpers for RetroRecon."""
+
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from retrorecon import response_cache
+
+logger = logging.getLogger(__name__)
+
+CDX_HOST = 'web.archive.org'
+CDX_API = f'https://{CDX_HOST}/cdx/search/cdx'
+CDX_FIELDS = 'original,timestamp,statuscode,mimetype'
+CDX_LIMIT = 1000
+CDX_TIMEOUT = 20
+# Rows handed to the writer at a time while a page is still streaming in.
+CDX_BATCH_SIZE = 500
+
+# Status codes that indicate the remote side wants us to slow down.
+_RETRY_STATUS = {429, 502, 503, 504}
+
+CdxRow = Tuple[str, Optional[str], Optional[int], Optional[str]]
+
+
+@dataclass
+class CdxCheckpoint:
+    """Resumable position of a CDX fetch.
+
+    ``page_count`` is set once the server reported how many pages exist, in
+    which case ``next_page`` is the first page not yet stored (pages before it
+    are all complete). Otherwise ``resume_key`` holds the key for the next
+    ``resumeKey`` request. ``pages_done`` counts pages stored so far; with a
+    page count it is ``next_page`` plus the later pages already finished, so
+    pages fetched again after a resume are not counted twice.
+    """
+
+    page_count: Optional[int] = None
+    next_page: int = 0
+    resume_key: str = ''
+    pages_done: int = 0
+
+
+class RateLimiter:
+    """Space calls so that at most ``rate`` happen per second across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def set_rate_limit(rate: float, host: str = CDX_HOST) -> None:
+    """Limit requests to ``host`` to ``rate`` per second (``0`` disables).
+
+    The limiter is shared by every fetch in the process so concurrent jobs
+    against the same remote stay under one budget.
+    """
+    with _LIMITERS_LOCK:
+        current = _LIMITERS.get(host)
+        if rate <= 0:
+            _LIMITERS.pop(host, None)
+        elif current is None or current.rate != rate:
+            _LIMITERS[host] = RateLimiter(rate)
+
+
+def _throttle(url: str) -> None:
+    limiter = _LIMITERS.get(urllib.parse.urlsplit(url).netloc)
+    if limiter is not None:
+        limiter.acquire()
+
+
+def create_session(concurrency: int = 1) -> requests.Session:
+    """Return a ``requests.Session`` sized for ``concurrency`` parallel fetches."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, concurrency))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def build_query(domain: str, **params: Any) -> str:
+    """Return the CDX API URL for every capture under ``*.domain``."""
+    query = {
+        'url': f'*.{domain}/*',
+        'output': 'json',
+        'fl': CDX_FIELDS,
+        'collapse': 'urlkey',
+    }
+    query.update({k: v for k, v in params.items() if v is not None})
+    return CDX_API + '?' + urllib.parse.urlencode(query, safe='*/,:')
+
+
+def _get(
+    session: Any, url: str, timeout: int = CDX_TIMEOUT, retries: int = 3, stream: bool = False
+) -> Any:
+    """GET ``url`` retrying with backoff when the CDX server throttles us."""
+    delay = 1.0
+    for attempt in range(retries + 1):
+        _throttle(url)
+        resp = session.get(url, timeout=timeout, stream=stream)
+        status = getattr(resp, 'status_code', 200)
+        if status not in _RETRY_STATUS or attempt == retries:
+            resp.raise_for_status()
+            return resp
+        retry_after = resp.headers.get('Retry-After', '') if hasattr(resp, 'headers') else ''
+        wait_for = float(retry_after) if retry_after.isdigit() else delay
+        logger.debug("CDX server returned %s, retrying in %.1fs", status, wait_for)
+        resp.close()
+        time.sleep(wait_for)
+        delay *= 2
+    return resp
+
+
+def get_num_pages(
+    session: Any, domain: str, timeout: int = CDX_TIMEOUT, from_timestamp: Optional[str] = None
+) -> Optional[int]:
+    """Return the number of CDX pages for ``domain`` or ``None`` if unknown."""
+    url = build_query(domain, output=None, showNumPages='true', **{'from': from_timestamp})
+    try:
+        resp = _get(session, url, timeout=timeout)
+        text = resp.text.strip()
+    except Exception as exc:
+        logger.debug("showNumPages failed for %s: %s", domain, exc)
+        return None
+    return int(text) if text.isdigit() else None
+
+
+def _parse_status(value: Any) -> Optional[int]:
+    raw = str(value)
+    return int(raw) if raw.isdigit() else None
+
+
+def _to_row(fields: List[Any]) -> CdxRow:
+    return (
+        fields[0],
+        fields[1] if len(fields) > 1 else None,
+        _parse_status(fields[2]) if len(fields) > 2 else None,
+        fields[3] if len(fields) > 3 else None,
+    )
+
+
+class CdxStreamParser:
+    """Incrementally parse CDX output one line at a time.
+
+    Both ``output=json`` (one row per line, as the CDX server writes it) and
+    the plain space separated text format are accepted. Rows are yielded as
+    soon as their line arrives. The ``resumeKey`` trailer, if present, is
+    stored on :attr:`resume_key` once the stream is exhausted.
+    """
+
+    def __init__(self) -> None:
+        self.resume_key: Optional[str] = None
+        self._json: Optional[bool] = None
+        self._header_seen = False
+        self._after_blank = False
+
+    def _json_rows(self, line: str) -> List[Any]:
+        if line.startswith('[['):
+            line = line[1:]
+        if line.endswith(']]'):
+            line = line[:-1]
+        line = line.rstrip(',')
+        if not line:
+            return []
+        return json.loads('[' + line + ']')
+
+    def feed(self, lines: Iterable[Union[bytes, str]]) -> Iterator[CdxRow]:
+        """Yield rows parsed from ``lines``."""
+        for raw in lines:
+            line = raw.decode('utf-8', 'replace') if isinstance(raw, bytes) else raw
+            line = line.strip()
+            if self._json is None:
+                if not line:
+                    continue
+                self._json = line.startswith('[')
+            if self._json:
+                if line in ('[', ']'):
+                    continue
+                for fields in self._json_rows(line):
+                    if not fields:
+                        self._after_blank = True
+                    elif isinstance(fields, dict):
+                        if 'resumeKey' in fields:
+                            self.resume_key = str(fields['resumeKey'])
+                    elif not self._header_seen:
+                        self._header_seen = True
+                    elif self._after_blank or len(fields) == 1:
+                        self.resume_key = str(fields[0])
+                    else:
+                        yield _to_row(fields)
+            else:
+                if not line:
+                    self._after_blank = True
+                elif self._after_blank:
+                    self.resume_key = line
+                else:
+                    yield _to_row(line.split(' '))
+
+
+def batched(rows: Iterable[CdxRow], size: Optional[int] = None) -> Iterator[List[CdxRow]]:
+    """Group ``rows`` into lists of at most ``size`` (``CDX_BATCH_SIZE``) items."""
+    size = size or CDX_BATCH_SIZE
+    batch: List[CdxRow] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_page(session: Any, url: str, parser: CdxStreamParser) -> Iterator[List[CdxRow]]:
+    """Stream ``url`` and yield parsed rows in batches of ``CDX_BATCH_SIZE``.
+
+    Pages are served from the shared response cache when possible. Fresh
+    downloads are copied into it as they stream and only kept once complete.
+    """
+    cache = response_cache.default_cache()
+    key = response_cache.request_key('GET', url) if cache else ''
+    cached = cache.iter_lines('cdx', key) if cache else None
+    if cached is not None:
+        yield from batched(parser.feed(cached))
+        return
+    resp = _get(session, url, stream=True)
+    lines = resp.iter_lines()
+    if cache:
+        lines = cache.tee_lines('cdx', key, lines)
+    try:
+        yield from batched(parser.feed(lines))
+    finally:
+        if hasattr(lines, 'close'):
+            lines.close()
+        resp.close()
+
+
+def iter_resume_pages(
+    session: Any, domain: str, resume_key: str = '', from_timestamp: Optional[str] = None
+) -> Iterator[Tuple[Optional[List[CdxRow]], Optional[str]]]:
+    """Walk the CDX API with ``resumeKey``.
+
+    Yields ``(batch, None)`` for each batch of rows and ``(None, next_key)``
+    once a page has been fully read.
+    """
+    while True:
+        url = build_query(
+            domain,
+            limit=CDX_LIMIT,
+            showResumeKey='true',
+            resumeKey=resume_key or None,
+            **{'from': from_timestamp},
+        )
+        parser = CdxStreamParser()
+        for batch in stream_page(session, url, parser):
+            yield batch, None
+        yield None, parser.resume_key
+        if not parser.resume_key:
+            break
+        resume_key = parser.resume_key
+
+
+_PAGE_DONE = object()
+
+
+def iter_parallel_pages(
+    session: Any,
+    domain: str,
+    num_pages: int,
+    concurrency: int,
+    start_page: int = 0,
+    from_timestamp: Optional[str] = None,
+) -> Iterator[Tuple[int, Optional[List[CdxRow]]]]:
+    """Fetch up to ``concurrency`` pages at once and yield their rows.
+
+    Yields ``(page, batch)`` for each batch of rows and ``(page, None)`` when
+    ``page`` has been fully read. Download threads hand batches over through a
+    bounded queue so the caller remains the single writer and memory stays
+    bounded by a few batches no matter how large a page is.
+    """
+    events: queue.Queue = queue.Queue(maxsize=concurrency * 2)
+    stop = threading.Event()
+
+    def _put(item: Tuple[int, Any]) -> bool:
+        while not stop.is_set():
+            try:
+                events.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker(page: int) -> None:
+        try:
+            url = build_query(domain, page=page, **{'from': from_timestamp})
+            for batch in stream_page(session, url, CdxStreamParser()):
+                if not _put((page, batch)):
+                    return
+            _put((page, _PAGE_DONE))
+        except Exception as exc:
+            _put((page, exc))
+
+    pages = iter(range(start_page, num_pages))
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        active = 0
+        for page in pages:
+            pool.submit(_worker, page)
+            active += 1
+            if active >= concurrency:
+                break
+        while active:
+            page, item = events.get()
+            if isinstance(item, Exception):
+                raise item
+            if item is _PAGE_DONE:
+                active -= 1
+                nxt = next(pages, None)
+                if nxt is not None:
+                    pool.submit(_worker, nxt)
+                    active += 1
+                yield page, None
+            else:
+                yield page, item
+    finally:
+        # Unblock workers waiting on a full queue if the caller stopped early.
+        stop.set()
+        pool.shutdown(wait=True)
+
+
+def fetch_domain(
+    domain: str,
+    write_rows: Callable[[List[CdxRow]], int],
+    concurrency: int = 1,
+    checkpoint: Optional[CdxCheckpoint] = None,
+    session: Any = None,
+    on_page: Optional[Callable[[CdxCheckpoint], None]] = None,
+    from_timestamp: Optional[str] = None,
+) -> int:
+    """Download every CDX page for ``domain`` and pass rows to ``write_rows``.
+
+    When ``concurrency`` is greater than one and the server reports a page
+    count, pages are fetched in parallel using the CDX pagination API.
+    Otherwise the ``resumeKey`` walk is used. Responses are parsed as they
+    stream in and ``write_rows`` receives batches of at most
+    ``CDX_BATCH_SIZE`` rows. It is only ever called from the calling thread
+    and returns how many rows it stored.
+
+    ``checkpoint`` is updated in place after each completed page and handed to
+    ``on_page`` so callers can persist it; passing a saved checkpoint back in
+    continues where the previous run stopped. ``from_timestamp`` restricts
+    the query to captures at or after that CDX timestamp. The total number of
+    stored rows is returned.
+    """
+    cp = checkpoint if checkpoint is not None else CdxCheckpoint()
+    own_session = session is None
+    if own_session:
+        session = create_session(concurrency)
+    inserted = 0
+    try:
+        if cp.page_count is None and concurrency > 1 and not cp.resume_key:
+            num_pages = get_num_pages(session, domain, from_timestamp=from_timestamp)
+            if num_pages and num_pages > 1:
+                cp.page_count = num_pages
+        if cp.page_count:
+            finished = set()
+            for page, batch in iter_parallel_pages(
+                session, domain, cp.page_count, max(1, concurrency), cp.next_page, from_timestamp
+            ):
+                if batch is not None:
+                    inserted += write_rows(batch)
+                    continue
+                finished.add(page)
+                while cp.next_page in finished:
+                    finished.discard(cp.next_page)
+                    cp.next_page += 1
+                cp.pages_done = cp.next_page + len(finished)
+                if on_page:
+                    on_page(cp)
+        else:
+            for batch, next_key in iter_resume_pages(session, domain, cp.resume_key, from_timestamp):
+                if batch is not None:
+                    inserted += write_rows(batch)
+                    continue
+                cp.resume_key = next_key or ''
+                cp.pages_done += 1
+                if on_page:
+                    on_page(cp)
+    finally:
+        if own_session:
+            session.close()
+    return inserted
@@ -0,0 +1,46 @@
+"""Per-domain CDX high-water timestamps used for incremental refreshes."""
+
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+
+def get_watermark(db: sqlite3.Connection, domain: str) -> Optional[str]:
+    """Return the newest CDX timestamp recorded for ``domain``."""
+    row = db.execute(
+        "SELECT last_timestamp FROM cdx_watermarks WHERE domain = ?", [domain]
+    ).fetchone()
+    return row[0] if row else None
+
+
+def update_watermark(db: sqlite3.Connection, domain: str, timestamp: Optional[str]) -> None:
+    """Record a completed fetch of ``domain`` that saw captures up to ``timestamp``.
+
+    The stored value only ever moves forward so a refresh that found nothing
+    new keeps the previous high-water mark.
+    """
+    db.execute(
+        """
+        INSERT INTO cdx_watermarks (domain, last_timestamp, refreshed_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(domain) DO UPDATE SET
+            last_timestamp = CASE
+                WHEN excluded.last_timestamp IS NULL THEN cdx_watermarks.last_timestamp
+                WHEN cdx_watermarks.last_timestamp IS NULL THEN excluded.last_timestamp
+                ELSE MAX(cdx_watermarks.last_timestamp, excluded.last_timestamp)
+            END,
+            refreshed_at = CURRENT_TIMESTAMP
+        """,
+        [domain, timestamp],
+    )
+    db.commit()
+
+
+def list_watermarks(db: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Return every tracked domain with its high-water timestamp."""
+    rows = db.execute(
+        "SELECT domain, last_timestamp, refreshed_at FROM cdx_watermarks ORDER BY domain"
+    ).fetchall()
+    return [
+        {'domain': r[0], 'last_timestamp': r[1], 'refreshed_at': r[2]}
+        for r in rows
+    ]
@@ -0,0 +1,324 @@
+"""Parquet and Arrow export and import of the ``urls`` and ``domains`` tables.
+
+Low-cardinality columns (domain, MIME type, status code, host...) are written
+dictionary-encoded, and rows are read from a single cursor and written one
+row group / record batch at a time, so exports stream with flat memory. ``pyarrow`` is listed in
+``requirements.txt`` but imported on first use, so the rest of the app still
+starts without it.
+"""
+
+import sqlite3
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from retrorecon.url_parts import URL_PART_COLUMNS
+
+# Column kinds: 'int' -> int64, 'str' -> string, 'dict' -> dictionary encoded
+# string, 'dict_int' -> dictionary encoded int32.
+URL_COLUMNS = (
+    ('id', 'int'),
+    ('url', 'str'),
+    ('domain', 'dict'),
+    ('timestamp', 'str'),
+    ('status_code', 'dict_int'),
+    ('mime_type', 'dict'),
+    ('tags', 'str'),
+    ('request_method', 'dict'),
+    ('response_time_ms', 'int'),
+    ('content_size', 'int'),
+    ('request_headers', 'str'),
+    ('response_headers', 'str'),
+    ('source_type', 'dict'),
+    ('scheme', 'dict'),
+    ('host', 'dict'),
+    ('port', 'int'),
+    ('path', 'str'),
+    ('ext', 'dict'),
+    ('query_keys', 'str'),
+)
+DOMAIN_COLUMNS = (
+    ('id', 'int'),
+    ('root_domain', 'dict'),
+    ('subdomain', 'str'),
+    ('source', 'dict'),
+    ('tags', 'str'),
+    ('cdx_indexed', 'int'),
+    ('fetched_at', 'str'),
+)
+TABLES = {'urls': URL_COLUMNS, 'domains': DOMAIN_COLUMNS}
+
+# Format -> (mimetype, file extension).
+COLUMNAR_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+}
+
+# Rows per Parquet row group / Arrow record batch, on export and import.
+ROW_GROUP_SIZE = 50000
+
+TABLE_METADATA_KEY = b'retrorecon.table'
+
+_PARQUET_MAGIC = b'PAR1'
+_ARROW_MAGIC = b'ARROW1'
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ValueError(f"Parquet and Arrow support requires the pyarrow package: {exc}") from exc
+    return pyarrow
+
+
+def available() -> bool:
+    """Return ``True`` if ``pyarrow`` can be imported."""
+    try:
+        _pyarrow()
+    except ValueError:
+        return False
+    return True
+
+
+def _int(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _str(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def _plain_array(pa: Any, column: Sequence[Any], type_: Any, convert: Any) -> Any:
+    try:
+        return pa.array(column, type_)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        # SQLite columns are loosely typed; coerce stray values one by one.
+        return pa.array([convert(v) for v in column], type_)
+
+
+class _Dictionary:
+    """Dictionary encoder for one column of an export.
+
+    Parquet keeps a dictionary per row group, so with ``shared=False`` each
+    batch is encoded against a fresh dictionary of its own values. Arrow IPC
+    files allow a single dictionary per field that may only grow by deltas,
+    so with ``shared=True`` one dictionary is kept for the whole export and
+    each batch appends just the values it introduces; the writer then emits
+    only that delta. Either way every value is converted once per batch it
+    first appears in, never once per batch for the whole dictionary.
+    """
+
+    def __init__(self, pa: Any, value_type: Any, convert: Any, shared: bool) -> None:
+        self.pa = pa
+        self.value_type = value_type
+        self.convert = convert
+        self.shared = shared
+        self.index: Dict[Any, int] = {}
+        self.dictionary = pa.array([], value_type)
+
+    def encode(self, column: Sequence[Any]) -> Any:
+        if not self.shared:
+            self.index = {}
+        indices: List[Optional[int]] = []
+        added: List[Any] = []
+        for value in column:
+            value = self.convert(value)
+            if value is None:
+                indices.append(None)
+                continue
+            i = self.index.get(value)
+            if i is None:
+                i = self.index[value] = len(self.index)
+                added.append(value)
+            indices.append(i)
+        if not self.shared:
+            self.dictionary = self.pa.array(added, self.value_type)
+        elif added:
+            self.dictionary = self.pa.concat_arrays(
+                [self.dictionary, self.pa.array(added, self.value_type)]
+            )
+        return self.pa.DictionaryArray.from_arrays(
+            self.pa.array(indices, self.pa.int32()), self.dictionary
+        )
+
+
+def _schema(pa: Any, table: str, columns: Sequence[Tuple[str, str]]) -> Any:
+    types = {
+        'int': pa.int64(),
+        'str': pa.string(),
+        'dict': pa.dictionary(pa.int32(), pa.string()),
+        'dict_int': pa.dictionary(pa.int32(), pa.int32()),
+    }
+    return pa.schema(
+        [pa.field(name, types[kind]) for name, kind in columns],
+        metadata={TABLE_METADATA_KEY: table.encode()},
+    )
+
+
+class _Chunks:
+    """Write-only file object collecting output until :meth:`take` is called."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def table_columns(db: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    """Return the exportable ``(column, kind)`` pairs present in ``table``."""
+    present = {r[1] for r in db.execute(f"PRAGMA table_info({table})")}
+    return [(name, kind) for name, kind in TABLES[table] if name in present]
+
+
+def iter_export(
+    db: sqlite3.Connection,
+    table: str,
+    fmt: str,
+    where_sql: str = '',
+    params: Sequence[Any] = (),
+    batch_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yield ``table`` rows matching ``where_sql`` as a Parquet or Arrow file.
+
+    One row group (Parquet) or record batch (Arrow IPC file) is written per
+    ``batch_size`` rows and its bytes are yielded straight away.
+    """
+    pa = _pyarrow()
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f'unknown columnar format: {fmt}')
+    columns = table_columns(db, table)
+    schema = _schema(pa, table, columns)
+    shared = fmt == 'arrow'
+    encoders: List[Any] = []
+    for _name, kind in columns:
+        if kind == 'dict':
+            encoders.append(_Dictionary(pa, pa.string(), _str, shared).encode)
+        elif kind == 'dict_int':
+            encoders.append(_Dictionary(pa, pa.int32(), _int, shared).encode)
+        elif kind == 'int':
+            encoders.append(lambda col: _plain_array(pa, col, pa.int64(), _int))
+        else:
+            encoders.append(lambda col: _plain_array(pa, col, pa.string(), _str))
+    sink = _Chunks()
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        options = pa.ipc.IpcWriteOptions(compression='zstd', emit_dictionary_deltas=True)
+        writer = pa.ipc.new_file(sink, schema, options=options)
+    cur = db.execute(
+        f"SELECT {', '.join(name for name, _ in columns)} FROM {table} {where_sql} ORDER BY id",
+        list(params),
+    )
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size or ROW_GROUP_SIZE)
+            if not rows:
+                break
+            arrays = [encode([r[i] for r in rows]) for i, encode in enumerate(encoders)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+    finally:
+        cur.close()
+
+
+def detect_format(path: str) -> Optional[str]:
+    """Return ``'parquet'`` or ``'arrow'`` from the magic bytes of ``path``."""
+    with open(path, 'rb') as fh:
+        magic = fh.read(6)
+    if magic.startswith(_PARQUET_MAGIC):
+        return 'parquet'
+    if magic == _ARROW_MAGIC:
+        return 'arrow'
+    return None
+
+
+class ColumnarFile(NamedTuple):
+    table: str
+    columns: Tuple[str, ...]
+    num_rows: int
+    batches: Iterator[List[Tuple[Any, ...]]]
+
+
+def _detect_table(schema: Any) -> str:
+    table = (schema.metadata or {}).get(TABLE_METADATA_KEY, b'').decode()
+    if table in TABLES:
+        return table
+    return 'domains' if 'subdomain' in schema.names else 'urls'
+
+
+def read_file(path: str, batch_size: Optional[int] = None) -> ColumnarFile:
+    """Open a Parquet or Arrow file and return its target table and row batches.
+
+    Only columns known for the table are read. ``id`` and the parsed URL
+    columns are left out so imported rows get fresh ids and parts parsed
+    the same way as every other import.
+    """
+    pa = _pyarrow()
+    fmt = detect_format(path)
+    if fmt == 'parquet':
+        source = pa.parquet.ParquetFile(path)
+        schema = source.schema_arrow
+        num_rows = source.metadata.num_rows
+    elif fmt == 'arrow':
+        source = pa.ipc.open_file(pa.memory_map(path))
+        schema = source.schema
+        num_rows = sum(source.get_batch(i).num_rows for i in range(source.num_record_batches))
+    else:
+        raise ValueError('Not a Parquet or Arrow IPC file')
+    table = _detect_table(schema)
+    skip = {'id'} | (set(URL_PART_COLUMNS) if table == 'urls' else set())
+    columns = tuple(name for name, _ in TABLES[table] if name in schema.names and name not in skip)
+    if 'url' not in columns and 'subdomain' not in columns:
+        raise ValueError(f'File has no {"url" if table == "urls" else "subdomain"} column')
+
+    def batches() -> Iterator[List[Tuple[Any, ...]]]:
+        if fmt == 'parquet':
+            it = source.iter_batches(batch_size=batch_size or ROW_GROUP_SIZE, columns=list(columns))
+        else:
+            it = (source.get_batch(i).select(list(columns)) for i in range(source.num_record_batches))
+        for batch in it:
+            yield list(zip(*(batch.column(name).to_pylist() for name in columns)))
+
+    return ColumnarFile(table, columns, num_rows, batches())
+
+
+def insert_domains(db: sqlite3.Connection, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> int:
+    """Insert ``rows`` into ``domains`` in one transaction and return rows added."""
+    placeholders = ', '.join('?' for _ in columns)
+    sql = f"INSERT OR IGNORE INTO domains ({', '.join(columns)}) VALUES ({placeholders})"
+    with db:
+        cur = db.executemany(sql, rows)
+    return max(cur.rowcount, 0)
+
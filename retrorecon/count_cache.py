@@ -0,0 +1,160 @@
+"""Cached result counts for URL searches.
+
+Counting matches costs as much as the search itself, and paging through one
+query used to recount on every page. Counts, and other aggregates such as
+facet histograms, are cached per database and search predicate and stamped
+with a write generation read from ``PRAGMA data_version`` on a long lived
+watcher connection: that value changes whenever any other connection, in
+this process or another, commits to the database, so a stale count is never
+served.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 256
+
+T = TypeVar('T')
+
+
+class Count(NamedTuple):
+    value: int
+    exact: bool
+
+
+class _Watcher:
+    """Private connection used only to read ``PRAGMA data_version``."""
+
+    def __init__(self, path: str, stamp: Tuple[int, int]) -> None:
+        self.stamp = stamp
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    def version(self) -> int:
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+
+_watchers: Dict[str, _Watcher] = {}
+_cache: 'OrderedDict[Tuple[str, Hashable], Tuple[Tuple[int, int, int], Any]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def generation(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return a value that changes whenever the database at ``path`` does.
+
+    The file's inode and mtime are included so a database replaced under
+    the same name, or written while in rollback journal mode, is never
+    mistaken for the old one; the watcher is reopened when they change.
+    Returns ``None`` when the file cannot be inspected, which disables
+    caching for that call.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns)
+    with _lock:
+        watcher = _watchers.get(path)
+        if watcher is not None and watcher.stamp != stamp:
+            watcher.close()
+            watcher = None
+        try:
+            if watcher is None:
+                watcher = _watchers[path] = _Watcher(path, stamp)
+            return stamp + (watcher.version(),)
+        except sqlite3.Error as exc:
+            logger.debug("Count cache disabled for %s: %s", path, exc)
+            _watchers.pop(path, None)
+            return None
+
+
+def _count(db: sqlite3.Connection, where_sql: str, params: Sequence[Any], limit: int) -> Count:
+    if limit > 0:
+        # Stop counting one row past the limit; the page only needs to know
+        # that there are at least that many matches.
+        row = db.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM urls {where_sql} LIMIT ?)",
+            list(params) + [limit + 1],
+        ).fetchone()
+        if row[0] > limit:
+            return Count(limit, False)
+        return Count(row[0], True)
+    row = db.execute(f"SELECT COUNT(*) FROM urls {where_sql}", list(params)).fetchone()
+    return Count(row[0], True)
+
+
+def cached(path: str, key: Hashable, compute: Callable[[], T], use_cache: bool = True) -> T:
+    """Return ``compute()`` for ``key``, reusing it until ``path`` changes."""
+    full_key = (path, key)
+    gen = generation(path) if use_cache else None
+    if gen is not None:
+        with _lock:
+            hit = _cache.get(full_key)
+            if hit is not None and hit[0] == gen:
+                _cache.move_to_end(full_key)
+                return hit[1]
+    result = compute()
+    if gen is not None:
+        with _lock:
+            _cache[full_key] = (gen, result)
+            _cache.move_to_end(full_key)
+            while len(_cache) > MAX_ENTRIES:
+                _cache.popitem(last=False)
+    return result
+
+
+def count_urls(
+    db: sqlite3.Connection,
+    path: str,
+    where_sql: str = '',
+    params: Sequence[Any] = (),
+    estimate_limit: int = 0,
+    use_cache: bool = True,
+) -> Count:
+    """Return the number of ``urls`` rows matching ``where_sql``.
+
+    With ``estimate_limit`` set, counting stops after that many matches and
+    the result is marked inexact so the page can show "≥ N". Results are
+    cached under the compiled SQL and parameters, so differently spelled
+    queries that compile to the same predicate share one entry.
+    """
+    return cached(
+        path,
+        ('count', where_sql, tuple(params), estimate_limit),
+        lambda: _count(db, where_sql, params, estimate_limit),
+        use_cache,
+    )
+
+
+def forget(path: Optional[str]) -> None:
+    """Close the watcher for ``path`` and drop its cached results.
+
+    Called when the database at ``path`` stops being the active one, is
+    renamed or is deleted, so its watcher connection does not outlive it.
+    """
+    with _lock:
+        watcher = _watchers.pop(path, None) if path else None
+        if watcher is not None:
+            watcher.close()
+        for key in [k for k in _cache if k[0] == path]:
+            del _cache[key]
+
+
+def clear() -> None:
+    """Drop every cached count and close the watcher connections."""
+    with _lock:
+        _cache.clear()
+        for watcher in _watchers.values():
+            watcher.close()
+        _watchers.clear()
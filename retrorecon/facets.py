@@ -0,0 +1,99 @@
+"""Facet histograms (status, MIME type, extension, host, year) over ``urls``.
+
+Without a search the histograms are read from ``url_facet_counts``, which
+triggers installed by :func:`database.ensure_facet_counts` keep in step with
+every insert, update and delete. A search computes all facets in one pass:
+its matches are materialized once and the temporary result is grouped per
+facet. Either way the result is cached per database generation.
+"""
+
+import sqlite3
+from typing import Any, Dict, List, Sequence
+
+from retrorecon import count_cache
+
+# ``MATERIALIZED`` (SQLite 3.35+) computes the filtered rows once for all
+# facets; older versions give the same result with one scan per facet.
+_MATERIALIZED = 'MATERIALIZED ' if sqlite3.sqlite_version_info >= (3, 35, 0) else ''
+
+# Facet name -> SQL expression over a ``urls`` row; ``{t}`` is the row
+# prefix (``new.``, ``old.`` or empty). Missing values are counted as ''.
+FACET_EXPRESSIONS = {
+    'status': "CAST({t}status_code AS TEXT)",
+    'mime': "{t}mime_type",
+    'ext': "{t}ext",
+    'host': "{t}host",
+    'year': "substr({t}timestamp, 1, 4)",
+}
+
+DEFAULT_LIMIT = 20
+
+Facets = Dict[str, List[Dict[str, Any]]]
+
+
+def facet_sql(facet: str, prefix: str = '') -> str:
+    """Return the bucket expression of ``facet`` for the row ``prefix``."""
+    return f"COALESCE({FACET_EXPRESSIONS[facet].format(t=prefix)}, '')"
+
+
+def _bucket_value(facet: str, value: str) -> Any:
+    if value == '':
+        return None
+    if facet == 'status' and value.isdigit():
+        return int(value)
+    return value
+
+
+def _histograms(rows: Sequence[Sequence[Any]], limit: int) -> Dict[str, Any]:
+    """Build the response from ``(facet, value, n)`` rows sorted by count."""
+    facets: Facets = {name: [] for name in FACET_EXPRESSIONS}
+    total = 0
+    for facet, value, n in rows:
+        if facet == 'status':
+            total += n
+        bucket = facets[facet]
+        if not limit or len(bucket) < limit:
+            bucket.append({'value': _bucket_value(facet, value), 'count': n})
+    return {'total': total, 'facets': facets}
+
+
+def _compute(db: sqlite3.Connection, where_sql: str, params: Sequence[Any], limit: int) -> Dict[str, Any]:
+    if not where_sql:
+        rows = db.execute(
+            "SELECT facet, value, n FROM url_facet_counts WHERE n > 0 "
+            "ORDER BY facet, n DESC, value"
+        ).fetchall()
+        return _histograms(rows, limit)
+    columns = ', '.join(f"{facet_sql(name)} AS {name}" for name in FACET_EXPRESSIONS)
+    groups = ' UNION ALL '.join(
+        f"SELECT '{name}' AS facet, {name} AS value, COUNT(*) AS n FROM m GROUP BY {name}"
+        for name in FACET_EXPRESSIONS
+    )
+    rows = db.execute(
+        f"WITH m AS {_MATERIALIZED}(SELECT {columns} FROM urls {where_sql}) "
+        f"SELECT facet, value, n FROM ({groups}) ORDER BY facet, n DESC, value",
+        list(params),
+    ).fetchall()
+    return _histograms(rows, limit)
+
+
+def facet_counts(
+    db: sqlite3.Connection,
+    path: str,
+    where_sql: str = '',
+    params: Sequence[Any] = (),
+    limit: int = DEFAULT_LIMIT,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Return ``{'total': n, 'facets': {name: [{'value', 'count'}, ...]}}``.
+
+    ``where_sql`` is a ``WHERE`` clause over ``urls`` as built by
+    :func:`app.url_search_where`. Buckets are ordered by descending count
+    and cut to ``limit`` per facet; ``0`` keeps every bucket.
+    """
+    return count_cache.cached(
+        path,
+        ('facets', where_sql, tuple(params), limit),
+        lambda: _compute(db, where_sql, params, limit),
+        use_cache,
+    )
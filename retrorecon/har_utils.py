@@ -3,7 +3,16 @@
 import json
 import urllib.parse
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from retrorecon.json_stream import JsonReader
+
+# Members dropped while streaming unless bodies are requested. ``None`` marks
+# a value to skip; a dict descends into that member.
+_BODY_FIELDS: Dict[str, Any] = {
+    'request': {'postData': {'text': None}},
+    'response': {'content': {'text': None}},
+}
 
 
 def parse_har_file(content: bytes) -> List[Dict[str, Any]]:
@@ -16,6 +25,67 @@ def parse_har_file(content: bytes) -> List[Dict[str, Any]]:
         raise ValueError(f"Invalid HAR file format: {e}")
 
 
+def _read_pruned(reader: JsonReader, prune: Dict[str, Any]) -> Dict[str, Any]:
+    obj: Dict[str, Any] = {}
+    for key in reader.members():
+        if key not in prune:
+            obj[key] = reader.value()
+        elif prune[key] is None:
+            reader.skip_value()
+        elif reader.peek() == '{':
+            obj[key] = _read_pruned(reader, prune[key])
+        else:
+            obj[key] = reader.value()
+    return obj
+
+
+def iter_har_entries(fh: BinaryIO, include_bodies: bool = False) -> Iterator[Any]:
+    """Yield raw ``log.entries`` items from the HAR file ``fh`` one at a time.
+
+    Request and response bodies (``postData.text`` and ``content.text``) are
+    skipped without being decoded unless ``include_bodies`` is set, so memory
+    is bounded by the largest entry's metadata.
+    """
+    reader = JsonReader(fh)
+    found_log = found_entries = False
+    try:
+        if reader.peek() != '{':
+            raise ValueError("expected a JSON object")
+        for key in reader.members():
+            if key != 'log' or reader.peek() != '{':
+                reader.skip_value()
+                continue
+            found_log = True
+            for log_key in reader.members():
+                if log_key != 'entries' or reader.peek() != '[':
+                    reader.skip_value()
+                    continue
+                found_entries = True
+                for _ in reader.items():
+                    if not include_bodies and reader.peek() == '{':
+                        yield _read_pruned(reader, _BODY_FIELDS)
+                    else:
+                        yield reader.value()
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid HAR file format: {e}")
+    if not found_log:
+        raise ValueError("Invalid HAR format: missing 'log' section")
+    if not found_entries:
+        raise ValueError("Invalid HAR format: missing 'entries' section")
+
+
+def iter_har_records(fh: BinaryIO, include_bodies: bool = False) -> Iterator[Dict[str, Any]]:
+    """Stream ``fh`` and yield each HAR entry converted for database insertion."""
+    for entry in iter_har_entries(fh, include_bodies):
+        try:
+            converted_entry = convert_har_entry(entry)
+        except Exception as e:
+            print(f"Warning: Skipping invalid HAR entry: {e}")
+            continue
+        if converted_entry:
+            yield converted_entry
+
+
 def extract_har_entries(har_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Extract entries from HAR data structure."""
     if 'log' not in har_data:
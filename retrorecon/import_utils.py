@@ -0,0 +1,379 @@
+"""Streaming helpers for importing URL records from uploaded files."""
+
+import codecs
+import gzip
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple,
+)
+
+from database import insert_urls
+from retrorecon import json_stream
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+# Minimum seconds between progress callbacks from :class:`BatchWriter`.
+PROGRESS_INTERVAL = 1.0
+IMPORT_COLUMNS = ('url', 'timestamp', 'status_code', 'mime_type', 'tags')
+# Extensions accepted by ``import_file`` for plain and compressed uploads.
+JSON_EXTENSIONS = ('json', 'ndjson', 'jsonl')
+ARCHIVE_EXTENSIONS = {'cdx': 'cdxj', 'cdxj': 'cdxj', 'warc': 'warc'}
+COLUMNAR_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow', 'feather': 'arrow'}
+_COMPRESSED_SUFFIXES = ('.gz', '.gzip', '.zst', '.zstd')
+UPLOAD_EXTENSIONS = (
+    JSON_EXTENSIONS + ('har',) + tuple(ARCHIVE_EXTENSIONS) + tuple(COLUMNAR_EXTENSIONS)
+    + tuple(suffix.lstrip('.') for suffix in _COMPRESSED_SUFFIXES) + ('zip',)
+)
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_ZIP_MAGIC = b'PK\x03\x04'
+_READ_BUFFER = 1 << 20
+# Bytes of NDJSON handed to each worker process in parallel mode.
+PARALLEL_CHUNK_SIZE = 4 << 20
+
+HAR_COLUMNS = (
+    'url', 'domain', 'timestamp', 'status_code', 'mime_type', 'tags',
+    'request_method', 'response_time_ms', 'content_size',
+    'request_headers', 'response_headers', 'source_type',
+)
+
+
+class Upload(NamedTuple):
+    """An opened import upload.
+
+    ``stream`` yields the decompressed bytes, ``kind`` is ``'json'``,
+    ``'har'``, ``'cdxj'`` or ``'warc'`` and ``raw`` is the file on disk, whose position tracks progress
+    through the compressed input.
+    """
+
+    stream: BinaryIO
+    kind: str
+    raw: BinaryIO
+
+
+def _kind_for(name: str) -> str:
+    name = name.lower()
+    for suffix in _COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    ext = name.rsplit('.', 1)[-1] if '.' in name else ''
+    if ext == 'har':
+        return 'har'
+    if ext in JSON_EXTENSIONS:
+        return 'json'
+    if ext in ARCHIVE_EXTENSIONS:
+        return ARCHIVE_EXTENSIONS[ext]
+    if ext in COLUMNAR_EXTENSIONS:
+        return COLUMNAR_EXTENSIONS[ext]
+    raise ValueError(f"Unsupported import file: {os.path.basename(name) or 'unnamed'}")
+
+
+def _zip_member(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        try:
+            _kind_for(info.filename)
+        except ValueError:
+            continue
+        return info
+    raise ValueError("Zip archive contains no JSON, HAR, CDXJ or WARC file")
+
+
+@contextmanager
+def open_upload(path: str, filename: str = '') -> Iterator[Upload]:
+    """Open ``path`` and decompress gzip, zstd or zip uploads as a stream.
+
+    Compression is detected from the leading magic bytes. The import type
+    comes from ``filename`` with any compression suffix removed, or from the
+    first importable member of a zip archive. Nothing is decompressed to disk,
+    so compressed Parquet and Arrow files are rejected with ``ValueError``.
+    """
+    raw = open(path, 'rb')
+    stream: Any = raw
+    archive = None
+    try:
+        magic = raw.read(4)
+        raw.seek(0)
+        name = filename or path
+        if magic.startswith(_GZIP_MAGIC):
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif magic == _ZSTD_MAGIC:
+            try:
+                import zstandard
+            except ImportError as exc:  # pragma: no cover - optional dependency
+                raise ValueError(f"zstd uploads require the zstandard package: {exc}") from exc
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_size=_READ_BUFFER)
+            stream = io.BufferedReader(reader, _READ_BUFFER)
+        elif magic == _ZIP_MAGIC:
+            archive = zipfile.ZipFile(raw)
+            member = _zip_member(archive)
+            stream = archive.open(member)
+            name = member.filename
+        kind = _kind_for(name)
+        if kind in COLUMNAR_EXTENSIONS.values() and stream is not raw:
+            # read_file needs random access to the footer; both formats
+            # compress their pages internally anyway.
+            raise ValueError(f"{kind.capitalize()} files must be uploaded uncompressed, not gzip, zstd or zip")
+        yield Upload(stream, kind, raw)
+    finally:
+        if stream is not raw:
+            stream.close()
+        if archive is not None:
+            archive.close()
+        raw.close()
+
+
+def upload_kind(path: str, filename: str = '') -> str:
+    """Return the import kind of the upload at ``path``."""
+    with open_upload(path, filename) as upload:
+        return upload.kind
+
+
+def normalize_record(item: Any) -> Optional[Dict[str, Any]]:
+    """Return an import record for a bare URL string or a record dict."""
+    if isinstance(item, str):
+        url = item.strip()
+        return {'url': url, 'tags': ''} if url else None
+    if not isinstance(item, dict):
+        return None
+    url = item.get('url')
+    if not isinstance(url, str) or not url.strip():
+        return None
+    return {
+        'url': url.strip(),
+        'timestamp': item.get('timestamp'),
+        'status_code': item.get('status_code'),
+        'mime_type': item.get('mime_type'),
+        'tags': str(item.get('tags') or '').strip(),
+    }
+
+
+def iter_records(fh: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield normalized records from a JSON array or NDJSON file."""
+    if json_stream.peek_start(fh) == b'[':
+        items = json_stream.iter_array(fh)
+    else:
+        items = json_stream.iter_lines(fh)
+    for item in items:
+        rec = normalize_record(item)
+        if rec is not None:
+            yield rec
+
+
+def record_row(rec: Dict[str, Any], columns: Sequence[str] = IMPORT_COLUMNS) -> Tuple[Any, ...]:
+    """Return ``rec`` as a row matching ``columns``."""
+    return tuple(rec.get(col) for col in columns)
+
+
+def batched(items: Iterable[Any], size: Optional[int] = None) -> Iterator[List[Any]]:
+    """Group ``items`` into lists of at most ``size`` (``IMPORT_BATCH_SIZE``)."""
+    size = size or IMPORT_BATCH_SIZE
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BatchWriter:
+    """Insert rows into ``urls`` in chunked transactions.
+
+    Rows are buffered and written ``batch_size`` at a time with one
+    ``executemany`` per transaction. ``inserted`` only counts rows SQLite
+    actually added. ``on_progress`` is called with the writer at most once
+    per ``interval`` seconds and once more on :meth:`close`. When ``known``
+    is given, URLs it has already seen are dropped before they are buffered.
+    Use as a context manager so the final partial batch is written.
+    """
+
+    def __init__(
+        self,
+        db: sqlite3.Connection,
+        columns: Sequence[str] = IMPORT_COLUMNS,
+        batch_size: Optional[int] = None,
+        on_progress: Optional[Callable[['BatchWriter'], None]] = None,
+        interval: Optional[float] = None,
+        known: Any = None,
+    ) -> None:
+        self.db = db
+        self.columns = tuple(columns)
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.on_progress = on_progress
+        self.interval = PROGRESS_INTERVAL if interval is None else interval
+        self.known = known
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self._url_index = self.columns.index('url')
+        self._rows: List[Tuple[Any, ...]] = []
+        self._last_report = time.monotonic()
+
+    @property
+    def skipped(self) -> int:
+        """Rows dropped by the known-URL prefilter."""
+        return self.known.skipped if self.known is not None else 0
+
+    def add(self, row: Sequence[Any]) -> None:
+        """Queue ``row`` and write the batch once it is full."""
+        self.processed += 1
+        if self.known is not None and not self.known.add(row[self._url_index]):
+            self._maybe_report()
+            return
+        self._rows.append(tuple(row))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+        else:
+            self._maybe_report()
+
+    def extend(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> None:
+        """Write buffered rows in a single transaction."""
+        rows, self._rows = self._rows, []
+        if rows:
+            try:
+                self.inserted += insert_urls(rows, self.columns, db=self.db)
+            except sqlite3.Error as exc:
+                # One bad row fails the whole executemany; retry individually
+                # so the rest of the batch still lands.
+                logger.debug("Batch insert failed, retrying row by row: %s", exc)
+                for row in rows:
+                    try:
+                        self.inserted += insert_urls([row], self.columns, db=self.db)
+                    except sqlite3.Error:
+                        self.failed += 1
+        self._maybe_report()
+
+    def _maybe_report(self) -> None:
+        now = time.monotonic()
+        if self.on_progress is not None and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.on_progress(self)
+
+    def close(self) -> None:
+        """Write any remaining rows and report final progress."""
+        self.flush()
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def decode_ndjson(data: bytes) -> List[Tuple[Any, ...]]:
+    """Decode NDJSON ``data`` into :data:`IMPORT_COLUMNS` rows.
+
+    Runs in worker processes, so it must stay a picklable top-level function.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    rows = []
+    for line in data.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        rec = normalize_record(item)
+        if rec is not None:
+            rows.append(record_row(rec))
+    return rows
+
+
+def decode_ndjson_range(path: str, start: int, end: int) -> List[Tuple[Any, ...]]:
+    """Read bytes ``start`` to ``end`` of ``path`` and decode them as NDJSON."""
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        return decode_ndjson(fh.read(end - start))
+
+
+def ndjson_ranges(fh: BinaryIO, chunk_size: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Split the seekable file ``fh`` into ``(start, end)`` ranges on line boundaries."""
+    chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+    size = os.fstat(fh.fileno()).st_size
+    start = 0
+    while start < size:
+        fh.seek(min(start + chunk_size, size))
+        fh.readline()
+        end = min(fh.tell(), size)
+        yield start, end
+        start = end
+
+
+def ndjson_chunks(stream: BinaryIO, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    """Read ``stream`` in blocks of about ``chunk_size`` bytes ending on a newline."""
+    chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            return
+        if not data.endswith(b'\n'):
+            data += stream.readline()
+        yield data
+
+
+def _pool_context() -> Any:
+    """Return the start method for decode workers.
+
+    The pool is started from a background thread of the web app; forking a
+    multi-threaded process can leave locks held by other threads (sqlite,
+    logging, HTTP sessions) locked forever in the child.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def iter_parallel_rows(
+    upload: Upload, workers: int, chunk_size: Optional[int] = None
+) -> Iterator[Tuple[List[Tuple[Any, ...]], int]]:
+    """Decode an NDJSON upload on ``workers`` processes.
+
+    Yields ``(rows, position)`` in input order, where ``position`` is the
+    offset into the file on disk reached so far. Plain files are split into
+    byte ranges that each worker reads itself; compressed streams are read
+    here and the decompressed blocks shipped to the workers. At most two
+    blocks per worker are in flight so memory stays bounded.
+    """
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+        pending: deque = deque()
+        if upload.stream is upload.raw:
+            path = upload.raw.name
+            for start, end in ndjson_ranges(upload.raw, chunk_size):
+                pending.append((pool.submit(decode_ndjson_range, path, start, end), end))
+                if len(pending) >= workers * 2:
+                    fut, pos = pending.popleft()
+                    yield fut.result(), pos
+        else:
+            for data in ndjson_chunks(upload.stream, chunk_size):
+                pending.append((pool.submit(decode_ndjson, data), upload.raw.tell()))
+                if len(pending) >= workers * 2:
+                    fut, pos = pending.popleft()
+                    yield fut.result(), pos
+        while pending:
+            fut, pos = pending.popleft()
+            yield fut.result(), pos
@@ -0,0 +1,109 @@
+"""Helpers for the persistent ``jobs`` table."""
+
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+# Columns that may be updated through :func:`update_job`.
+_JOB_FIELDS = {
+    'status',
+    'progress',
+    'result',
+    'resume_key',
+    'page_count',
+    'next_page',
+    'inserted',
+    'from_timestamp',
+    'max_timestamp',
+    'spec',
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def create_job(db: sqlite3.Connection, job_type: str, domain: str, **fields: Any) -> int:
+    """Insert a queued job and return its id."""
+    cur = db.execute(
+        "INSERT INTO jobs (type, domain, status, progress, inserted, next_page, updated_at)"
+        " VALUES (?, ?, 'queued', 0, 0, 0, CURRENT_TIMESTAMP)",
+        [job_type, domain],
+    )
+    db.commit()
+    job_id = cur.lastrowid
+    if fields:
+        update_job(db, job_id, **fields)
+    return job_id
+
+
+def update_job(db: sqlite3.Connection, job_id: int, **fields: Any) -> None:
+    """Update ``fields`` for ``job_id`` and touch ``updated_at``.
+
+    Moving a job to ``running`` also stamps ``started_at`` the first time.
+    """
+    unknown = set(fields) - _JOB_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+    sets = [f"{k} = ?" for k in fields]
+    params = list(fields.values())
+    sets.append("updated_at = CURRENT_TIMESTAMP")
+    if fields.get('status') == 'running':
+        sets.append("started_at = COALESCE(started_at, CURRENT_TIMESTAMP)")
+    db.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE id = ?", params + [job_id])
+    db.commit()
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    job = {k: row[k] for k in row.keys() if k != 'elapsed'}
+    elapsed = row['elapsed'] or 0
+    job['elapsed_seconds'] = round(elapsed, 1)
+    job['rows_per_second'] = round((row['inserted'] or 0) / elapsed, 1) if elapsed > 0 else 0.0
+    return job
+
+
+_SELECT_JOBS = """
+    SELECT id, type, domain, status, progress, result, resume_key, page_count,
+           next_page, inserted, from_timestamp, max_timestamp, spec,
+           created_at, started_at, updated_at,
+           (julianday(CASE WHEN status IN ('queued', 'running')
+                           THEN CURRENT_TIMESTAMP ELSE updated_at END)
+            - julianday(started_at)) * 86400.0 AS elapsed
+    FROM jobs
+"""
+
+
+def get_job(db: sqlite3.Connection, job_id: int) -> Optional[Dict[str, Any]]:
+    """Return ``job_id`` as a dict or ``None`` if it does not exist."""
+    cur = db.cursor()
+    cur.row_factory = sqlite3.Row
+    row = cur.execute(_SELECT_JOBS + " WHERE id = ?", [job_id]).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def list_jobs(db: sqlite3.Connection, job_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return jobs newest first along with their throughput in rows/sec."""
+    cur = db.cursor()
+    cur.row_factory = sqlite3.Row
+    if job_type:
+        rows = cur.execute(_SELECT_JOBS + " WHERE type = ? ORDER BY id DESC", [job_type]).fetchall()
+    else:
+        rows = cur.execute(_SELECT_JOBS + " ORDER BY id DESC").fetchall()
+    return [_row_to_dict(r) for r in rows]
+
+
+def unfinished_job_ids(db: sqlite3.Connection, job_type: str) -> List[int]:
+    """Return ids of ``job_type`` jobs that were queued or running."""
+    placeholders = ', '.join('?' for _ in ACTIVE_STATUSES)
+    rows = db.execute(
+        f"SELECT id FROM jobs WHERE type = ? AND status IN ({placeholders}) ORDER BY id",
+        [job_type, *ACTIVE_STATUSES],
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def unfinished_domains(db: sqlite3.Connection, job_type: str) -> List[str]:
+    """Return domains that have a queued or running ``job_type`` job."""
+    placeholders = ', '.join('?' for _ in ACTIVE_STATUSES)
+    rows = db.execute(
+        f"SELECT DISTINCT domain FROM jobs WHERE type = ? AND status IN ({placeholders})",
+        [job_type, *ACTIVE_STATUSES],
+    ).fetchall()
+    return [r[0] for r in rows]
@@ -0,0 +1,205 @@
+"""Incremental JSON readers for imports that do not fit in memory."""
+
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Iterator
+
+_WS = re.compile(r'[ \t\r\n]*')
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+# An escape sequence or the closing quote of a string.
+_STRING_END = re.compile(r'\\.|"', re.S)
+# Characters that may continue a number, e.g. after a chunk ending in "1." or "1e".
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_BOM = b'\xef\xbb\xbf'
+CHUNK_SIZE = 1 << 16
+
+
+def peek_start(fh: BinaryIO) -> bytes:
+    """Return the first non-whitespace byte of ``fh`` and rewind it.
+
+    Streams that cannot seek, such as decompressors, must provide ``peek``;
+    only their currently buffered bytes are inspected.
+    """
+    if not fh.seekable():
+        head = fh.peek(4096)  # type: ignore[attr-defined]
+        if head.startswith(_BOM):
+            head = head[len(_BOM):]
+        return head.lstrip()[:1]
+    start = fh.tell()
+    first = b''
+    chunk = fh.read(4096)
+    if chunk.startswith(_BOM):
+        chunk = chunk[len(_BOM):]
+    while chunk:
+        stripped = chunk.lstrip()
+        if stripped:
+            first = stripped[:1]
+            break
+        chunk = fh.read(4096)
+    fh.seek(start)
+    return first
+
+
+class JsonReader:
+    """Pull parser over a binary JSON stream.
+
+    Containers are walked with :meth:`items` and :meth:`members` while leaf
+    values are decoded by the C ``json`` scanner. Only the text of the value
+    being decoded is buffered, and :meth:`skip_value` discards a value of any
+    size without building it. Raises ``ValueError`` on malformed input.
+    """
+
+    def __init__(self, fh: BinaryIO, chunk_size: int = CHUNK_SIZE) -> None:
+        self._fh = fh
+        self._chunk_size = chunk_size
+        self._text = codecs.getincrementaldecoder('utf-8-sig')()
+        self._decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> None:
+        # Grow reads with the pending text so one large value stays linear.
+        data = self._fh.read(max(self._chunk_size, len(self.buf) - self.pos))
+        self.eof = not data
+        self.buf = self.buf[self.pos:] + self._text.decode(data, final=self.eof)
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character or ``''`` at the end."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON, found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode and return the next complete value."""
+        self.peek()
+        while True:
+            try:
+                item, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number cut by the end of the buffer decodes as its prefix:
+            # "1." or "1e" at the end of a chunk yields 1. Refill while only
+            # number characters follow the decoded value up to the end.
+            if not self.eof and _NUMBER_TAIL.match(self.buf, end).end() >= len(self.buf):
+                self._fill()
+                continue
+            self.pos = end
+            return item
+
+    def _advance(self, pattern: 're.Pattern[str]') -> str:
+        """Move past the next match of ``pattern`` and return it."""
+        while True:
+            match = pattern.search(self.buf, self.pos)
+            if match and match.end() < len(self.buf):
+                self.pos = match.end()
+                return match.group()
+            if match and self.eof:
+                self.pos = match.end()
+                return match.group()
+            if self.eof:
+                raise ValueError("Unexpected end of JSON input")
+            if not match:
+                # Nothing of interest buffered yet; drop what was scanned but
+                # keep the last character in case it starts an escape.
+                self.pos = max(self.pos, len(self.buf) - 1)
+            self._fill()
+
+    def skip_value(self) -> None:
+        """Consume the next value without decoding it."""
+        first = self.peek()
+        if first not in '"[{':
+            self.value()
+            return
+        depth = 0
+        while True:
+            token = self._advance(_STRUCTURAL)
+            if token == '"':
+                while self._advance(_STRING_END) != '"':
+                    pass
+            elif token in '[{':
+                depth += 1
+            elif token in ']}':
+                depth -= 1
+            if depth == 0:
+                return
+
+    def items(self) -> Iterator[None]:
+        """Step through an array, yielding once per item.
+
+        The caller must consume each item (``value``, ``skip_value`` or a
+        nested walk) before advancing the iterator.
+        """
+        self.expect('[')
+        first = True
+        while True:
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            if not first:
+                self.expect(',')
+            first = False
+            yield None
+
+    def members(self) -> Iterator[str]:
+        """Step through an object, yielding each key.
+
+        As with :meth:`items` the caller must consume the member's value
+        before advancing.
+        """
+        self.expect('{')
+        first = True
+        while True:
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            if not first:
+                self.expect(',')
+            first = False
+            if self.peek() != '"':
+                raise ValueError("Expected an object key in JSON")
+            key = self.value()
+            self.expect(':')
+            yield key
+
+
+def iter_array(fh: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the items of the top-level JSON array in ``fh`` one at a time.
+
+    Only the item currently being decoded is held in memory, so arrays far
+    larger than RAM can be read. Raises ``ValueError`` on malformed input.
+    """
+    reader = JsonReader(fh, chunk_size)
+    if reader.peek() != '[':
+        raise ValueError("Expected a JSON array")
+    for _ in reader.items():
+        yield reader.value()
+
+
+def iter_lines(fh: BinaryIO) -> Iterator[Any]:
+    """Yield each JSON value in newline-delimited ``fh``, skipping bad lines."""
+    for idx, line in enumerate(fh):
+        if idx == 0 and line.startswith(_BOM):
+            line = line[len(_BOM):]
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
@@ -4,6 +4,8 @@ from typing import Optional, List, Dict
 import json
 import logging
 
+from .. import sqlite_tuning
+
 logger = logging.getLogger(__name__)
 @dataclass
 class MCPConfig:
@@ -19,6 +21,7 @@ class MCPConfig:
     alt_api_bases: list[str] = field(default_factory=list)
     mcp_servers: List[Dict[str, object]] | None = None
     servers_file: str | None = None
+    sqlite_tuning: Dict[str, object] = field(default_factory=sqlite_tuning.profile_from_env)
 
 
 def validate_config(config: MCPConfig) -> None:
@@ -123,6 +126,7 @@ def load_config() -> MCPConfig:
         alt_api_bases=alt_api_bases,
         mcp_servers=servers_cfg,
         servers_file=cfg_file,
+        sqlite_tuning=sqlite_tuning.profile_from_env(),
     )
     validate_config(config)
     return config
@@ -10,6 +10,7 @@ from mcp import types
 import httpx
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from .. import sqlite_tuning
 from ..windows_tz import to_iana
 from .config import MCPConfig, load_config
 
@@ -251,7 +252,7 @@ class RetroReconMCPServer:
         if not self.db_path:
             raise ValueError("Database path not configured")
         logger.debug("Opening SQLite database connection to: %s", self.db_path)
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tuning.connect(self.db_path, self.config.sqlite_tuning)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -0,0 +1,171 @@
+"""Keyset pagination over the ``urls`` table.
+
+Pages are addressed by an opaque cursor holding the sort value and ``id`` of
+a boundary row instead of an ``OFFSET``, so SQLite seeks straight to the
+page through the sort column's index and deep pages cost the same as the
+first one.
+"""
+
+import base64
+import binascii
+import json
+import sqlite3
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+# Sortable columns exposed to clients, mapped to their SQL column names. Each
+# one needs an index on ``urls`` (see database.ensure_sort_indexes) or seeking
+# falls back to a full scan and sort per page.
+SORT_COLUMNS = {
+    'url': 'url',
+    'timestamp': 'timestamp',
+    'status_code': 'status_code',
+    'mime_type': 'mime_type',
+    'request_method': 'request_method',
+    'response_time_ms': 'response_time_ms',
+    'source_type': 'source_type',
+    'id': 'id',
+}
+
+URL_LIST_COLUMNS = (
+    'id', 'url', 'timestamp', 'status_code', 'mime_type', 'tags',
+    'request_method', 'response_time_ms', 'content_size', 'source_type',
+)
+
+
+class Page(NamedTuple):
+    rows: List[sqlite3.Row]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    """Return an opaque cursor for the row ``(value, row_id)`` under ``sort``."""
+    raw = json.dumps([sort, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Return ``(value, row_id)`` from ``cursor``.
+
+    Raises ``ValueError`` if the cursor is malformed or was issued for a
+    different sort column.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cur_sort, value, row_id = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if cur_sort != sort or not isinstance(row_id, int) or isinstance(value, (list, dict)):
+        raise ValueError("Cursor does not match the requested sort")
+    return value, row_id
+
+
+def row_cursor(row: sqlite3.Row, sort: str) -> str:
+    return encode_cursor(sort, row[SORT_COLUMNS[sort]], row['id'])
+
+
+def _segments(sort: str, descending: bool) -> List[str]:
+    """Return the order in which NULL and non-NULL sort values are visited.
+
+    SQLite sorts NULL first ascending and last descending. Each segment is
+    queried separately so every query is a plain range over the index.
+    """
+    if sort == 'id':
+        return ['value']
+    return ['value', 'null'] if descending else ['null', 'value']
+
+
+def _segment_query(
+    col: str,
+    segment: str,
+    descending: bool,
+    cursor: Optional[Tuple[Any, int]],
+) -> Tuple[str, List[Any], str]:
+    op = '<' if descending else '>'
+    order = 'DESC' if descending else 'ASC'
+    if segment == 'null':
+        clause = f'{col} IS NULL'
+        params: List[Any] = []
+        if cursor is not None:
+            clause += f' AND id {op} ?'
+            params.append(cursor[1])
+        return clause, params, f'id {order}'
+    if col == 'id':
+        if cursor is None:
+            return '1', [], f'id {order}'
+        return f'id {op} ?', [cursor[1]], f'id {order}'
+    if cursor is None:
+        return f'{col} IS NOT NULL', [], f'{col} {order}, id {order}'
+    # The row value comparison is false for NULL, keeping the segment exact.
+    return f'({col}, id) {op} (?, ?)', [cursor[0], cursor[1]], f'{col} {order}, id {order}'
+
+
+def _seek(
+    db: sqlite3.Connection,
+    select: str,
+    where: Sequence[str],
+    params: Sequence[Any],
+    sort: str,
+    descending: bool,
+    limit: int,
+    cursor: Optional[Tuple[Any, int]],
+) -> List[sqlite3.Row]:
+    """Return up to ``limit`` rows following ``cursor`` in sort order."""
+    col = SORT_COLUMNS[sort]
+    segments = _segments(sort, descending)
+    start = 0
+    if cursor is not None:
+        start = segments.index('null' if cursor[0] is None and col != 'id' else 'value')
+    rows: List[sqlite3.Row] = []
+    for idx in range(start, len(segments)):
+        seg_cursor = cursor if idx == start else None
+        clause, seg_params, order_by = _segment_query(col, segments[idx], descending, seg_cursor)
+        sql = f"{select} WHERE {' AND '.join(list(where) + [clause])} ORDER BY {order_by} LIMIT ?"
+        rows.extend(db.execute(sql, list(params) + seg_params + [limit - len(rows)]).fetchall())
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def fetch_page(
+    db: sqlite3.Connection,
+    where: Sequence[str] = (),
+    params: Sequence[Any] = (),
+    sort: str = 'id',
+    direction: str = 'desc',
+    limit: int = 10,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    columns: Sequence[str] = URL_LIST_COLUMNS,
+) -> Page:
+    """Return one page of ``urls`` rows matching ``where``.
+
+    ``after`` returns the page following that cursor and ``before`` the page
+    preceding it; with neither the first page is returned. Raises
+    ``ValueError`` for an unknown sort column or an invalid cursor.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort}")
+    descending = direction.lower() != 'asc'
+    select = f"SELECT {', '.join(columns)} FROM urls"
+    where = [f'({w})' for w in where]
+    if before:
+        cursor = decode_cursor(before, sort)
+        rows = _seek(db, select, where, params, sort, not descending, limit + 1, cursor)
+        has_prev = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        return Page(
+            rows,
+            row_cursor(rows[-1], sort) if rows else before,
+            row_cursor(rows[0], sort) if rows and has_prev else None,
+        )
+    cursor = decode_cursor(after, sort) if after else None
+    rows = _seek(db, select, where, params, sort, descending, limit + 1, cursor)
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    return Page(
+        rows,
+        row_cursor(rows[-1], sort) if rows and has_next else None,
+        row_cursor(rows[0], sort) if rows and after else None,
+    )
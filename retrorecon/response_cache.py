@@ -0,0 +1,285 @@
+"""Content-addressed on-disk cache for remote recon API responses.
+
+Entries are stored under ``<directory>/<source>/<xx>/<sha256>`` where the
+hash is taken over a normalized form of the request. Each file's ``mtime``
+records when it was stored and is compared against the per-source TTL, while
+its ``atime`` is bumped on every hit and drives LRU eviction once the cache
+grows past its size cap.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Dict, IO, Iterable, Iterator, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Headers that carry credentials. They never affect the key so responses are
+# shared between API keys, and they are never written to disk.
+_SECRET_HEADERS = {'authorization', 'cookie', 'x-apikey', 'x-api-key'}
+
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def request_key(method: str, url: str, headers: Optional[Mapping[str, str]] = None) -> str:
+    """Return a stable hash for ``method`` ``url`` and non-secret ``headers``.
+
+    Scheme and host are lowercased, default ports and fragments dropped and
+    query parameters sorted so equivalent requests share one entry.
+    """
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f'{host}:{port}'
+    query = urllib.parse.urlencode(
+        sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    )
+    normalized = urllib.parse.urlunsplit((scheme, host, parts.path or '/', query, ''))
+    lines = [method.upper(), normalized]
+    for name, value in sorted((k.lower(), v) for k, v in (headers or {}).items()):
+        if name not in _SECRET_HEADERS:
+            lines.append(f'{name}:{value}')
+    return hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Disk cache with per-source TTLs, a byte cap and LRU eviction."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        ttls: Optional[Dict[str, int]] = None,
+        compress: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or {})
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _path(self, source: str, key: str) -> str:
+        name = key + ('.gz' if self.compress else '')
+        return os.path.join(self.directory, source, key[:2], name)
+
+    def _find(self, source: str, key: str) -> Optional[str]:
+        """Return the stored path for ``key`` if it exists and is fresh."""
+        base = os.path.join(self.directory, source, key[:2], key)
+        for path in (base + '.gz', base):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            ttl = self.ttls.get(source, DEFAULT_TTL)
+            if ttl and time.time() - stat.st_mtime > ttl:
+                self._remove(path, stat.st_size)
+                return None
+            # Record the hit for LRU eviction while keeping the stored time.
+            os.utime(path, (time.time(), stat.st_mtime))
+            return path
+        return None
+
+    @staticmethod
+    def _open(path: str) -> IO[bytes]:
+        return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+    def get(self, source: str, key: str) -> Optional[bytes]:
+        """Return the cached body for ``key`` or ``None`` on a miss."""
+        path = self._find(source, key)
+        if path is None:
+            return None
+        try:
+            with self._open(path) as fh:
+                return fh.read()
+        except (OSError, EOFError) as exc:
+            logger.debug("Discarding unreadable cache entry %s: %s", path, exc)
+            self._remove(path)
+            return None
+
+    def iter_lines(self, source: str, key: str) -> Optional[Iterator[bytes]]:
+        """Return an iterator over the cached body's lines or ``None`` on a miss."""
+        path = self._find(source, key)
+        if path is None:
+            return None
+
+        def _lines() -> Iterator[bytes]:
+            with self._open(path) as fh:
+                for line in fh:
+                    yield line.rstrip(b'\r\n')
+
+        return _lines()
+
+    def put(self, source: str, key: str, body: bytes) -> None:
+        """Store ``body`` for ``key``."""
+        self._write(source, key, [body])
+
+    def tee_lines(self, source: str, key: str, lines: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield ``lines`` while copying them into the cache.
+
+        The entry only becomes visible once ``lines`` is exhausted, so an
+        interrupted download never leaves a truncated response behind.
+        """
+        tmp = self._open_temp(source, key)
+        if tmp is None:
+            yield from lines
+            return
+        fh, tmp_path = tmp
+        complete = False
+        try:
+            for line in lines:
+                fh.write(line + b'\n')
+                yield line
+            complete = True
+        finally:
+            fh.close()
+            if complete:
+                self._commit(tmp_path, self._path(source, key))
+            else:
+                self._discard(tmp_path)
+
+    def _open_temp(self, source: str, key: str):
+        folder = os.path.dirname(self._path(source, key))
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        except OSError as exc:
+            logger.debug("Response cache unavailable: %s", exc)
+            return None
+        os.close(fd)
+        fh = gzip.open(tmp_path, 'wb', compresslevel=6) if self.compress else open(tmp_path, 'wb')
+        return fh, tmp_path
+
+    def _write(self, source: str, key: str, chunks: Iterable[bytes]) -> None:
+        tmp = self._open_temp(source, key)
+        if tmp is None:
+            return
+        fh, tmp_path = tmp
+        try:
+            for chunk in chunks:
+                fh.write(chunk)
+        except Exception:
+            fh.close()
+            self._discard(tmp_path)
+            raise
+        fh.close()
+        self._commit(tmp_path, self._path(source, key))
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _commit(self, tmp_path: str, path: str) -> None:
+        try:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as exc:
+            logger.debug("Could not store cache entry %s: %s", path, exc)
+            self._discard(tmp_path)
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += size - old
+        self._enforce_cap()
+
+    def _remove(self, path: str, size: Optional[int] = None) -> None:
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _entries(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    yield path, os.stat(path)
+                except OSError:
+                    continue
+
+    def size(self) -> int:
+        """Return the total bytes currently stored."""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(st.st_size for _p, st in self._entries())
+            return self._size
+
+    def _enforce_cap(self) -> None:
+        if self.max_bytes <= 0 or self.size() <= self.max_bytes:
+            return
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[1].st_atime)
+            total = sum(st.st_size for _p, st in entries)
+            # Evict down to 90% so every put past the cap does not rescan.
+            target = int(self.max_bytes * 0.9)
+            for path, st in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= st.st_size
+            self._size = total
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for path, _st in list(self._entries()):
+            self._discard(path)
+        with self._lock:
+            self._size = 0
+
+
+_CACHES: Dict[str, ResponseCache] = {}
+_DEFAULT: Optional[ResponseCache] = None
+_CACHES_LOCK = threading.Lock()
+
+
+def configure(
+    directory: Optional[str],
+    max_bytes: int = 0,
+    ttls: Optional[Dict[str, int]] = None,
+    compress: bool = True,
+) -> Optional[ResponseCache]:
+    """Set the process-wide cache used by :func:`default_cache`.
+
+    Passing ``None`` for ``directory`` disables caching. Instances are reused
+    per directory so their size accounting survives reconfiguration.
+    """
+    global _DEFAULT
+    with _CACHES_LOCK:
+        if not directory:
+            _DEFAULT = None
+            return None
+        cache = _CACHES.get(directory)
+        if cache is None:
+            cache = _CACHES[directory] = ResponseCache(directory, max_bytes, ttls, compress)
+        else:
+            cache.max_bytes = max_bytes
+            cache.ttls = dict(ttls or {})
+            cache.compress = compress
+        _DEFAULT = cache
+        return cache
+
+
+def default_cache() -> Optional[ResponseCache]:
+    """Return the configured cache or ``None`` when caching is disabled."""
+    return _DEFAULT
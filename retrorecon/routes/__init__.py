@@ -15,5 +15,6 @@ from .help import bp as help_bp
 from .dynamic import bp as dynamic_bp
 from .chat import bp as chat_bp
 from .mcp_config import bp as mcp_config_bp
+from .jobs import bp as jobs_bp
 
-__all__ = ['notes_bp', 'tools_bp', 'db_bp', 'settings_bp', 'domains_bp', 'docker_bp', 'oci_explorer_bp', 'dag_bp', 'oci_bp', 'dagdotdev_bp', 'urls_bp', 'swagger_bp', 'overview_bp', 'help_bp', 'dynamic_bp', 'chat_bp', 'mcp_config_bp']
+__all__ = ['notes_bp', 'tools_bp', 'db_bp', 'settings_bp', 'domains_bp', 'docker_bp', 'oci_explorer_bp', 'dag_bp', 'oci_bp', 'dagdotdev_bp', 'urls_bp', 'swagger_bp', 'overview_bp', 'help_bp', 'dynamic_bp', 'chat_bp', 'mcp_config_bp', 'jobs_bp']
@@ -1,6 +1,8 @@
 import os
+import tempfile
 import app
-from flask import Blueprint, request, redirect, url_for, flash, send_file, session
+from retrorecon import count_cache
+from flask import Blueprint, request, redirect, url_for, flash, send_file, session, jsonify
 
 bp = Blueprint('db', __name__)
 
@@ -12,9 +14,10 @@ def new_db():
         flash('Invalid database name.', 'error')
         return redirect(url_for('index'))
     app.close_connection(None)
+    count_cache.forget(app.app.config.get('DATABASE'))
     temp_path = os.path.join(app.get_db_folder(), app.TEMP_DB_NAME)
     if app.app.config.get('DATABASE') == temp_path and os.path.exists(temp_path):
-        os.remove(temp_path)
+        app.remove_db_files(temp_path)
     try:
         db_name = app.create_new_db(safe)
         app.mcp_server = app.start_mcp_sqlite(app.app.config['DATABASE'])
@@ -37,14 +40,18 @@ def load_db_route():
         return redirect(url_for('index'))
     db_path = os.path.join(app.get_db_folder(), filename)
     app.close_connection(None)
+    count_cache.forget(app.app.config.get('DATABASE'))
     temp_path = os.path.join(app.get_db_folder(), app.TEMP_DB_NAME)
     if app.app.config.get('DATABASE') == temp_path and os.path.exists(temp_path):
-        os.remove(temp_path)
+        app.remove_db_files(temp_path)
     try:
+        if os.path.exists(db_path):
+            app.remove_db_files(db_path)
         file.save(db_path)
         app.app.config['DATABASE'] = db_path
         app.ensure_schema()
         app.mcp_server = app.start_mcp_sqlite(app.app.config['DATABASE'])
+        app.resume_jobs()
         session['db_display_name'] = filename
         flash("Database loaded.", "success")
     except Exception as e:
@@ -62,11 +69,20 @@ def save_db():
         safe_name = app._sanitize_export_name(name)
     else:
         safe_name = os.path.basename(app.app.config["DATABASE"])
-    return send_file(
-        app.app.config['DATABASE'],
+    fd, copy_path = tempfile.mkstemp(prefix='retrorecon_save_', suffix='.db')
+    os.close(fd)
+    try:
+        app.backup_db(copy_path)
+    except Exception:
+        os.remove(copy_path)
+        raise
+    response = send_file(
+        copy_path,
         as_attachment=True,
         download_name=safe_name
     )
+    response.call_on_close(lambda: os.remove(copy_path))
+    return response
 
 
 @bp.route('/rename_db', methods=['POST'])
@@ -81,11 +97,19 @@ def rename_db():
         return redirect(url_for('index'))
     app.close_connection(None)
     new_path = os.path.join(app.get_db_folder(), safe)
+    old_path = app.app.config['DATABASE']
+    # The WAL is only safe to drop once every frame is in the main file and
+    # nothing in this process is still writing through the old path.
+    if app._background_work_running() or not app.checkpoint_db(old_path):
+        flash('Database is busy; rename it once running jobs and imports finish.', 'error')
+        return redirect(url_for('index'))
+    count_cache.forget(old_path)
     try:
-        os.rename(app.app.config['DATABASE'], new_path)
+        os.rename(old_path, new_path)
     except OSError as e:
         flash(f'Error renaming database: {e}', 'error')
         return redirect(url_for('index'))
+    app.remove_db_sidecars(old_path)
     app.app.config['DATABASE'] = new_path
     app.ensure_schema()
     app.mcp_server = app.start_mcp_sqlite(app.app.config['DATABASE'])
@@ -107,13 +131,15 @@ def load_saved_db():
         flash('Database not found.', 'error')
         return redirect(url_for('index'))
     app.close_connection(None)
+    count_cache.forget(app.app.config.get('DATABASE'))
     temp_path = os.path.join(app.get_db_folder(), app.TEMP_DB_NAME)
     if app.app.config.get('DATABASE') == temp_path and os.path.exists(temp_path):
-        os.remove(temp_path)
+        app.remove_db_files(temp_path)
     try:
         app.app.config['DATABASE'] = path
         app.ensure_schema()
         app.mcp_server = app.start_mcp_sqlite(app.app.config['DATABASE'])
+        app.resume_jobs()
         session['db_display_name'] = safe
         flash('Database loaded.', 'success')
     except Exception as e:
@@ -131,10 +157,19 @@ def delete_db_route():
     if current == safe:
         return ('active', 400)
     path = os.path.join(app.get_db_folder(), safe)
+    count_cache.forget(path)
     try:
-        os.remove(path)
+        app.remove_db_files(path)
     except FileNotFoundError:
         return ('not_found', 404)
     except OSError:
         return ('error', 500)
     return ('', 204)
+
+
+@bp.route('/api/sqlite_settings', methods=['GET'])
+def sqlite_settings():
+    """Report the requested and effective SQLite tuning settings."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    return jsonify(app.sqlite_settings_report())
@@ -5,7 +5,8 @@ import json
 from flask import Blueprint, request, jsonify, Response, current_app, render_template_string
 from .dynamic import dynamic_template, render_from_payload, schema_registry, html_generator
 import app
-from retrorecon import subdomain_utils, status as status_mod
+from retrorecon import columnar, subdomain_utils, status as status_mod
+from .urls import columnar_response
 from retrorecon import domain_sort
 from collections import defaultdict
 import tldextract
@@ -174,6 +175,7 @@ def subdomains_route():
         return ('Missing domain', 400)
     if not re.match(r'^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,63}$', domain):
         return ('Invalid domain', 400)
+    app.configure_response_cache()
     try:
         if source == 'virustotal':
             if not api_key:
@@ -195,8 +197,16 @@ def export_subdomains():
     domain = request.args.get('domain', '').strip().lower()
     if not domain:
         return jsonify([])
-    rows = subdomain_utils.list_subdomains(domain)
     q = request.args.get('q', '').strip().lower()
+    fmt = request.args.get('format', 'json')
+    if fmt in columnar.COLUMNAR_FORMATS:
+        where_sql = 'WHERE root_domain = ?'
+        params = [domain]
+        if q:
+            where_sql += ' AND (subdomain LIKE ? OR root_domain LIKE ? OR tags LIKE ?)'
+            params += [f'%{q}%'] * 3
+        return columnar_response('domains', fmt, where_sql, params)
+    rows = subdomain_utils.list_subdomains(domain)
     if q:
         rows = [
             r for r in rows
@@ -204,7 +214,6 @@ def export_subdomains():
             or q in r['domain'].lower()
             or q in (r['tags'] or '').lower()
         ]
-    fmt = request.args.get('format', 'json')
     if fmt == 'csv':
         output = io.StringIO()
         writer = csv.writer(output)
@@ -0,0 +1,102 @@
+import re
+import app
+from flask import Blueprint, jsonify, request
+from retrorecon import cdx_watermarks, jobs as jobs_mod
+
+bp = Blueprint('jobs', __name__)
+
+JOB_TYPES = ('cdx', 'cdx_crawl', 'url_parse', 'bulk_action')
+
+
+# ``/cdx_jobs`` predates the other job types and is kept as an alias.
+@bp.route('/jobs', methods=['GET'])
+@bp.route('/cdx_jobs', methods=['GET'], defaults={'default_type': 'cdx'})
+def list_jobs(default_type: str = ''):
+    """Return background jobs with their checkpoints and throughput.
+
+    ``type`` selects ``cdx`` fetches, ``cdx_crawl`` multi-domain crawls,
+    ``url_parse`` parsed URL column backfills or ``bulk_action`` background
+    bulk tag and delete actions; ``/jobs`` lists every type when it is
+    omitted and ``/cdx_jobs`` only ``cdx`` jobs.
+    """
+    if not app._db_loaded():
+        return jsonify([])
+    status = request.args.get('status', '').strip()
+    job_type = request.args.get('type', default_type).strip()
+    if job_type and job_type not in JOB_TYPES:
+        return jsonify({'error': 'invalid_type'}), 400
+    rows = jobs_mod.list_jobs(app.get_db(), job_type or None)
+    if status:
+        rows = [r for r in rows if r['status'] == status]
+    return jsonify(rows)
+
+
+@bp.route('/jobs/<int:job_id>', methods=['GET'])
+@bp.route('/cdx_jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id: int):
+    """Return a single job."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    job = jobs_mod.get_job(app.get_db(), job_id)
+    if job is None or job['type'] not in JOB_TYPES:
+        return jsonify({'error': 'not_found'}), 404
+    return jsonify(job)
+
+
+@bp.route('/jobs/<int:job_id>/resume', methods=['POST'])
+@bp.route('/cdx_jobs/<int:job_id>/resume', methods=['POST'])
+def resume_job(job_id: int):
+    """Restart a failed or interrupted job from its checkpoint."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    db = app.get_db()
+    job = jobs_mod.get_job(db, job_id)
+    if job is None or job['type'] not in JOB_TYPES:
+        return jsonify({'error': 'not_found'}), 404
+    if job['status'] == 'done':
+        return jsonify({'error': 'already_done'}), 400
+    jobs_mod.update_job(db, job_id, status='queued')
+    if job['type'] == 'cdx_crawl':
+        started = app.start_cdx_crawl(job_id)
+    elif job['type'] == 'url_parse':
+        started = app.start_url_parse_job(job_id)
+    elif job['type'] == 'bulk_action':
+        started = app.start_bulk_action_job(job_id)
+    else:
+        started = app.start_cdx_job(job_id)
+    return jsonify({'job_id': job_id, 'started': started})
+
+
+@bp.route('/cdx_crawl', methods=['POST'])
+def cdx_crawl():
+    """Fetch CDX for every subdomain of ``domain`` not yet marked CDX indexed."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    domain = request.form.get('domain', '').strip().lower()
+    if not re.match(r'^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,63}$', domain):
+        return jsonify({'error': 'invalid_domain'}), 400
+    job_id = jobs_mod.create_job(app.get_db(), 'cdx_crawl', domain)
+    started = app.start_cdx_crawl(job_id)
+    return jsonify({'job_id': job_id, 'started': started})
+
+
+@bp.route('/url_parse', methods=['POST'])
+def url_parse():
+    """Queue a backfill of the parsed URL columns for rows that lack them."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    db = app.get_db()
+    running = jobs_mod.unfinished_job_ids(db, 'url_parse')
+    if running:
+        return jsonify({'job_id': running[0], 'started': app.start_url_parse_job(running[0])})
+    job_id = jobs_mod.create_job(db, 'url_parse', '')
+    started = app.start_url_parse_job(job_id)
+    return jsonify({'job_id': job_id, 'started': started})
+
+
+@bp.route('/cdx_watermarks', methods=['GET'])
+def cdx_watermarks_route():
+    """Return the newest CDX timestamp recorded for each fetched domain."""
+    if not app._db_loaded():
+        return jsonify([])
+    return jsonify(cdx_watermarks.list_watermarks(app.get_db()))
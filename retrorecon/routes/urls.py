@@ -1,116 +1,112 @@
-import io
-import csv
-from typing import List, Optional
+from typing import Any, List, Optional
 
 import app
-from flask import Blueprint, request, Response, jsonify
+from flask import Blueprint, request, Response, jsonify, stream_with_context
+from retrorecon import columnar, facets, pagination, url_export
 
 bp = Blueprint('urls', __name__)
 
+API_PAGE_LIMIT = 500
+
+
+@bp.route('/api/urls', methods=['GET'])
+def api_urls():
+    """Return one page of URL records with opaque ``next``/``prev`` cursors."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    q = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'id')
+    direction = request.args.get('dir', 'desc').lower()
+    if sort not in pagination.SORT_COLUMNS:
+        return jsonify({'error': 'invalid_sort'}), 400
+    if direction not in ('asc', 'desc'):
+        return jsonify({'error': 'invalid_dir'}), 400
+    try:
+        limit = int(request.args.get('limit', app.ITEMS_PER_PAGE))
+    except ValueError:
+        return jsonify({'error': 'invalid_limit'}), 400
+    limit = max(1, min(limit, API_PAGE_LIMIT))
+    where, params = app.url_search_where(q)
+    try:
+        page = pagination.fetch_page(
+            app.get_db(), where, params, sort, direction, limit,
+            after=request.args.get('cursor') or None,
+            before=request.args.get('before') or None,
+        )
+    except ValueError:
+        return jsonify({'error': 'invalid_cursor'}), 400
+    return jsonify({
+        'urls': [dict(r) for r in page.rows],
+        'next': page.next_cursor,
+        'prev': page.prev_cursor,
+        'limit': limit,
+    })
+
+
+@bp.route('/api/facets', methods=['GET'])
+def api_facets():
+    """Return status, MIME type, extension, host and year histograms for a search."""
+    if not app._db_loaded():
+        return jsonify({'error': 'no_db'}), 400
+    q = request.args.get('q', '').strip()
+    try:
+        limit = int(request.args.get('limit', facets.DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'invalid_limit'}), 400
+    where, params = app.url_search_where(q)
+    where_sql = 'WHERE ' + ' AND '.join(where) if where else ''
+    result = facets.facet_counts(
+        app.get_db(), app.app.config['DATABASE'], where_sql, params,
+        limit=max(0, limit), use_cache=app.app.config.get('COUNT_CACHE', True),
+    )
+    return jsonify(result)
+
+
+def columnar_response(table: str, fmt: str, where_sql: str, params: List[Any]) -> Response:
+    """Stream ``table`` rows as a Parquet or Arrow download."""
+    if not columnar.available():
+        return jsonify({'error': 'pyarrow_missing'}), 501
+    mimetype, ext = columnar.COLUMNAR_FORMATS[fmt]
+
+    def body():
+        yield from columnar.iter_export(app.get_db(), table, fmt, where_sql, params)
+
+    return Response(
+        stream_with_context(body()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={table}.{ext}'},
+    )
+
+
 @bp.route('/export_urls', methods=['GET'])
 def export_urls():
-    """Export URL records in various formats."""
+    """Stream URL records in the requested format, optionally gzipped."""
     if not app._db_loaded():
         return jsonify([])
 
     fmt = request.args.get('format', 'json').lower()
+    if fmt not in url_export.EXPORT_FORMATS and fmt not in columnar.COLUMNAR_FORMATS:
+        fmt = 'json'
     q = request.args.get('q', '').strip()
     select_all = request.args.get('select_all_matching', 'false').lower() == 'true'
     ids: Optional[List[int]] = None
     if not select_all:
         ids = [int(i) for i in request.args.getlist('id') if i.isdigit()]
-    rows = app.export_url_data(ids=ids, query=q)
-
-    if fmt == 'txt':
-        text = '\n'.join(r['url'] for r in rows)
-        return Response(text, mimetype='text/plain')
-    if fmt == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['url', 'timestamp', 'status_code', 'mime_type', 'tags'])
-        for r in rows:
-            writer.writerow([r['url'], r['timestamp'], r['status_code'], r['mime_type'], r['tags']])
-        return Response(output.getvalue(), mimetype='text/csv')
-    if fmt == 'md':
-        lines = ['| url | timestamp | status_code | mime_type | tags |', '|---|---|---|---|---|']
-        for r in rows:
-            lines.append(f"| {r['url']} | {r['timestamp'] or ''} | {r['status_code'] or ''} | {r['mime_type'] or ''} | {r['tags'] or ''} |")
-        return Response('\n'.join(lines), mimetype='text/markdown')
-    if fmt == 'html':
-        html_lines = [
-            '<!DOCTYPE html>',
-            '<html lang="en">',
-            '<head>',
-            '<meta charset="UTF-8">',
-            '<meta name="viewport" content="width=device-width, initial-scale=1.0">',
-            '<title>Exported URLs</title>',
-            '<style>',
-            'body { font-family: monospace; margin: 20px; background: #000; color: #fff; }',
-            'table { border-collapse: collapse; width: 100%; }',
-            'th, td { border: 1px solid #444; padding: 8px; text-align: left; }',
-            'th { background: #222; }',
-            'a { color: #0af; text-decoration: none; }',
-            'a:hover { text-decoration: underline; }',
-            '.timestamp { font-size: 0.9em; color: #aaa; }',
-            '.status { text-align: center; font-weight: bold; }',
-            '.status-2 { color: #0a0; }',
-            '.status-3 { color: #fa0; }',
-            '.status-4 { color: #f50; }',
-            '.status-5 { color: #f00; }',
-            '.tags { font-size: 0.8em; color: #aaf; }',
-            '</style>',
-            '</head>',
-            '<body>',
-            f'<h1>Exported URLs ({len(rows)} records)</h1>',
-            '<table>',
-            '<thead>',
-            '<tr>',
-            '<th>URL</th>',
-            '<th>Timestamp</th>',
-            '<th>Status</th>',
-            '<th>MIME Type</th>',
-            '<th>Tags</th>',
-            '</tr>',
-            '</thead>',
-            '<tbody>'
-        ]
-        
-        for r in rows:
-            url = r['url'] or ''
-            timestamp = r['timestamp'] or ''
-            status = r['status_code'] or ''
-            mime = r['mime_type'] or ''
-            tags = r['tags'] or ''
-            
-            # Create hyperlinked URL
-            url_cell = f'<a href="{url}" target="_blank" rel="noopener">{url}</a>' if url else ''
-            
-            # Style status code
-            status_class = f'status-{str(status)[0]}' if status and str(status)[0].isdigit() else 'status'
-            status_cell = f'<span class="status {status_class}">{status}</span>' if status else ''
-            
-            # Format timestamp
-            timestamp_cell = f'<span class="timestamp">{timestamp}</span>' if timestamp else ''
-            
-            # Format tags
-            tags_cell = f'<span class="tags">{tags}</span>' if tags else ''
-            
-            html_lines.append(
-                f'<tr>'
-                f'<td>{url_cell}</td>'
-                f'<td>{timestamp_cell}</td>'
-                f'<td>{status_cell}</td>'
-                f'<td>{mime}</td>'
-                f'<td>{tags_cell}</td>'
-                f'</tr>'
-            )
-        
-        html_lines.extend([
-            '</tbody>',
-            '</table>',
-            '</body>',
-            '</html>'
-        ])
-        
-        return Response('\n'.join(html_lines), mimetype='text/html')
-    return jsonify(rows)
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+    where_sql, params = app.export_url_where(ids=ids, query=q)
+    if fmt in columnar.COLUMNAR_FORMATS:
+        return columnar_response('urls', fmt, where_sql, params)
+
+    def chunks():
+        # Opened inside the stream so the connection outlives the view call.
+        yield from url_export.iter_row_chunks(app.get_db(), where_sql, params)
+
+    body = url_export.render(fmt, chunks())
+    mimetype, ext = url_export.EXPORT_FORMATS[fmt]
+    if compress:
+        return Response(
+            stream_with_context(url_export.gzip_stream(body)),
+            mimetype='application/gzip',
+            headers={'Content-Disposition': f'attachment; filename=urls.{ext}.gz'},
+        )
+    return Response(stream_with_context(body), mimetype=mimetype)
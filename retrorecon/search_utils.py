@@ -1,5 +1,5 @@
 import re
-from typing import List, Tuple
+from typing import Any, List, Optional, Tuple
 
 
 def quote_hashtags(expr: str) -> str:
@@ -22,7 +22,22 @@ def tokenize_tag_expr(expr: str) -> List[str]:
     return [t.strip('"') for t in tokens]
 
 
-def parse_tag_expression(tokens: List[str], pos: int = 0) -> Tuple[str, List[str], int]:
+# Tag lookup tables maintained by triggers from the ``tags`` column.
+_TAG_TABLES = {
+    'urls': ('url_tags', 'url_id'),
+    'domains': ('domain_tags', 'domain_id'),
+}
+
+
+def tag_term_sql(tag: str, table: str = 'urls') -> Tuple[str, List[str]]:
+    """Return SQL selecting rows of ``table`` tagged ``tag``."""
+    tag_table, key = _TAG_TABLES[table]
+    return f"id IN (SELECT {key} FROM {tag_table} WHERE tag = ?)", [tag.strip()]
+
+
+def parse_tag_expression(
+    tokens: List[str], pos: int = 0, table: str = 'urls'
+) -> Tuple[str, List[str], int]:
     """Recursive descent parser returning SQL and params."""
     def parse_or(p: int) -> Tuple[str, List[str], int]:
         sql, params, p = parse_and(p)
@@ -70,14 +85,15 @@ def parse_tag_expression(tokens: List[str], pos: int = 0) -> Tuple[str, List[str
             return sql, params, p + 1
         if tok == ')':
             raise ValueError('Unexpected )')
-        return "has_tag(tags, ?)", [tok], p + 1
+        sql, params = tag_term_sql(tok, table)
+        return sql, params, p + 1
 
     return parse_or(pos)
 
 
-def build_tag_filter_sql(expr: str) -> Tuple[str, List[str]]:
+def build_tag_filter_sql(expr: str, table: str = 'urls') -> Tuple[str, List[str]]:
     tokens = tokenize_tag_expr(expr)
-    sql, params, pos = parse_tag_expression(tokens)
+    sql, params, pos = parse_tag_expression(tokens, table=table)
     if pos != len(tokens):
         raise ValueError('Invalid syntax')
     return sql, params
@@ -100,7 +116,144 @@ def tokenize_search_expr(expr: str) -> List[str]:
     return tokens
 
 
-def parse_search_expression(tokens: List[str], pos: int = 0) -> Tuple[str, List[str], int]:
+# Trigram tokens need at least three characters; shorter terms, and terms
+# using ``%`` as a LIKE wildcard, fall back to a table scan.
+_FTS_MIN_LENGTH = 3
+
+
+def fts_url_term(term: str) -> str:
+    """Return an FTS5 query matching ``term`` as a substring of ``url``."""
+    return 'url : "' + term.replace('"', '""') + '"'
+
+
+def _url_term_sql(term: str, fts: bool) -> Tuple[str, List[str]]:
+    if fts and len(term) >= _FTS_MIN_LENGTH and '%' not in term:
+        return "id IN (SELECT rowid FROM urls_fts WHERE urls_fts MATCH ?)", [fts_url_term(term)]
+    return "url LIKE ?", [f"%{term}%"]
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Return the smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _prefix_sql(col: str, prefix: str) -> Tuple[str, List[Any]]:
+    # A half-open range instead of LIKE 'x%' so the column's index is used.
+    return f"({col} >= ? AND {col} < ?)", [prefix, prefix_upper_bound(prefix)]
+
+
+_STATUS_EXACT = re.compile(r'\d{3}')
+_STATUS_CLASS = re.compile(r'(\d{1,2})(x{1,2})')
+_STATUS_RANGE = re.compile(r'(\d{3})\s*(?:-|\.\.)\s*(\d{3})')
+_COMPARISON = re.compile(r'(>=|<=|>|<|=)(.+)')
+_TIMESTAMP_SEPARATORS = re.compile(r'[-/:T ]')
+
+
+def status_sql(value: str) -> Optional[Tuple[str, List[Any]]]:
+    """Compile an ``http:`` value to a comparison on ``status_code``.
+
+    Accepts ``200``, classes such as ``4xx`` or ``30x``, ranges such as
+    ``200-299`` and comparisons such as ``>=500``. Returns ``None`` for
+    anything else.
+    """
+    val = value.strip().lower()
+    if _STATUS_EXACT.fullmatch(val):
+        return "status_code = ?", [int(val)]
+    m = _STATUS_CLASS.fullmatch(val)
+    if m and len(val) == 3:
+        low = int(m.group(1) + '0' * len(m.group(2)))
+        high = int(m.group(1) + '9' * len(m.group(2)))
+        return "status_code BETWEEN ? AND ?", [low, high]
+    m = _STATUS_RANGE.fullmatch(val)
+    if m:
+        return "status_code BETWEEN ? AND ?", sorted([int(m.group(1)), int(m.group(2))])
+    m = _COMPARISON.fullmatch(val)
+    if m and m.group(2).strip().isdigit():
+        return f"status_code {m.group(1)} ?", [int(m.group(2))]
+    return None
+
+
+def _timestamp_value(value: str) -> str:
+    """Return ``value`` as the leading digits of a ``YYYYMMDDhhmmss`` stamp."""
+    val = _TIMESTAMP_SEPARATORS.sub('', value.strip())
+    return val if val.isdigit() else ''
+
+
+def timestamp_sql(value: str) -> Optional[Tuple[str, List[Any]]]:
+    """Compile a ``timestamp:`` value to a range on ``timestamp``.
+
+    A partial stamp such as ``2019`` or ``2019-05`` matches that whole
+    period; ``2019..2020`` spans both periods and ``>``, ``>=``, ``<`` and
+    ``<=`` compare against the period's start or end. Returns ``None`` when
+    the value is not a date.
+    """
+    val = value.strip()
+    if '..' in val:
+        start, end = (_timestamp_value(v) for v in val.split('..', 1))
+        if not start or not end:
+            return None
+        return "(timestamp >= ? AND timestamp < ?)", [start, prefix_upper_bound(end)]
+    m = _COMPARISON.fullmatch(val)
+    if m:
+        op, stamp = m.group(1), _timestamp_value(m.group(2))
+        if not stamp:
+            return None
+        if op == '=':
+            return _prefix_sql('timestamp', stamp)
+        if op in ('>', '<='):
+            stamp = prefix_upper_bound(stamp)
+        return f"timestamp {'>=' if op[0] == '>' else '<'} ?", [stamp]
+    stamp = _timestamp_value(val)
+    if not stamp:
+        return None
+    return _prefix_sql('timestamp', stamp)
+
+
+def host_sql(value: str) -> Tuple[str, List[Any]]:
+    """Compile a ``host:`` value to a match on the parsed ``host`` column.
+
+    ``host:api.example.com`` is exact and ``host:api.*`` a prefix, both
+    served by the host index. ``host:*.example.com`` matches subdomains
+    and has to scan.
+    """
+    val = value.strip().lower()
+    if val.startswith('*'):
+        return "host LIKE ?", ['%' + val[1:]]
+    if val.endswith('*') and len(val) > 1:
+        return _prefix_sql('host', val[:-1])
+    return "host = ?", [val]
+
+
+def path_sql(value: str) -> Tuple[str, List[Any]]:
+    """Compile a ``path:`` value to a prefix range on the parsed ``path``.
+
+    A leading ``/`` is implied, so ``path:api/`` and ``path:/api/`` match
+    the same rows.
+    """
+    val = value.strip()
+    if not val.startswith('/'):
+        val = '/' + val
+    return _prefix_sql('path', val)
+
+
+def ext_sql(value: str) -> Tuple[str, List[Any]]:
+    """Compile an ``ext:`` value, such as ``js`` or ``.php``, to an exact match."""
+    return "ext = ?", [value.strip().lstrip('.').lower()]
+
+
+def param_sql(value: str) -> Tuple[str, List[Any]]:
+    """Compile a ``param:`` value to a lookup of URLs having that query key."""
+    return "id IN (SELECT url_id FROM url_params WHERE key = ?)", [value.strip().lower()]
+
+
+def parse_search_expression(
+    tokens: List[str], pos: int = 0, fts: bool = False
+) -> Tuple[str, List[str], int]:
+    """Recursive descent parser returning SQL and params for a search.
+
+    With ``fts`` set, free-text and ``url:`` terms are answered from the
+    ``urls_fts`` trigram index instead of ``url LIKE '%term%'``.
+    """
     def parse_or(p: int) -> Tuple[str, List[str], int]:
         sql, params, p = parse_and(p)
         while p < len(tokens):
@@ -140,22 +293,42 @@ def parse_search_expression(tokens: List[str], pos: int = 0) -> Tuple[str, List[
         lower = tok.lower()
         if lower.startswith('url:'):
             val = tok[4:]
-            return "url LIKE ?", [f"%{val}%"]
+            if val.startswith('^') and len(val) > 1:
+                return _prefix_sql('url', val[1:])
+            return _url_term_sql(val, fts)
+        if lower.startswith('host:'):
+            return host_sql(tok[5:])
+        if lower.startswith('path:'):
+            return path_sql(tok[5:])
+        if lower.startswith('ext:'):
+            return ext_sql(tok[4:])
+        if lower.startswith('param:'):
+            return param_sql(tok[6:])
         if lower.startswith('timestamp:'):
             val = tok[len('timestamp:'):]
-            return "CAST(timestamp AS TEXT) LIKE ?", [f"%{val}%"]
+            return timestamp_sql(val) or ("CAST(timestamp AS TEXT) LIKE ?", [f"%{val}%"])
+        if lower.startswith('before:') or lower.startswith('after:'):
+            op, val = tok.split(':', 1)
+            compiled = timestamp_sql(('<' if op.lower() == 'before' else '>') + val)
+            if compiled is None:
+                raise ValueError(f'Invalid date: {val}')
+            return compiled
         if lower.startswith('http:'):
             val = tok[5:]
-            return "CAST(status_code AS TEXT) LIKE ?", [f"%{val}%"]
+            return status_sql(val) or ("CAST(status_code AS TEXT) LIKE ?", [f"%{val}%"])
         if lower.startswith('mime:'):
             val = tok[5:]
+            if val.startswith('^') and len(val) > 1:
+                return _prefix_sql('mime_type', val[1:])
+            if val.startswith('=') and len(val) > 1:
+                return "mime_type = ?", [val[1:]]
             return "mime_type LIKE ?", [f"%{val}%"]
         if lower.startswith('tag:'):
-            return "has_tag(tags, ?)", [tok[4:]]
+            return tag_term_sql(tok[4:])
         # If no prefix is provided, restrict the search to the URL field. This
         # avoids NOT clauses excluding rows due to matches in unrelated columns
         # like tags or MIME type.
-        return "url LIKE ?", [f"%{tok}%"]
+        return _url_term_sql(tok, fts)
 
     def parse_primary(p: int) -> Tuple[str, List[str], int]:
         if p >= len(tokens):
@@ -174,10 +347,11 @@ def parse_search_expression(tokens: List[str], pos: int = 0) -> Tuple[str, List[
     return parse_or(pos)
 
 
-def build_search_sql(expr: str) -> Tuple[str, List[str]]:
+def build_search_sql(expr: str, fts: bool = False) -> Tuple[str, List[str]]:
+    """Compile the boolean search ``expr`` to a SQL condition and params."""
     expr = quote_hashtags(expr)
     tokens = tokenize_search_expr(expr)
-    sql, params, pos = parse_search_expression(tokens)
+    sql, params, pos = parse_search_expression(tokens, fts=fts)
     if pos != len(tokens):
         raise ValueError('Invalid syntax')
     return sql, params
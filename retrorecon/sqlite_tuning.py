@@ -0,0 +1,143 @@
+"""Tuning profile applied to every SQLite connection Retrorecon opens.
+
+The web app, background importers and jobs, and the MCP server all open
+their connections through :func:`connect` so they share the same settings:
+WAL journaling lets readers keep working while an import writes,
+``synchronous=NORMAL`` is durable in WAL mode without an fsync per commit,
+and a larger page cache, memory mapped I/O and in-memory temp tables speed
+up scans and sorts. ``busy_timeout`` makes writers wait for each other
+instead of failing with ``database is locked``.
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Applied in this order: busy_timeout first so a journal mode change waits
+# for other connections instead of failing.
+PRAGMAS = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64 * 1024,  # negative values are KiB: 64 MiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+_CHOICES = {
+    'journal_mode': ('delete', 'truncate', 'persist', 'memory', 'wal', 'off'),
+    'synchronous': ('off', 'normal', 'full', 'extra'),
+    'temp_store': ('default', 'file', 'memory'),
+}
+
+
+def _validate(name: str, value: Any) -> Any:
+    if name not in PRAGMAS:
+        raise ValueError(f"Unknown SQLite tuning setting: {name}")
+    if name in _CHOICES:
+        value = str(value).strip().lower()
+        if value not in _CHOICES[name]:
+            raise ValueError(f"Invalid {name}: {value!r} (expected one of {', '.join(_CHOICES[name])})")
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r} (expected an integer)") from None
+
+
+def profile_from_env(environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """Build the tuning profile from ``RETRORECON_SQLITE_*`` variables.
+
+    ``RETRORECON_SQLITE_TUNING=0`` returns an empty profile, leaving every
+    connection at SQLite's defaults. Invalid values fall back to the default
+    with a warning.
+    """
+    env = os.environ if environ is None else environ
+    if env.get('RETRORECON_SQLITE_TUNING', '1') == '0':
+        return {}
+    raw = {
+        'busy_timeout': env.get('RETRORECON_SQLITE_BUSY_TIMEOUT_MS'),
+        'journal_mode': env.get('RETRORECON_SQLITE_JOURNAL_MODE'),
+        'synchronous': env.get('RETRORECON_SQLITE_SYNCHRONOUS'),
+        'temp_store': env.get('RETRORECON_SQLITE_TEMP_STORE'),
+    }
+    cache_mb = env.get('RETRORECON_SQLITE_CACHE_MB')
+    mmap_mb = env.get('RETRORECON_SQLITE_MMAP_MB')
+    profile = dict(DEFAULT_PROFILE)
+    for name, value in raw.items():
+        if value is None:
+            continue
+        try:
+            profile[name] = _validate(name, value)
+        except ValueError as exc:
+            logger.warning("%s; using %s", exc, DEFAULT_PROFILE[name])
+    for name, value in (('cache_size', cache_mb), ('mmap_size', mmap_mb)):
+        if value is None:
+            continue
+        try:
+            mb = int(value)
+        except ValueError:
+            logger.warning("Invalid %s size %r MB; using %s", name, value, DEFAULT_PROFILE[name])
+            continue
+        profile[name] = -mb * 1024 if name == 'cache_size' else mb * 1024 * 1024
+    return profile
+
+
+def apply(conn: sqlite3.Connection, profile: Optional[Mapping[str, Any]] = None) -> None:
+    """Apply ``profile`` (default :data:`DEFAULT_PROFILE`) to ``conn``."""
+    profile = DEFAULT_PROFILE if profile is None else profile
+    for name in PRAGMAS:
+        if name in profile:
+            conn.execute(f"PRAGMA {name} = {_validate(name, profile[name])}").fetchall()
+
+
+def connect(path: str, profile: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> sqlite3.Connection:
+    """Open ``path`` like :func:`sqlite3.connect` and apply ``profile``."""
+    conn = sqlite3.connect(path, **kwargs)
+    try:
+        apply(conn, profile)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def effective_settings(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Return the values SQLite reports for every tuned setting on ``conn``."""
+    settings: Dict[str, Any] = {}
+    for name in PRAGMAS:
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+        value = row[0] if row else None
+        if name in ('synchronous', 'temp_store') and isinstance(value, int):
+            names = ('off', 'normal', 'full', 'extra') if name == 'synchronous' else _CHOICES['temp_store']
+            value = names[value] if value < len(names) else value
+        settings[name] = value.lower() if isinstance(value, str) else value
+    return settings
+
+
+def self_check(conn: sqlite3.Connection, profile: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """Compare ``conn``'s effective settings with ``profile`` and log the result.
+
+    SQLite silently keeps a different value when a setting cannot take
+    effect, e.g. WAL on a filesystem without shared memory or an
+    ``mmap_size`` above the compile-time limit. Returns ``{'profile',
+    'effective', 'mismatches'}`` where ``mismatches`` lists readable notes.
+    """
+    profile = dict(DEFAULT_PROFILE if profile is None else profile)
+    effective = effective_settings(conn)
+    mismatches: List[str] = []
+    for name, wanted in profile.items():
+        wanted = _validate(name, wanted)
+        if effective.get(name) != wanted:
+            mismatches.append(f"{name}: requested {wanted}, effective {effective.get(name)}")
+    logger.info(
+        "SQLite settings: %s", ', '.join(f"{k}={v}" for k, v in effective.items())
+    )
+    for note in mismatches:
+        logger.warning("SQLite tuning not applied, %s", note)
+    return {'profile': profile, 'effective': effective, 'mismatches': mismatches}
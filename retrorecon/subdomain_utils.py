@@ -1,3 +1,4 @@
+import json
 import logging
 import re
 import urllib.parse
@@ -7,6 +8,7 @@ from collections import defaultdict
 import tldextract
 
 from database import execute_db, executemany_db, query_db, get_db
+from retrorecon import response_cache, search_utils
 
 logger = logging.getLogger(__name__)
 
@@ -36,12 +38,25 @@ def _merge_tags(tag_str: Optional[str]) -> str:
     return ','.join(tags)
 
 
+def _get_json(url: str, source: str, headers: Optional[Dict[str, str]] = None) -> Any:
+    """GET ``url`` and decode JSON, reading through the shared response cache."""
+    cache = response_cache.default_cache()
+    key = response_cache.request_key("GET", url, headers) if cache else ""
+    body = cache.get(source, key) if cache else None
+    if body is not None:
+        return json.loads(body)
+    resp = requests.get(url, headers=headers, timeout=15)
+    resp.raise_for_status()
+    data = resp.json()
+    if cache:
+        cache.put(source, key, resp.content)
+    return data
+
+
 def fetch_from_crtsh(domain: str) -> List[str]:
     """Return subdomains for *domain* fetched from crt.sh."""
     url = f"https://crt.sh/json?identity={domain}"
-    resp = requests.get(url, timeout=15)
-    resp.raise_for_status()
-    data = resp.json()
+    data = _get_json(url, "crtsh")
     subs = set()
     for entry in data:
         values = [entry.get("common_name", ""), entry.get("name_value", "")]
@@ -60,9 +75,7 @@ def fetch_from_virustotal(domain: str, api_key: str) -> List[str]:
     headers = {"x-apikey": api_key}
     subs = []
     while url:
-        resp = requests.get(url, headers=headers, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+        data = _get_json(url, "virustotal", headers=headers)
         subs.extend([d.get("id", "").lower() for d in data.get("data", [])])
         url = data.get("links", {}).get("next")
     return sorted(set(s for s in subs if s))
@@ -133,6 +146,21 @@ def mark_cdxed(subdomain: str) -> None:
     )
 
 
+def list_unindexed_subdomains(root_domain: str) -> List[str]:
+    """Return subdomains of ``root_domain`` that no source has marked as CDX indexed."""
+    rows = query_db(
+        """
+        SELECT subdomain FROM domains
+        WHERE root_domain = ?
+        GROUP BY subdomain
+        HAVING MAX(cdx_indexed) = 0
+        ORDER BY subdomain
+        """,
+        [_clean(root_domain)],
+    )
+    return [_clean(r["subdomain"]) for r in rows]
+
+
 def delete_record(root_domain: str, subdomain: str) -> None:
     """Remove ``subdomain`` for ``root_domain`` from the DB."""
     execute_db(
@@ -192,11 +220,23 @@ def clear_tags(root_domain: str, subdomain: str) -> None:
 
 
 def search_subdomains(term: str, root_domain: Optional[str] = None) -> List[Dict[str, str]]:
-    """Return subdomains matching ``term`` in name or tags."""
-    term = f"%{term.lower()}%"
+    """Return subdomains matching ``term`` in name or tags.
+
+    A term starting with ``#`` is a tag expression such as ``#a AND NOT #b``.
+    """
     params: List[Any] = []
-    where = "WHERE (d.subdomain LIKE ? OR d.tags LIKE ?)"
-    params.extend([term, term])
+    where = ''
+    if term.startswith('#'):
+        try:
+            tag_sql, tag_params = search_utils.build_tag_filter_sql(term.replace('#', ''), 'domains')
+            where = f"WHERE {tag_sql}"
+            params.extend(tag_params)
+        except ValueError:
+            pass
+    if not where:
+        term = f"%{term.lower()}%"
+        where = "WHERE (d.subdomain LIKE ? OR d.tags LIKE ?)"
+        params.extend([term, term])
     if root_domain:
         where += " AND d.root_domain = ?"
         params.append(_clean(root_domain))
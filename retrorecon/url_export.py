@@ -0,0 +1,159 @@
+"""Streaming renderers for ``/export_urls``.
+
+Rows are read from one cursor in chunks of :data:`CHUNK_SIZE` and each chunk
+is rendered to a single text block, so memory stays flat and the first bytes
+go out as soon as the first chunk is read, whatever the size of the export.
+"""
+
+import csv
+import html
+import io
+import json
+import sqlite3
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+EXPORT_COLUMNS = ('id', 'url', 'timestamp', 'status_code', 'mime_type', 'tags')
+
+CHUNK_SIZE = 5000
+
+# Format -> (mimetype, file extension).
+EXPORT_FORMATS = {
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'txt': ('text/plain', 'txt'),
+    'csv': ('text/csv', 'csv'),
+    'md': ('text/markdown', 'md'),
+    'html': ('text/html', 'html'),
+}
+
+Row = Dict[str, Any]
+
+_HTML_HEAD = '\n'.join([
+    '<!DOCTYPE html>',
+    '<html lang="en">',
+    '<head>',
+    '<meta charset="UTF-8">',
+    '<meta name="viewport" content="width=device-width, initial-scale=1.0">',
+    '<title>Exported URLs</title>',
+    '<style>',
+    'body { font-family: monospace; margin: 20px; background: #000; color: #fff; }',
+    'table { border-collapse: collapse; width: 100%; }',
+    'th, td { border: 1px solid #444; padding: 8px; text-align: left; }',
+    'th { background: #222; }',
+    'a { color: #0af; text-decoration: none; }',
+    'a:hover { text-decoration: underline; }',
+    '.timestamp { font-size: 0.9em; color: #aaa; }',
+    '.status { text-align: center; font-weight: bold; }',
+    '.status-2 { color: #0a0; }',
+    '.status-3 { color: #fa0; }',
+    '.status-4 { color: #f50; }',
+    '.status-5 { color: #f00; }',
+    '.tags { font-size: 0.8em; color: #aaf; }',
+    '</style>',
+    '</head>',
+    '<body>',
+    '<h1>Exported URLs</h1>',
+    '<table>',
+    '<thead>',
+    '<tr>',
+    '<th>URL</th>',
+    '<th>Timestamp</th>',
+    '<th>Status</th>',
+    '<th>MIME Type</th>',
+    '<th>Tags</th>',
+    '</tr>',
+    '</thead>',
+    '<tbody>',
+])
+
+
+def iter_row_chunks(
+    db: sqlite3.Connection,
+    where_sql: str = '',
+    params: Sequence[Any] = (),
+    chunk_size: Optional[int] = None,
+) -> Iterator[List[Row]]:
+    """Yield matching ``urls`` rows as lists of at most ``chunk_size`` dicts."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    cur = db.execute(
+        f"SELECT {', '.join(EXPORT_COLUMNS)} FROM urls {where_sql} ORDER BY id",
+        list(params),
+    )
+    try:
+        while True:
+            chunk = cur.fetchmany(chunk_size)
+            if not chunk:
+                break
+            yield [dict(zip(EXPORT_COLUMNS, r)) for r in chunk]
+    finally:
+        cur.close()
+
+
+def _html_row(r: Row) -> str:
+    url = html.escape(r['url'] or '')
+    timestamp = html.escape(r['timestamp'] or '')
+    status = r['status_code'] or ''
+    mime = html.escape(r['mime_type'] or '')
+    tags = html.escape(r['tags'] or '')
+    url_cell = f'<a href="{url}" target="_blank" rel="noopener">{url}</a>' if url else ''
+    status_class = f'status-{str(status)[0]}' if status and str(status)[0].isdigit() else 'status'
+    status_cell = f'<span class="status {status_class}">{status}</span>' if status else ''
+    timestamp_cell = f'<span class="timestamp">{timestamp}</span>' if timestamp else ''
+    tags_cell = f'<span class="tags">{tags}</span>' if tags else ''
+    return (
+        f'<tr><td>{url_cell}</td><td>{timestamp_cell}</td><td>{status_cell}</td>'
+        f'<td>{mime}</td><td>{tags_cell}</td></tr>\n'
+    )
+
+
+def render(fmt: str, chunks: Iterable[List[Row]]) -> Iterator[str]:
+    """Yield the export document in ``fmt`` one chunk of rows at a time."""
+    if fmt == 'json':
+        sep = '['
+        for chunk in chunks:
+            yield sep + ','.join(json.dumps(r, sort_keys=True) for r in chunk)
+            sep = ','
+        yield ']' if sep == ',' else '[]'
+    elif fmt == 'ndjson':
+        for chunk in chunks:
+            yield ''.join(json.dumps(r, sort_keys=True) + '\n' for r in chunk)
+    elif fmt == 'txt':
+        sep = ''
+        for chunk in chunks:
+            yield sep + '\n'.join(r['url'] for r in chunk)
+            sep = '\n'
+    elif fmt == 'csv':
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(EXPORT_COLUMNS[1:])
+        for chunk in chunks:
+            writer.writerows([r[c] for c in EXPORT_COLUMNS[1:]] for r in chunk)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+        if output.tell():
+            yield output.getvalue()
+    elif fmt == 'md':
+        yield '| url | timestamp | status_code | mime_type | tags |\n|---|---|---|---|---|'
+        for chunk in chunks:
+            yield ''.join(
+                f"\n| {r['url']} | {r['timestamp'] or ''} | {r['status_code'] or ''} "
+                f"| {r['mime_type'] or ''} | {r['tags'] or ''} |"
+                for r in chunk
+            )
+    elif fmt == 'html':
+        yield _HTML_HEAD + '\n'
+        for chunk in chunks:
+            yield ''.join(_html_row(r) for r in chunk)
+        yield '</tbody>\n</table>\n</body>\n</html>'
+    else:
+        raise ValueError(f'unknown export format: {fmt}')
+
+
+def gzip_stream(parts: Iterable[str]) -> Iterator[bytes]:
+    """Gzip ``parts`` on the fly, flushing after each so none is held back."""
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for part in parts:
+        yield comp.compress(part.encode('utf-8')) + comp.flush(zlib.Z_SYNC_FLUSH)
+    yield comp.flush()
@@ -0,0 +1,133 @@
+"""In-memory prefilter that drops already stored URLs before they reach SQLite."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, TypeVar
+
+from . import sqlite_tuning
+
+logger = logging.getLogger(__name__)
+
+Row = TypeVar('Row')
+
+
+def fingerprint(url: str) -> int:
+    """Return a 64-bit fingerprint of ``url``."""
+    digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class KnownUrlFilter:
+    """URL fingerprints for one ingest session.
+
+    Holds the fingerprints of URLs stored in ``urls`` plus every URL passed
+    through :meth:`filter` so duplicates later in the same import are dropped
+    too. Each fingerprint costs about 70 bytes in a Python set, close to the
+    size of a typical URL string, so the stored URLs are only loaded when the
+    session is big enough to benefit: a filter made by :meth:`lazy` starts
+    with just the session's own URLs and scans the table once ``min_rows``
+    URLs have passed through it. Below that SQLite's UNIQUE index alone
+    rejects stored URLs. The odds of two distinct URLs sharing a 64-bit
+    fingerprint are negligible below billions of rows.
+    """
+
+    def __init__(self) -> None:
+        self._stored: set = set()
+        self._seen: set = set()
+        self.skipped = 0
+        self._pending: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._stored) + len(self._seen)
+
+    @classmethod
+    def from_db(cls, db: sqlite3.Connection, max_rows: int = 0) -> Optional['KnownUrlFilter']:
+        """Load every stored URL from ``db``.
+
+        Returns ``None`` when the table holds more than ``max_rows`` URLs
+        (``0`` means no limit) so callers fall back to SQLite's own check
+        instead of holding an oversized set in memory.
+        """
+        known = cls()
+        stored = _load_fingerprints(db, max_rows)
+        if stored is None:
+            return None
+        known._stored = stored
+        return known
+
+    @classmethod
+    def lazy(
+        cls,
+        path: str,
+        max_rows: int = 0,
+        min_rows: int = 0,
+        profile: Optional[Dict[str, Any]] = None,
+    ) -> 'KnownUrlFilter':
+        """Return a filter that loads the URLs stored at ``path`` on demand.
+
+        The table is scanned on a connection of its own once more than
+        ``min_rows`` URLs have been checked, so the filter can be shared by
+        the threads of a crawl. Past ``max_rows`` stored URLs only repeats
+        within the session are dropped.
+        """
+        known = cls()
+        known._pending = {'path': path, 'max_rows': max_rows, 'min_rows': min_rows, 'profile': profile}
+        if min_rows <= 0:
+            known._load_pending()
+        return known
+
+    def _load_pending(self) -> None:
+        with self._lock:
+            pending = self._pending
+            if pending is None:
+                return
+            conn = sqlite_tuning.connect(pending['path'], pending['profile'])
+            try:
+                stored = _load_fingerprints(conn, pending['max_rows'])
+            finally:
+                conn.close()
+            if stored is not None:
+                self._stored = stored
+            self._pending = None
+
+    def add(self, url: str) -> bool:
+        """Remember ``url`` and return ``True`` if it was not known yet.
+
+        Safe to call from several threads: the check, the insert and the
+        ``skipped`` count happen under the filter's lock.
+        """
+        fp = fingerprint(url)
+        with self._lock:
+            if fp in self._seen or fp in self._stored:
+                self.skipped += 1
+                return False
+            self._seen.add(fp)
+            load = self._pending is not None and len(self._seen) > self._pending['min_rows']
+        if load:
+            self._load_pending()
+        return True
+
+    def filter(self, rows: Iterable[Row], index: Any = 0) -> Iterator[Row]:
+        """Yield rows whose URL at ``rows[i][index]`` has not been seen."""
+        for row in rows:
+            if self.add(row[index]):
+                yield row
+
+
+def _load_fingerprints(db: sqlite3.Connection, max_rows: int = 0) -> Optional[set]:
+    """Return fingerprints of every URL in ``db`` or ``None`` past ``max_rows``."""
+    seen: set = set()
+    cur = db.execute("SELECT url FROM urls")
+    while True:
+        chunk = cur.fetchmany(10000)
+        if not chunk:
+            break
+        seen.update(fingerprint(r[0]) for r in chunk)
+        if max_rows and len(seen) > max_rows:
+            logger.debug("Skipping URL prefilter: more than %d stored URLs", max_rows)
+            cur.close()
+            return None
+    return seen
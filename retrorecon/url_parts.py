@@ -0,0 +1,62 @@
+"""Split URLs into the parsed columns stored alongside each ``urls`` row."""
+
+import urllib.parse
+from typing import Optional, Tuple
+
+URL_PART_COLUMNS = ('scheme', 'host', 'port', 'path', 'ext', 'query_keys')
+
+# Longest trailing ``.suffix`` of the last path segment treated as a file
+# extension; anything longer is more likely part of a slug.
+MAX_EXT_LENGTH = 10
+
+# Rows updated per transaction by the ``url_parse`` backfill job.
+BACKFILL_BATCH_SIZE = 5000
+
+UrlParts = Tuple[str, Optional[str], Optional[int], Optional[str], Optional[str], Optional[str]]
+
+
+def extension(path: str) -> Optional[str]:
+    """Return the lowercased file extension of ``path`` or ``None``."""
+    name = path.rsplit('/', 1)[-1]
+    stem, dot, ext = name.rpartition('.')
+    if not dot or not stem or not ext or len(ext) > MAX_EXT_LENGTH or not ext.isalnum():
+        return None
+    return ext.lower()
+
+
+def query_keys(query: str) -> Optional[str]:
+    """Return the sorted, lowercased parameter names of ``query`` joined by commas."""
+    keys = {
+        k.strip().lower().replace(',', '')
+        for k, _v in urllib.parse.parse_qsl(query, keep_blank_values=True)
+    }
+    keys.discard('')
+    return ','.join(sorted(keys)) if keys else None
+
+
+def parse_url(url: str) -> UrlParts:
+    """Return ``(scheme, host, port, path, ext, query_keys)`` for ``url``.
+
+    Unparseable URLs yield an empty scheme and ``None`` for the rest, so the
+    row is still marked as processed by the backfill.
+    """
+    if not isinstance(url, str):
+        return '', None, None, None, None, None
+    try:
+        parts = urllib.parse.urlsplit(url)
+        host = parts.hostname
+    except ValueError:
+        return '', None, None, None, None, None
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    path = parts.path or '/'
+    return (
+        parts.scheme.lower(),
+        host or None,
+        port,
+        path,
+        extension(path),
+        query_keys(parts.query),
+    )
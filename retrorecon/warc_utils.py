@@ -0,0 +1,157 @@
+"""Streaming readers for local web archive indexes and WARC files.
+
+Both readers work on any binary stream, including the decompressing
+streams from :func:`retrorecon.import_utils.open_upload`, and yield one
+record dict at a time so archives with tens of millions of captures can be
+imported without loading them into memory or touching the network.
+"""
+
+import json
+import re
+import urllib.parse
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_COLUMNS = ('url', 'domain', 'timestamp', 'status_code', 'mime_type', 'tags', 'source_type')
+
+# Field letters of the classic CDX format used when a file has no header.
+_DEFAULT_CDX_FIELDS = ['N', 'b', 'a', 'm', 's', 'k', 'r', 'M', 'S', 'V', 'g']
+# WARC record types that describe a captured URL.
+_CAPTURE_TYPES = {'response', 'revisit', 'resource'}
+_NON_DIGITS = re.compile(r'\D')
+_SKIP_CHUNK = 1 << 20
+
+
+def _status(value: Any) -> Optional[int]:
+    raw = str(value).strip()
+    return int(raw) if raw.isdigit() else None
+
+
+def _mime(value: Any) -> Optional[str]:
+    if not value or value == '-':
+        return None
+    return str(value).split(';')[0].strip() or None
+
+
+def _record(url: str, timestamp: Any, status: Any, mime: Any, source_type: str) -> Dict[str, Any]:
+    try:
+        domain = urllib.parse.urlsplit(url).hostname or ''
+    except ValueError:
+        domain = ''
+    return {
+        'url': url,
+        'domain': domain,
+        'timestamp': str(timestamp) if timestamp else None,
+        'status_code': _status(status),
+        'mime_type': _mime(mime),
+        'tags': '',
+        'source_type': source_type,
+    }
+
+
+def iter_cdxj_records(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield records from a CDXJ (pywb) or classic space separated CDX index.
+
+    CDXJ lines look like ``<surt> <timestamp> {json}``. Classic CDX lines are
+    mapped through the field letters of the ``CDX`` header line, defaulting
+    to the eleven field layout. Records are tagged with a ``source_type`` of
+    ``'cdxj'`` or ``'cdx_file'`` after the line format; the latter keeps them
+    apart from ``'cdx'`` rows fetched from the live Wayback API. Malformed
+    lines are skipped.
+    """
+    fields: List[str] = _DEFAULT_CDX_FIELDS
+    for raw in stream:
+        line = raw.decode('utf-8', 'replace').strip()
+        if not line:
+            continue
+        if line.startswith('CDX') or line.startswith('!'):
+            if line.startswith('CDX'):
+                fields = line.split()[1:]
+            continue
+        parts = line.split(' ', 2)
+        if len(parts) == 3 and parts[2].startswith('{'):
+            try:
+                data = json.loads(parts[2])
+            except ValueError:
+                continue
+            url = data.get('url')
+            if not isinstance(url, str) or not url:
+                continue
+            yield _record(url, parts[1], data.get('status'), data.get('mime'), 'cdxj')
+            continue
+        values = dict(zip(fields, line.split(' ')))
+        url = values.get('a')
+        if not url or url == '-':
+            continue
+        yield _record(url, values.get('b'), values.get('s'), values.get('m'), 'cdx_file')
+
+
+def _read_headers(stream: BinaryIO, limit: Optional[int] = None) -> Tuple[Dict[str, str], int]:
+    """Read ``Name: value`` lines up to a blank line.
+
+    Returns the lowercased headers and the number of bytes consumed, reading
+    no more than ``limit`` bytes when given.
+    """
+    headers: Dict[str, str] = {}
+    consumed = 0
+    while limit is None or consumed < limit:
+        line = stream.readline() if limit is None else stream.readline(limit - consumed)
+        if not line:
+            break
+        consumed += len(line)
+        if line in (b'\r\n', b'\n'):
+            break
+        name, sep, value = line.decode('utf-8', 'replace').partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers, consumed
+
+
+def _skip(stream: BinaryIO, count: int) -> None:
+    while count > 0:
+        data = stream.read(min(count, _SKIP_CHUNK))
+        if not data:
+            return
+        count -= len(data)
+
+
+def iter_warc_records(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield a record for each response, revisit or resource in a WARC file.
+
+    Only the WARC headers and the HTTP status line and headers of each
+    payload are parsed; bodies are read past in fixed size chunks.
+    Compressed ``.warc.gz`` files work because gzip members are concatenated
+    transparently by the decompressing stream.
+    """
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+        if not line.startswith(b'WARC/'):
+            raise ValueError(f"Invalid WARC record header: {line[:40]!r}")
+        headers, _ = _read_headers(stream)
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            raise ValueError("Invalid WARC Content-Length")
+        record_type = headers.get('warc-type', '')
+        url = headers.get('warc-target-uri', '').strip('<>')
+        status = None
+        mime = None
+        consumed = 0
+        if record_type in ('response', 'revisit') and headers.get('content-type', '').startswith('application/http'):
+            status_line = stream.readline(min(length, 8192))
+            consumed = len(status_line)
+            parts = status_line.split(None, 2)
+            if len(parts) > 1:
+                status = parts[1].decode('ascii', 'replace')
+            http, used = _read_headers(stream, length - consumed)
+            consumed += used
+            mime = http.get('content-type')
+        elif record_type == 'resource':
+            mime = headers.get('content-type')
+        _skip(stream, length - consumed)
+        if url and record_type in _CAPTURE_TYPES:
+            timestamp = _NON_DIGITS.sub('', headers.get('warc-date', ''))[:14]
+            yield _record(url, timestamp, status, mime, 'warc')
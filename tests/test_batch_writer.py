@@ -0,0 +1,60 @@
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import import_utils
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def test_batch_writer_counts_and_reports_by_interval(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    clock = iter(range(1000))
+    monkeypatch.setattr(import_utils.time, "monotonic", lambda: next(clock) * 0.1)
+    reports = []
+    db = sqlite3.connect(app.app.config["DATABASE"])
+    rows = [(f"http://example.com/{n % 20}", None, None, None, "") for n in range(30)]
+    rows.insert(5, ({"bad": "row"}, None, None, None, ""))
+    with import_utils.BatchWriter(db, batch_size=8, interval=1.0,
+                                  on_progress=lambda w: reports.append(w.processed)) as writer:
+        writer.extend(rows)
+    db.close()
+    assert writer.processed == 31
+    assert writer.inserted == 20
+    assert writer.failed == 1
+    # Roughly one report per simulated second plus the final one.
+    assert 2 <= len(reports) <= 5
+    assert reports[-1] == 31
+
+
+def test_har_import_uses_batched_writer(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    entries = [
+        {"request": {"url": f"http://example.com/{n}", "method": "GET"},
+         "response": {"status": 200, "content": {"mimeType": "text/html"}}}
+        for n in range(5)
+    ]
+    entries.append(entries[0])
+    har = tmp_path / "capture.har"
+    har.write_text(json.dumps({"log": {"entries": entries}}))
+    app._background_har_import(str(har))
+    progress = app.get_import_progress()
+    assert progress["status"] == "done"
+    assert progress["message"].startswith("Imported 5 of 6 HAR entries.")
+    assert not har.exists()
+    with app.app.app_context():
+        rows = app.query_db("SELECT source_type FROM urls")
+    assert len(rows) == 5
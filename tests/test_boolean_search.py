@@ -26,3 +26,130 @@ def test_and_not_url_only():
     rows = conn.execute(f'SELECT url FROM urls WHERE {sql}', params).fetchall()
     assert [r['url'] for r in rows] == ['https://demo.com/config']
 
+
+
+def test_fts_search_matches_like(monkeypatch, tmp_path):
+    import app
+
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "db").mkdir()
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    with app.app.app_context():
+        app.create_new_db("test")
+        assert app.url_fts_available()
+        for url in ("https://demo.com/config", "https://demo.com/CONFIG.js", "https://demo.com/a.css", "https://x.io/js"):
+            app.execute_db("INSERT INTO urls (url, domain) VALUES (?, 'demo.com')", [url])
+        app.execute_db("UPDATE urls SET url = 'https://demo.com/renamed' WHERE url = 'https://demo.com/a.css'")
+        app.execute_db("DELETE FROM urls WHERE url = 'https://x.io/js'")
+        for expr in ('config AND NOT .js', 'url:demo.com OR js', 'css', 'renamed', 'io', '"my ""quoted"" term"'):
+            fts_sql, fts_params = build_search_sql(expr, fts=True)
+            like_sql, like_params = build_search_sql(expr)
+            got = app.query_db(f"SELECT url FROM urls WHERE {fts_sql} ORDER BY id", fts_params)
+            want = app.query_db(f"SELECT url FROM urls WHERE {like_sql} ORDER BY id", like_params)
+            assert [r["url"] for r in got] == [r["url"] for r in want], expr
+        assert "urls_fts" in build_search_sql("config", fts=True)[0]
+        assert "urls_fts" not in build_search_sql("js", fts=True)[0]
+
+
+def test_fts_index_catches_up_after_bulk_ingest(monkeypatch, tmp_path):
+    import app
+
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "db").mkdir()
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.execute_db("INSERT INTO urls (url, domain) VALUES ('https://demo.com/old.css', 'demo.com')")
+        db = app.get_db()
+        with app.bulk_ingest(db):
+            app.insert_urls([("https://demo.com/config.js", "demo.com", None, None, None, "")], db=db)
+            app.execute_db("UPDATE urls SET url = 'https://demo.com/renamed.js' WHERE url LIKE '%config.js'")
+            app.execute_db("UPDATE urls SET url = 'https://demo.com/moved.css' WHERE url LIKE '%old.css'")
+            assert not app.query_db("SELECT 1 FROM sqlite_master WHERE name = 'urls_fts_ai'")
+        db.execute("INSERT INTO urls_fts(urls_fts, rank) VALUES ('integrity-check', 1)")
+        for expr in ('renamed', 'config', 'moved', 'old'):
+            fts_sql, fts_params = build_search_sql(expr, fts=True)
+            like_sql, like_params = build_search_sql(expr)
+            got = app.query_db(f"SELECT url FROM urls WHERE {fts_sql}", fts_params)
+            want = app.query_db(f"SELECT url FROM urls WHERE {like_sql}", like_params)
+            assert [r["url"] for r in got] == [r["url"] for r in want], expr
+
+
+
+def test_bulk_ingest_indexes_rows_that_reuse_a_deleted_id(monkeypatch, tmp_path):
+    import app
+
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "db").mkdir()
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.execute_db("INSERT INTO urls (id, url, domain) VALUES (7, 'https://demo.com/old.css', 'demo.com')")
+        db = app.get_db()
+        with app.bulk_ingest(db):
+            # Without AUTOINCREMENT the next insert would take id 7 again.
+            app.execute_db("DELETE FROM urls WHERE id = 7")
+            app.execute_db("INSERT INTO urls (id, url, domain, tags) VALUES (7, 'https://demo.com/reused.js', 'demo.com', 'x')")
+        db.execute("INSERT INTO urls_fts(urls_fts, rank) VALUES ('integrity-check', 1)")
+        fts_sql, fts_params = build_search_sql('reused', fts=True)
+        assert [r["url"] for r in app.query_db(f"SELECT url FROM urls WHERE {fts_sql}", fts_params)] == [
+            "https://demo.com/reused.js"]
+        assert [tuple(r) for r in app.query_db("SELECT url_id, tag FROM url_tags")] == [(7, "x")]
+        assert not app.query_db("SELECT 1 FROM urls_bulk_pending")
+
+def _typed_db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        "CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT, host TEXT, timestamp TEXT, status_code INTEGER, mime_type TEXT, tags TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO urls (url, host, timestamp, status_code, mime_type) VALUES (?, ?, ?, ?, ?)",
+        [
+            ('https://api.demo.com/v1', 'api.demo.com', '20181231235959', 200, 'application/json'),
+            ('https://demo.com/404', 'demo.com', '20190115000000', 404, 'text/html'),
+            ('http://demo.com/old', 'demo.com', '20190601120000', 301, 'text/html'),
+            ('https://cdn.demo.com/a.js', 'cdn.demo.com', '20200101000000', 503, 'text/javascript'),
+            ('https://demo.com/1200', 'demo.com', '20210101000000', 200, 'text/plain'),
+        ],
+    )
+    return conn
+
+
+def _urls(conn, expr):
+    sql, params = build_search_sql(expr)
+    return [r[0] for r in conn.execute(f'SELECT url FROM urls WHERE {sql} ORDER BY id', params)]
+
+
+def test_typed_status_predicates():
+    conn = _typed_db()
+    assert _urls(conn, 'http:200') == ['https://api.demo.com/v1', 'https://demo.com/1200']
+    assert _urls(conn, 'http:4xx') == ['https://demo.com/404']
+    assert _urls(conn, 'http:>=500') == ['https://cdn.demo.com/a.js']
+    assert _urls(conn, 'http:300-404') == ['https://demo.com/404', 'http://demo.com/old']
+    assert _urls(conn, 'NOT http:2xx AND http:<500') == ['https://demo.com/404', 'http://demo.com/old']
+
+
+def test_timestamp_ranges():
+    conn = _typed_db()
+    assert _urls(conn, 'timestamp:2019') == ['https://demo.com/404', 'http://demo.com/old']
+    assert _urls(conn, 'timestamp:2019-06') == ['http://demo.com/old']
+    assert _urls(conn, 'timestamp:2019..2020') == [
+        'https://demo.com/404', 'http://demo.com/old', 'https://cdn.demo.com/a.js'
+    ]
+    assert _urls(conn, 'before:2019') == ['https://api.demo.com/v1']
+    assert _urls(conn, 'after:2019') == ['https://cdn.demo.com/a.js', 'https://demo.com/1200']
+    assert _urls(conn, 'timestamp:<=2019-01') == ['https://api.demo.com/v1', 'https://demo.com/404']
+
+
+def test_host_and_prefix_predicates():
+    conn = _typed_db()
+    assert _urls(conn, 'host:demo.com') == ['https://demo.com/404', 'http://demo.com/old', 'https://demo.com/1200']
+    assert _urls(conn, 'host:api.*') == ['https://api.demo.com/v1']
+    assert _urls(conn, 'host:*.demo.com') == ['https://api.demo.com/v1', 'https://cdn.demo.com/a.js']
+    assert _urls(conn, 'url:^http://') == ['http://demo.com/old']
+    assert _urls(conn, 'mime:^text/ AND NOT mime:=text/html') == [
+        'https://cdn.demo.com/a.js', 'https://demo.com/1200'
+    ]
@@ -0,0 +1,94 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import bulk_actions, jobs as jobs_mod
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.insert_urls([
+            ("https://example.com/a.js", "example.com", None, 200, None, " keep ,old,"),
+            ("https://example.com/b.js", "example.com", None, 404, None, "Old"),
+            ("https://example.com/c.php", "example.com", None, 200, None, ""),
+            ("https://other.com/d.js", "other.com", None, 500, None, None),
+        ])
+
+
+def tags():
+    with app.app.app_context():
+        return {r['url'].rsplit('/', 1)[-1]: r['tags'] for r in app.query_db("SELECT url, tags FROM urls")}
+
+
+def post(client, **data):
+    return client.post('/bulk_action', data={'ajax': '1', **data}).get_json()
+
+
+def test_add_and_remove_tag_over_search(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        added = post(client, action='add_tag', tag='js', select_all_matching='true', q='ext:js')
+        again = post(client, action='add_tag', tag='JS', select_all_matching='true', q='ext:js')
+        assert added['affected'] == 3
+        assert again['affected'] == 0
+        assert tags() == {'a.js': ' keep ,old,js', 'b.js': 'Old,js', 'c.php': '', 'd.js': 'js'}
+        removed = post(client, action='remove_tag', tag='old', select_all_matching='true', q='')
+        assert removed == {'message': "Removed tag 'old' from 2 entries.", 'affected': 2}
+    assert tags() == {'a.js': 'keep,js', 'b.js': 'js', 'c.php': '', 'd.js': 'js'}
+    with app.app.app_context():
+        assert app.query_db("SELECT COUNT(*) AS c FROM url_tags WHERE tag = 'old'", one=True)['c'] == 0
+
+
+def test_clear_and_delete_selected_ids(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        assert post(client, action='clear_tags', selected_ids=['1', '2', '3'])['affected'] == 2
+        assert post(client, action='delete', selected_ids=['2', '4', '99'])['affected'] == 2
+        assert post(client, action='add_tag', selected_ids=['1'])['message'] == "No tag provided for bulk add."
+        resp = client.post('/bulk_action', data={'action': 'delete', 'select_all_matching': 'true', 'q': 'http:500'})
+        assert resp.status_code == 302
+    assert tags() == {'a.js': '', 'c.php': ''}
+
+
+def test_large_select_all_runs_as_resumable_job(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "BULK_BACKGROUND_THRESHOLD", 3)
+    monkeypatch.setattr(bulk_actions, "BATCH_SIZE", 2)
+    monkeypatch.setattr(app, "start_bulk_action_job", lambda job_id: False)
+    with app.app.test_client() as client:
+        small = post(client, action='add_tag', tag='x', select_all_matching='true', q='http:200')
+        queued = post(client, action='add_tag', tag='big', select_all_matching='true', q='example')
+    assert small['affected'] == 2
+    job_id = queued['job_id']
+    app._background_bulk_action(job_id)
+    with app.app.app_context():
+        job = jobs_mod.get_job(app.get_db(), job_id)
+    assert job['status'] == 'done'
+    assert job['inserted'] == 3
+    assert job['next_page'] == job['page_count'] == 4
+    assert job['result'] == "Added tag 'big' to 3 entries."
+    assert job['resume_key'] is None
+    assert json.loads(job['spec'])['tag'] == 'big'
+    assert tags()['c.php'] == 'x,big'
+    assert tags()['d.js'] is None
+
+
+def test_bulk_jobs_are_listed_by_generic_jobs_api(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setattr(app, "start_bulk_action_job", lambda job_id: False)
+    with app.app.test_client() as client:
+        job_id = post(client, action='clear_tags', background='1', select_all_matching='true', q='')['job_id']
+        assert [j['id'] for j in client.get('/jobs').get_json()] == [job_id]
+        assert client.get('/jobs?type=bulk_action').get_json()[0]['type'] == 'bulk_action'
+        assert client.get('/cdx_jobs').get_json() == []
+        assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'queued'
+        assert client.post(f'/jobs/{job_id}/resume').get_json() == {'job_id': job_id, 'started': False}
@@ -0,0 +1,135 @@
+import io
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import columnar
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.insert_urls([
+            (f"https://example.com/{n}.js", "example.com", f"2020010100000{n}", 200 if n % 2 else 404,
+             "application/javascript", "t")
+            for n in range(7)
+        ])
+        app.execute_db(
+            "INSERT INTO domains (root_domain, subdomain, source, tags) VALUES "
+            "('example.com', 'a.example.com', 'crtsh', 'prod'),"
+            "('example.com', 'b.example.com', 'virustotal', ''),"
+            "('other.com', 'c.other.com', 'crtsh', '')"
+        )
+    monkeypatch.setattr(columnar, "ROW_GROUP_SIZE", 3)
+
+
+def test_parquet_export_is_dictionary_encoded_in_row_groups(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        resp = client.get('/export_urls', query_string={'format': 'parquet', 'select_all_matching': 'true'})
+    assert resp.headers['Content-Disposition'].endswith('urls.parquet')
+    f = pq.ParquetFile(io.BytesIO(resp.get_data()))
+    assert f.metadata.num_row_groups == 3
+    table = f.read()
+    assert table.num_rows == 7
+    assert pa.types.is_dictionary(table.schema.field('mime_type').type)
+    status = f.schema_arrow.get_field_index('status_code')
+    assert 'RLE_DICTIONARY' in f.metadata.row_group(0).column(status).encodings
+    assert table.column('status_code').to_pylist()[:3] == [404, 200, 404]
+    assert table.column('ext').to_pylist() == ['js'] * 7
+
+
+def test_arrow_export_filters_by_search(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        resp = client.get('/export_urls', query_string={
+            'format': 'arrow', 'select_all_matching': 'true', 'q': 'http:200',
+        })
+    reader = pa.ipc.open_file(pa.BufferReader(resp.get_data()))
+    table = reader.read_all()
+    assert table.column('url').to_pylist() == [f"https://example.com/{n}.js" for n in (1, 3, 5)]
+    assert table.schema.metadata[columnar.TABLE_METADATA_KEY] == b'urls'
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_round_trip_into_new_project(tmp_path, monkeypatch, fmt):
+    setup_tmp(monkeypatch, tmp_path)
+    urls = tmp_path / f"urls.{fmt}"
+    domains = tmp_path / f"domains.{fmt}"
+    with app.app.app_context():
+        db = app.get_db()
+        urls.write_bytes(b''.join(columnar.iter_export(db, 'urls', fmt)))
+        domains.write_bytes(b''.join(columnar.iter_export(
+            db, 'domains', fmt, 'WHERE root_domain = ?', ['example.com']
+        )))
+        app.create_new_db("copy")
+    app._background_columnar_import(str(urls))
+    assert app.get_import_progress()['message'] == "Imported 7 of 7 URL records."
+    app._background_columnar_import(str(domains))
+    with app.app.app_context():
+        rows = app.query_db("SELECT url, status_code, mime_type, host, ext FROM urls ORDER BY id")
+        assert len(rows) == 7
+        assert tuple(rows[1]) == ("https://example.com/1.js", 200, "application/javascript", "example.com", "js")
+        subs = app.query_db("SELECT subdomain, source, tags FROM domains ORDER BY subdomain")
+        assert [tuple(r) for r in subs] == [
+            ('a.example.com', 'crtsh', 'prod'), ('b.example.com', 'virustotal', ''),
+        ]
+        assert app.query_db("SELECT tag FROM domain_tags", one=True)['tag'] == 'prod'
+    assert not urls.exists()
+
+
+
+def test_compressed_columnar_uploads_are_rejected(tmp_path, monkeypatch):
+    import gzip
+    import zipfile
+
+    from retrorecon import import_utils
+
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        data = b''.join(columnar.iter_export(app.get_db(), 'urls', 'parquet'))
+    gz = tmp_path / "urls.parquet.gz"
+    gz.write_bytes(gzip.compress(data))
+    zipped = tmp_path / "urls.zip"
+    with zipfile.ZipFile(zipped, 'w') as zf:
+        zf.writestr("urls.parquet", data)
+    for path in (gz, zipped):
+        with pytest.raises(ValueError, match="uncompressed"):
+            import_utils.upload_kind(str(path), path.name)
+    with app.app.test_client() as client:
+        resp = client.post('/import_file', data={'import_file': (io.BytesIO(gz.read_bytes()), gz.name)})
+        with client.session_transaction() as sess:
+            flashes = sess['_flashes']
+    assert resp.status_code == 302
+    assert flashes[-1][0] == 'error' and 'uncompressed' in flashes[-1][1]
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_dictionaries_only_carry_new_values_per_batch(tmp_path, monkeypatch, fmt):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        app.execute_db("UPDATE urls SET domain = 'd' || id || '.example.com'")
+        data = b''.join(columnar.iter_export(app.get_db(), 'urls', fmt))
+    domains = [f"d{n}.example.com" for n in range(1, 8)]
+    if fmt == 'parquet':
+        f = pq.ParquetFile(io.BytesIO(data))
+        groups = [f.read_row_group(i, columns=['domain']).column(0) for i in range(f.num_row_groups)]
+        assert [g.chunk(0).dictionary.to_pylist() for g in groups] == [domains[:3], domains[3:6], domains[6:]]
+        assert f.read().column('domain').to_pylist() == domains
+    else:
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+        assert table.column('domain').to_pylist() == domains
+        assert table.column('domain').chunk(2).dictionary.to_pylist() == domains
@@ -0,0 +1,111 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import count_cache
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+    count_cache.clear()
+
+
+def insert(path, urls):
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO urls (url, domain) VALUES (?, 'example.com')", [(u,) for u in urls])
+    conn.commit()
+    conn.close()
+
+
+def counting(monkeypatch):
+    calls = []
+    real = count_cache._count
+
+    def wrapper(*args):
+        calls.append(args[1])
+        return real(*args)
+
+    monkeypatch.setattr(count_cache, "_count", wrapper)
+    return calls
+
+
+def test_count_is_cached_until_the_database_changes(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    path = app.app.config["DATABASE"]
+    insert(path, ["http://example.com/a", "http://example.com/b"])
+    calls = counting(monkeypatch)
+    conn = sqlite3.connect(path)
+    where = "WHERE url LIKE ?"
+    assert count_cache.count_urls(conn, path, where, ["%/a%"]) == (1, True)
+    assert count_cache.count_urls(conn, path, where, ["%/a%"]) == (1, True)
+    assert len(calls) == 1
+    insert(path, ["http://example.com/a2"])
+    assert count_cache.count_urls(conn, path, where, ["%/a%"]) == (2, True)
+    assert len(calls) == 2
+    conn.close()
+
+
+def test_estimate_limit_marks_lower_bound(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    path = app.app.config["DATABASE"]
+    insert(path, [f"http://example.com/{i}" for i in range(12)])
+    conn = sqlite3.connect(path)
+    assert count_cache.count_urls(conn, path, estimate_limit=5) == (5, False)
+    assert count_cache.count_urls(conn, path, estimate_limit=50) == (12, True)
+    conn.close()
+
+
+def test_recreated_database_is_recounted(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    path = app.app.config["DATABASE"]
+    insert(path, ["http://example.com/a"])
+    conn = sqlite3.connect(path)
+    assert count_cache.count_urls(conn, path).value == 1
+    conn.close()
+    with app.app.app_context():
+        app.create_new_db("test")
+    conn = sqlite3.connect(path)
+    assert count_cache.count_urls(conn, path).value == 0
+    conn.close()
+
+
+def test_index_pages_do_not_recount(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    insert(app.app.config["DATABASE"], [f"http://example.com/{i}" for i in range(30)])
+    calls = counting(monkeypatch)
+    rendered = {}
+    import retrorecon.routes.dynamic as dyn
+    monkeypatch.setattr(dyn, "dynamic_template", lambda tpl, **ctx: rendered.update(ctx) or "")
+    monkeypatch.setitem(app.app.config, "COUNT_ESTIMATE_LIMIT", 20)
+    with app.app.test_client() as client:
+        for page in (1, 2, 3):
+            client.get('/', query_string={'q': 'example', 'page': page})
+    assert len(calls) == 1
+    assert rendered['total_count'] == 20
+    assert rendered['count_exact'] is False
+    assert rendered['page'] == 3
+    assert len(rendered['urls']) == 10
+
+
+def test_switching_databases_closes_the_old_watcher(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setattr(app, "start_mcp_sqlite", lambda path: None)
+    monkeypatch.setattr(app, "resume_jobs", lambda: None)
+    old = app.app.config["DATABASE"]
+    conn = sqlite3.connect(old)
+    count_cache.count_urls(conn, old)
+    conn.close()
+    assert old in count_cache._watchers
+    with app.app.test_client() as client:
+        client.post('/new_db', data={'db_name': 'other'})
+    assert old not in count_cache._watchers
+    assert not any(key[0] == old for key in count_cache._cache)
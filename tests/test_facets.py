@@ -0,0 +1,124 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import count_cache, facets
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.insert_urls([
+            ("https://example.com/app.js", "example.com", "20200101000000", 200, "application/javascript", ""),
+            ("https://example.com/login", "example.com", "20210101000000", 302, "text/html", ""),
+            ("https://cdn.example.com/lib.js", "cdn.example.com", "20210505000000", 200, "application/javascript", ""),
+            ("https://cdn.example.com/missing", "cdn.example.com", None, None, None, ""),
+        ])
+    count_cache.clear()
+    return app.app.config["DATABASE"]
+
+
+def histogram(result, facet):
+    return {b['value']: b['count'] for b in result['facets'][facet]}
+
+
+def test_unfiltered_facets_follow_writes(tmp_path, monkeypatch):
+    path = setup_tmp(monkeypatch, tmp_path)
+    conn = sqlite3.connect(path)
+    result = facets.facet_counts(conn, path, use_cache=False)
+    assert result['total'] == 4
+    assert histogram(result, 'status') == {200: 2, 302: 1, None: 1}
+    assert histogram(result, 'ext') == {'js': 2, None: 2}
+    assert histogram(result, 'year') == {'2021': 2, '2020': 1, None: 1}
+    conn.execute("UPDATE urls SET status_code = 404 WHERE url LIKE '%login'")
+    conn.execute("DELETE FROM urls WHERE url LIKE '%missing'")
+    result = facets.facet_counts(conn, path, use_cache=False)
+    assert result['total'] == 3
+    assert histogram(result, 'status') == {200: 2, 404: 1}
+    assert histogram(result, 'host') == {'example.com': 2, 'cdn.example.com': 1}
+    conn.close()
+
+
+def test_facet_table_is_rebuilt_for_older_databases(tmp_path, monkeypatch):
+    path = setup_tmp(monkeypatch, tmp_path)
+    conn = sqlite3.connect(path)
+    for name in ('url_facet_counts_ai', 'url_facet_counts_ad', 'url_facet_counts_au'):
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DELETE FROM url_facet_counts")
+    conn.commit()
+    conn.close()
+    with app.app.app_context():
+        app.ensure_schema()
+    conn = sqlite3.connect(path)
+    assert histogram(facets.facet_counts(conn, path, use_cache=False), 'mime') == {
+        'application/javascript': 2, 'text/html': 1, None: 1,
+    }
+    conn.close()
+
+
+def test_facets_route_filters_limits_and_caches(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    calls = []
+    real = facets._compute
+    monkeypatch.setattr(facets, "_compute", lambda *args: calls.append(args) or real(*args))
+    with app.app.test_client() as client:
+        data = client.get('/api/facets', query_string={'q': 'ext:js'}).get_json()
+        again = client.get('/api/facets', query_string={'q': 'ext:js'}).get_json()
+        limited = client.get('/api/facets', query_string={'limit': 1}).get_json()
+        bad = client.get('/api/facets', query_string={'limit': 'x'})
+    assert data == again
+    assert len(calls) == 2
+    assert data['total'] == 2
+    assert histogram(data, 'host') == {'example.com': 1, 'cdn.example.com': 1}
+    assert data['facets']['mime'] == [{'value': 'application/javascript', 'count': 2}]
+    assert [len(b) for b in limited['facets'].values()] == [1] * len(facets.FACET_EXPRESSIONS)
+    assert bad.status_code == 400
+
+
+def test_bulk_import_defers_facet_counts(tmp_path, monkeypatch):
+    path = setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    dropped = []
+    real = app.bulk_ingest
+
+    def spy(db):
+        dropped.append(True)
+        return real(db)
+
+    monkeypatch.setattr(app, "bulk_ingest", spy)
+    upload = tmp_path / "urls.ndjson"
+    upload.write_text('{"url": "https://example.com/x.js", "status_code": 200}\n' * 2)
+    app._background_import(str(upload), "urls.ndjson")
+    assert dropped == [True]
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'url_facet_counts_a%'").fetchone()[0] == 3
+    result = facets.facet_counts(conn, path, use_cache=False)
+    assert result['total'] == 5
+    assert histogram(result, 'ext') == {'js': 3, None: 2}
+
+
+def test_bulk_ingest_counts_rows_written_during_the_window(tmp_path, monkeypatch):
+    path = setup_tmp(monkeypatch, tmp_path)
+    conn = sqlite3.connect(path)
+    with app.bulk_ingest(conn), app.bulk_ingest(conn):
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'url_facet_counts_ai'").fetchone() is None
+        app.insert_urls([
+            ("https://example.com/a.css", "example.com", "20220101000000", 200, "text/css", ""),
+            ("https://example.com/b.css", "example.com", "20220101000000", 404, "text/css", ""),
+        ], db=conn)
+        with conn:
+            conn.execute("DELETE FROM urls WHERE url IN ('https://example.com/login', 'https://example.com/b.css')")
+            conn.execute("UPDATE urls SET status_code = 500 WHERE url LIKE '%.css' OR url LIKE '%app.js'")
+    result = facets.facet_counts(conn, path, use_cache=False)
+    assert result['total'] == 4
+    assert histogram(result, 'status') == {500: 2, 200: 1, None: 1}
+    assert histogram(result, 'ext') == {'js': 2, 'css': 1, None: 1}
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'url_facet_counts_a%'").fetchone()[0] == 3
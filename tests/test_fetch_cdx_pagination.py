@@ -1,5 +1,6 @@
 import json
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -19,8 +20,33 @@ class FakeResp:
 
     @property
     def text(self):
+        if isinstance(self._data, int):
+            return str(self._data)
         return json.dumps(self._data)
 
+    def iter_lines(self):
+        # Mimic the CDX server which writes one JSON row per line.
+        lines = [json.dumps(r) for r in self._data]
+        for i, line in enumerate(lines):
+            prefix = "[" if i == 0 else ""
+            suffix = "]" if i == len(lines) - 1 else ","
+            yield (prefix + line + suffix).encode()
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, get):
+        self.get = get
+
+    def close(self):
+        pass
+
+
+def use_fake_get(monkeypatch, fake_get):
+    monkeypatch.setattr(app.cdx_utils, "create_session", lambda *a, **k: FakeSession(fake_get))
+
 
 def setup_tmp(monkeypatch, tmp_path):
     monkeypatch.setattr(app.app, "root_path", str(tmp_path))
@@ -29,10 +55,26 @@ def setup_tmp(monkeypatch, tmp_path):
     schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
     (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
     monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setitem(app.app.config, "CDX_RATE_LIMIT", 0)
     with app.app.app_context():
         app.create_new_db("test")
 
 
+def test_cdx_requests_are_rate_limited_by_default():
+    from config import Config
+
+    assert Config.CDX_RATE_LIMIT > 0
+    app.cdx_utils.set_rate_limit(20)
+    try:
+        start = time.monotonic()
+        for _ in range(3):
+            app.cdx_utils._throttle(app.cdx_utils.CDX_API)
+        assert time.monotonic() - start >= 0.09
+    finally:
+        app.cdx_utils.set_rate_limit(0)
+    assert app.cdx_utils.CDX_HOST not in app.cdx_utils._LIMITERS
+
+
 def test_fetch_cdx_pagination(monkeypatch, tmp_path):
     setup_tmp(monkeypatch, tmp_path)
     page1 = [["original", "timestamp", "statuscode", "mimetype"],
@@ -43,13 +85,15 @@ def test_fetch_cdx_pagination(monkeypatch, tmp_path):
 
     calls = []
 
-    def fake_get(url, timeout=20):
+    def fake_get(url, timeout=20, **kwargs):
+        if "showNumPages" in url:
+            return FakeResp(1)
         calls.append(url)
         if "resumeKey=key123" in url:
             return FakeResp(page2)
         return FakeResp(page1)
 
-    monkeypatch.setattr(app.requests, "get", fake_get)
+    use_fake_get(monkeypatch, fake_get)
 
     with app.app.test_client() as client:
         resp = client.post("/fetch_cdx", data={"domain": "example.com"})
@@ -73,13 +117,15 @@ def test_fetch_cdx_skips_empty_rows(monkeypatch, tmp_path):
 
     calls = []
 
-    def fake_get(url, timeout=20):
+    def fake_get(url, timeout=20, **kwargs):
+        if "showNumPages" in url:
+            return FakeResp(1)
         calls.append(url)
         if "resumeKey=key123" in url:
             return FakeResp(page2)
         return FakeResp(page1)
 
-    monkeypatch.setattr(app.requests, "get", fake_get)
+    use_fake_get(monkeypatch, fake_get)
 
     with app.app.test_client() as client:
         resp = client.post("/fetch_cdx", data={"domain": "example.com"})
@@ -91,3 +137,209 @@ def test_fetch_cdx_skips_empty_rows(monkeypatch, tmp_path):
 
     assert urls == ["http://a.example.com/", "http://b.example.com/"]
     assert len(calls) == 2
+
+
+def test_fetch_cdx_parallel_pages(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "CDX_CONCURRENCY", 3)
+    header = ["original", "timestamp", "statuscode", "mimetype"]
+    pages = {
+        n: [header, [f"http://p{n}.example.com/", "202101", "200", "text/html"]]
+        for n in range(5)
+    }
+
+    calls = []
+
+    def fake_get(url, timeout=20, **kwargs):
+        calls.append(url)
+        if "showNumPages" in url:
+            return FakeResp(5)
+        assert "resumeKey" not in url
+        page = int(url.split("page=")[1].split("&")[0])
+        return FakeResp(pages[page])
+
+    use_fake_get(monkeypatch, fake_get)
+
+    with app.app.test_client() as client:
+        resp = client.post("/fetch_cdx", data={"domain": "example.com", "ajax": "1"})
+        assert resp.get_json()["inserted"] == 5
+
+    with app.app.app_context():
+        rows = app.query_db("SELECT url FROM urls")
+        urls = sorted(r["url"] for r in rows)
+
+    assert urls == [f"http://p{n}.example.com/" for n in range(5)]
+    assert len(calls) == 6
+
+
+def test_cdx_job_resumes_from_checkpoint(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "CDX_CONCURRENCY", 1)
+    page2 = [["original", "timestamp", "statuscode", "mimetype"],
+             ["http://b.example.com/", "202102", "200", "text/html"]]
+    calls = []
+
+    def fake_get(url, timeout=20, **kwargs):
+        calls.append(url)
+        assert "resumeKey=key123" in url
+        return FakeResp(page2)
+
+    use_fake_get(monkeypatch, fake_get)
+
+    with app.app.app_context():
+        db = app.get_db()
+        job_id = app.jobs_mod.create_job(db, "cdx", "example.com")
+        # Simulate a process that died after storing the first page.
+        app.jobs_mod.update_job(db, job_id, status="running", progress=1,
+                                resume_key="key123", inserted=1)
+        assert app.resume_jobs() == [job_id]
+
+    for _ in range(100):
+        with app.app.app_context():
+            job = app.jobs_mod.get_job(app.get_db(), job_id)
+        if job["status"] == "done":
+            break
+        time.sleep(0.05)
+
+    assert job["status"] == "done"
+    assert job["inserted"] == 2
+    assert job["progress"] == 2
+    assert len(calls) == 1
+
+    with app.app.test_client() as client:
+        jobs = client.get("/cdx_jobs").get_json()
+    assert jobs[0]["id"] == job_id
+    assert "rows_per_second" in jobs[0]
+
+
+def test_parallel_resume_does_not_recount_pages(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    header = ["original", "timestamp", "statuscode", "mimetype"]
+
+    def fake_get(url, timeout=20, **kwargs):
+        page = int(url.split("page=")[1].split("&")[0])
+        return FakeResp([header, [f"http://p{page}.example.com/", "202101", "200", "text/html"]])
+
+    # Pages 0 and 2 of 4 were stored before the process died; only page 0
+    # is below the contiguous ``next_page`` mark, so page 2 is fetched again.
+    checkpoint = app.cdx_utils.CdxCheckpoint(page_count=4, next_page=1, pages_done=2)
+    seen = []
+    app.cdx_utils.fetch_domain(
+        "example.com",
+        lambda rows: len(rows),
+        concurrency=2,
+        checkpoint=checkpoint,
+        session=FakeSession(fake_get),
+        on_page=lambda cp: seen.append(cp.pages_done),
+    )
+    assert max(seen) == checkpoint.pages_done == 4
+    assert checkpoint.next_page == 4
+
+
+def test_stream_parser_json_and_text():
+    parser = app.cdx_utils.CdxStreamParser()
+    lines = [
+        b'[["original","timestamp","statuscode","mimetype"],',
+        b'["http://a.example.com/","2021","200","text/html"],',
+        b'["http://b.example.com/","2022","-","text/css"],',
+        b'[],',
+        b'["key456"]]',
+    ]
+    rows = list(parser.feed(lines))
+    assert rows == [
+        ("http://a.example.com/", "2021", 200, "text/html"),
+        ("http://b.example.com/", "2022", None, "text/css"),
+    ]
+    assert parser.resume_key == "key456"
+
+    parser = app.cdx_utils.CdxStreamParser()
+    lines = ["http://a.example.com/ 2021 200 text/html", "", "key789"]
+    assert list(parser.feed(lines)) == [("http://a.example.com/", "2021", 200, "text/html")]
+    assert parser.resume_key == "key789"
+
+
+def test_fetch_cdx_streams_large_pages_in_batches(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "CDX_CONCURRENCY", 1)
+    monkeypatch.setattr(app.cdx_utils, "CDX_BATCH_SIZE", 7)
+    header = ["original", "timestamp", "statuscode", "mimetype"]
+    page = [header] + [[f"http://a.example.com/{n}", "2021", "200", "text/html"] for n in range(50)]
+
+    use_fake_get(monkeypatch, lambda url, timeout=20, **kwargs: FakeResp(page))
+    batches = []
+    real_insert = app.insert_urls
+
+    def spy_insert(rows, *args, **kwargs):
+        rows = list(rows)
+        batches.append(len(rows))
+        return real_insert(rows, *args, **kwargs)
+
+    monkeypatch.setattr(app, "insert_urls", spy_insert)
+
+    with app.app.test_client() as client:
+        resp = client.post("/fetch_cdx", data={"domain": "example.com", "ajax": "1"})
+        assert resp.get_json()["inserted"] == 50
+
+    assert max(batches) == 7
+    assert sum(batches) == 50
+
+
+def test_fetch_cdx_refresh_uses_watermark(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "CDX_CONCURRENCY", 1)
+    header = ["original", "timestamp", "statuscode", "mimetype"]
+    first = [header,
+             ["http://a.example.com/", "20210101000000", "200", "text/html"],
+             ["http://b.example.com/", "20230505000000", "200", "text/html"]]
+    second = [header, ["http://c.example.com/", "20240101000000", "200", "text/html"]]
+    calls = []
+
+    def fake_get(url, timeout=20, **kwargs):
+        calls.append(url)
+        return FakeResp(second if "from=" in url else first)
+
+    use_fake_get(monkeypatch, fake_get)
+
+    with app.app.test_client() as client:
+        client.post("/fetch_cdx", data={"domain": "example.com"})
+        assert "from=" not in calls[-1]
+        marks = client.get("/cdx_watermarks").get_json()
+        assert marks[0]["last_timestamp"] == "20230505000000"
+
+        resp = client.post("/fetch_cdx", data={"domain": "example.com", "refresh": "1", "ajax": "1"})
+        assert resp.get_json()["inserted"] == 1
+        assert "from=20230505000000" in calls[-1]
+        marks = client.get("/cdx_watermarks").get_json()
+        assert marks[0]["last_timestamp"] == "20240101000000"
+
+
+def test_cdx_crawl_marks_subdomains_indexed(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "CDX_CONCURRENCY", 1)
+    header = ["original", "timestamp", "statuscode", "mimetype"]
+
+    def fake_get(url, timeout=20, **kwargs):
+        sub = "a.example.com" if "a.example.com" in url else "b.example.com"
+        return FakeResp([header, [f"http://{sub}/", "20210101000000", "200", "text/html"]])
+
+    use_fake_get(monkeypatch, fake_get)
+
+    with app.app.app_context():
+        for sub in ("a.example.com", "b.example.com"):
+            app.execute_db(
+                "INSERT INTO domains (root_domain, subdomain, source) VALUES (?, ?, 'crtsh')",
+                ["example.com", sub],
+            )
+        crawl_id = app.jobs_mod.create_job(app.get_db(), "cdx_crawl", "example.com")
+    app._background_cdx_crawl(crawl_id)
+
+    with app.app.test_client() as client:
+        crawl = client.get(f"/cdx_jobs/{crawl_id}").get_json()
+        assert crawl["status"] == "done"
+        assert crawl["progress"] == 2
+        assert crawl["inserted"] == 2
+        jobs = client.get("/cdx_jobs").get_json()
+        assert sorted(j["domain"] for j in jobs) == ["a.example.com", "b.example.com"]
+    with app.app.app_context():
+        flags = app.query_db("SELECT cdx_indexed FROM domains")
+        assert all(r["cdx_indexed"] == 1 for r in flags)
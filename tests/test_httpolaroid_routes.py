@@ -15,6 +15,7 @@ def setup_tmp(monkeypatch, tmp_path):
     schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
     (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
     monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app, "SITEZIP_DIR", str(tmp_path / "static" / "sitezips"))
     with app.app.app_context():
         app.create_new_db("test")
 
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+import database
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def test_insert_urls_counts_only_new_rows(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        rows = [
+            ("http://a.example.com/", "a.example.com", "2021", 200, "text/html", ""),
+            ("http://b.example.com/", "b.example.com", "2021", 404, "text/html", ""),
+            ("http://a.example.com/", "a.example.com", "2022", 200, "text/html", ""),
+        ]
+        assert database.insert_urls(rows) == 2
+        assert database.insert_urls(rows) == 0
+        assert database.insert_urls(iter([])) == 0
+        count = app.query_db("SELECT COUNT(*) AS cnt FROM urls", one=True)["cnt"]
+    assert count == 2
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import response_cache, subdomain_utils
+
+
+def test_request_key_normalizes_and_ignores_secrets():
+    key = response_cache.request_key
+    assert key("GET", "https://Example.com:443/a?b=2&a=1#frag") == key("get", "https://example.com/a?a=1&b=2")
+    assert key("GET", "https://example.com/a?a=1") != key("GET", "https://example.com/a?a=2")
+    assert key("GET", "https://x.test/", {"x-apikey": "one"}) == key("GET", "https://x.test/", {"X-ApiKey": "two"})
+    assert key("GET", "https://x.test/", {"accept": "a"}) != key("GET", "https://x.test/")
+
+
+def test_cache_ttl_and_lru_eviction(tmp_path):
+    cache = response_cache.ResponseCache(str(tmp_path), max_bytes=2500, ttls={"crtsh": 60}, compress=False)
+    cache.put("crtsh", "aa" * 32, b"x" * 1000)
+    cache.put("crtsh", "bb" * 32, b"y" * 1000)
+    assert cache.get("crtsh", "aa" * 32) == b"x" * 1000
+    # Make "bb" the least recently used entry, then push past the cap.
+    path_b = tmp_path / "crtsh" / "bb" / ("bb" * 32)
+    os.utime(path_b, (time.time() - 100, path_b.stat().st_mtime))
+    cache.put("crtsh", "cc" * 32, b"z" * 1000)
+    assert cache.get("crtsh", "bb" * 32) is None
+    assert cache.get("crtsh", "aa" * 32) is not None
+    assert cache.size() <= 2500
+
+    path_a = tmp_path / "crtsh" / "aa" / ("aa" * 32)
+    os.utime(path_a, (time.time(), time.time() - 120))
+    assert cache.get("crtsh", "aa" * 32) is None
+    assert not path_a.exists()
+
+
+def test_tee_lines_only_keeps_complete_responses(tmp_path):
+    cache = response_cache.ResponseCache(str(tmp_path), max_bytes=0, compress=True)
+    lines = cache.tee_lines("cdx", "dd" * 32, iter([b"one", b"two", b"three"]))
+    next(lines)
+    lines.close()
+    assert cache.iter_lines("cdx", "dd" * 32) is None
+
+    assert list(cache.tee_lines("cdx", "dd" * 32, iter([b"one", b"two"]))) == [b"one", b"two"]
+    assert list(cache.iter_lines("cdx", "dd" * 32)) == [b"one", b"two"]
+
+
+def test_crtsh_reads_through_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    calls = []
+
+    class Resp:
+        content = b'[{"common_name": "a.example.com", "name_value": "b.example.com"}]'
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return json.loads(self.content)
+
+    def fake_get(url, headers=None, timeout=15):
+        calls.append(url)
+        return Resp()
+
+    monkeypatch.setattr(subdomain_utils.requests, "get", fake_get)
+    app.configure_response_cache()
+    try:
+        assert subdomain_utils.fetch_from_crtsh("example.com") == ["a.example.com", "b.example.com"]
+        assert subdomain_utils.fetch_from_crtsh("example.com") == ["a.example.com", "b.example.com"]
+    finally:
+        response_cache.configure(None)
+    assert len(calls) == 1
+    assert list((tmp_path / "data" / "cache" / "crtsh").rglob("*.gz"))
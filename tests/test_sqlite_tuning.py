@@ -0,0 +1,107 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import sqlite_tuning
+from retrorecon.mcp.config import MCPConfig
+from retrorecon.mcp.server import RetroReconMCPServer
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setitem(app.app.config, "SQLITE_TUNING", dict(sqlite_tuning.DEFAULT_PROFILE))
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def test_profile_from_env():
+    env = {
+        'RETRORECON_SQLITE_SYNCHRONOUS': 'FULL',
+        'RETRORECON_SQLITE_CACHE_MB': '16',
+        'RETRORECON_SQLITE_MMAP_MB': '0',
+        'RETRORECON_SQLITE_JOURNAL_MODE': 'bogus',
+    }
+    profile = sqlite_tuning.profile_from_env(env)
+    assert profile['synchronous'] == 'full'
+    assert profile['cache_size'] == -16384
+    assert profile['mmap_size'] == 0
+    assert profile['journal_mode'] == 'wal'
+    assert sqlite_tuning.profile_from_env({'RETRORECON_SQLITE_TUNING': '0'}) == {}
+
+
+def test_request_and_importer_connections_are_tuned(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        settings = sqlite_tuning.effective_settings(app.get_db())
+    assert settings == {
+        'busy_timeout': 5000, 'journal_mode': 'wal', 'synchronous': 'normal',
+        'cache_size': -65536, 'mmap_size': 268435456, 'temp_store': 'memory',
+    }
+    seen = []
+    real_connect = sqlite_tuning.connect
+    monkeypatch.setattr(sqlite_tuning, "connect", lambda *a, **k: seen.append(a[1]) or real_connect(*a, **k))
+    upload = tmp_path / "urls.json"
+    upload.write_text('[{"url": "https://example.com/a", "tags": ""}]')
+    app._background_import(str(upload), "urls.json")
+    assert seen == [app.app.config['SQLITE_TUNING']]
+    assert app.get_import_progress()['status'] == 'done'
+
+
+def test_mcp_server_connection_uses_profile(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    config = MCPConfig(sqlite_tuning={'busy_timeout': 1234, 'temp_store': 'memory'})
+    server = RetroReconMCPServer(db_path=app.app.config['DATABASE'], config=config)
+    conn = server.get_connection()
+    try:
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def test_self_check_reports_mismatches(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        report = client.get('/api/sqlite_settings').get_json()
+    assert report['mismatches'] == []
+    assert report['effective']['journal_mode'] == 'wal'
+    profile = {'journal_mode': 'wal', 'synchronous': 'off'}
+    conn = sqlite_tuning.connect(':memory:', profile)
+    report = sqlite_tuning.self_check(conn, profile)
+    assert report['mismatches'] == ['journal_mode: requested wal, effective memory']
+
+
+def test_rename_and_save_keep_committed_rows(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    app.app.config['SQLITE_TUNING']['busy_timeout'] = 50
+    # A reader holding an older snapshot keeps the new row in the WAL.
+    holder = sqlite3.connect(app.app.config['DATABASE'], isolation_level=None)
+    holder.execute("BEGIN")
+    holder.execute("SELECT COUNT(*) FROM urls").fetchall()
+    with app.app.app_context():
+        app.insert_urls([("https://example.com/a", "example.com", None, 200, None, "")])
+    try:
+        with app.app.test_client() as client:
+            client.post('/rename_db', data={'new_name': 'renamed'})
+            assert app.app.config['DATABASE'].endswith('test.db')
+            saved = client.get('/save_db').get_data()
+    finally:
+        holder.close()
+    copy = tmp_path / "copy.db"
+    copy.write_bytes(saved)
+    with sqlite3.connect(copy) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0] == 1
+    with app.app.test_client() as client:
+        client.post('/rename_db', data={'new_name': 'renamed'})
+    assert app.app.config['DATABASE'].endswith('renamed.db')
+    assert not (tmp_path / "db" / "test.db-wal").exists()
+    with sqlite3.connect(app.app.config['DATABASE']) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0] == 1
@@ -0,0 +1,172 @@
+import gzip
+import io
+import json
+import zipfile
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import import_utils, json_stream
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def test_iter_array_across_chunk_boundaries():
+    items = [{"url": f"http://example.com/{n}", "n": n * 1000} for n in range(50)] + ["s", 12345, True, None]
+    raw = json.dumps(items, indent=2).encode()
+    assert list(json_stream.iter_array(io.BytesIO(raw), chunk_size=7)) == items
+    assert list(json_stream.iter_array(io.BytesIO(b"\xef\xbb\xbf [ ]"))) == []
+    with pytest.raises(ValueError):
+        list(json_stream.iter_array(io.BytesIO(b"[1, 2")))
+
+
+def test_numbers_split_across_chunks_decode_whole():
+    assert list(json_stream.iter_array(io.BytesIO(b"[1.5, 2]"), chunk_size=3)) == [1.5, 2]
+    items = [{"time": n + 0.125, "size": -n * 1e-3, "big": 12345e10} for n in range(40)]
+    raw = json.dumps(items).encode()
+    for chunk_size in range(1, 24):
+        assert list(json_stream.iter_array(io.BytesIO(raw), chunk_size=chunk_size)) == items, chunk_size
+
+
+def test_iter_records_handles_array_and_ndjson():
+    array = io.BytesIO(json.dumps(["http://a.example.com/", {"url": "http://b.example.com/", "tags": None}, 5]).encode())
+    assert [r["url"] for r in import_utils.iter_records(array)] == ["http://a.example.com/", "http://b.example.com/"]
+    ndjson = io.BytesIO(b'{"url": "http://c.example.com/", "status_code": 200}\nnot json\n\n{"url": ""}\n')
+    records = list(import_utils.iter_records(ndjson))
+    assert len(records) == 1
+    assert import_utils.record_row(records[0]) == ("http://c.example.com/", None, 200, None, "")
+
+
+def run_imports_inline(monkeypatch):
+    started = []
+
+    class InlineThread:
+        def __init__(self, target, args):
+            self.target, self.args = target, args
+
+        def start(self):
+            started.append(self.args[0])
+            self.target(*self.args)
+
+    monkeypatch.setattr(app.threading, "Thread", InlineThread)
+    return started
+
+
+def test_import_file_streams_ndjson_upload(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setattr(import_utils, "IMPORT_BATCH_SIZE", 3)
+    started = run_imports_inline(monkeypatch)
+    lines = "\n".join(json.dumps({"url": f"http://example.com/{n}"}) for n in range(10))
+    with app.app.test_client() as client:
+        client.post("/import_file", data={"import_file": (io.BytesIO(lines.encode()), "urls.json")},
+                    content_type="multipart/form-data")
+    progress = app.get_import_progress()
+    assert progress["status"] == "done"
+    assert progress["message"].startswith("Imported 10 of 10 records.")
+    assert not Path(started[0]).exists()
+    with app.app.app_context():
+        assert app.query_db("SELECT COUNT(*) AS cnt FROM urls", one=True)["cnt"] == 10
+
+
+def test_har_stream_skips_bodies():
+    from retrorecon import har_utils
+
+    entry = {
+        "startedDateTime": "2024-01-01T00:00:00Z",
+        "request": {"url": "http://example.com/a", "method": "POST", "postData": {"text": "secret" * 100}},
+        "response": {"status": 200, "content": {"mimeType": "text/html", "size": 5, "text": "<b>\\\"]}</b>" * 100}},
+    }
+    har = json.dumps({"log": {"version": "1.2", "pages": [{"id": "p"}], "entries": [entry, {"bad": 1}]}}).encode()
+    entries = list(har_utils.iter_har_entries(io.BytesIO(har)))
+    assert "text" not in entries[0]["response"]["content"]
+    assert "text" not in entries[0]["request"]["postData"]
+    assert entries[0]["response"]["content"]["size"] == 5
+    full = list(har_utils.iter_har_entries(io.BytesIO(har), include_bodies=True))
+    assert full[0] == entry
+    records = list(har_utils.iter_har_records(io.BytesIO(har)))
+    assert [r["url"] for r in records] == ["http://example.com/a"]
+    assert records[0]["request_method"] == "POST"
+    with pytest.raises(ValueError):
+        list(har_utils.iter_har_entries(io.BytesIO(b'{"log": {}}')))
+
+
+def test_import_file_decompresses_uploads(monkeypatch, tmp_path):
+    import zstandard
+
+    setup_tmp(monkeypatch, tmp_path)
+    started = run_imports_inline(monkeypatch)
+    ndjson = "\n".join(json.dumps({"url": f"http://gz.example.com/{n}"}) for n in range(4)).encode()
+    array = json.dumps([f"http://zip.example.com/{n}" for n in range(3)]).encode()
+    har = json.dumps({"log": {"entries": [{"request": {"url": "http://zst.example.com/"}, "response": {}}]}}).encode()
+    zipped = io.BytesIO()
+    with zipfile.ZipFile(zipped, "w") as zf:
+        zf.writestr("README.txt", "ignored")
+        zf.writestr("export/urls.json", array)
+    uploads = [
+        (gzip.compress(ndjson), "urls.ndjson.gz"),
+        (zipped.getvalue(), "urls.zip"),
+        (zstandard.ZstdCompressor().compress(har), "capture.har.zst"),
+        (gzip.compress(b'{"url": "http://gzip.example.com/"}'), "more.ndjson.gzip"),
+        (zstandard.ZstdCompressor().compress(b'{"url": "http://zstd.example.com/"}'), "more.jsonl.zstd"),
+    ]
+    with app.app.test_client() as client:
+        for body, name in uploads:
+            client.post("/import_file", data={"import_file": (io.BytesIO(body), name)},
+                        content_type="multipart/form-data")
+            assert app.get_import_progress()["status"] == "done", name
+        resp = client.post("/import_file", data={"import_file": (io.BytesIO(gzip.compress(b"x")), "notes.txt.gz")},
+                           content_type="multipart/form-data")
+        assert resp.status_code == 302
+    assert len(started) == 5
+    assert not any(Path(p).exists() for p in started)
+    with app.app.app_context():
+        rows = app.query_db("SELECT url, source_type FROM urls ORDER BY url")
+    urls = [r["url"] for r in rows]
+    assert len(urls) == 10
+    assert "http://zst.example.com/" in urls
+    assert "http://zstd.example.com/" in urls
+
+
+def test_parallel_ndjson_import_keeps_order(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    monkeypatch.setitem(app.app.config, "IMPORT_WORKERS", 2)
+    monkeypatch.setitem(app.app.config, "IMPORT_PARALLEL_MIN_MB", 0)
+    monkeypatch.setattr(import_utils, "PARALLEL_CHUNK_SIZE", 256)
+    lines = [json.dumps({"url": f"http://example.com/{n:04d}", "status_code": 200}) for n in range(200)]
+    lines.insert(50, "garbage")
+    plain = tmp_path / "urls.ndjson"
+    plain.write_text("\n".join(lines))
+    app._background_import(str(plain), "urls.ndjson")
+    assert app.get_import_progress()["message"].startswith("Imported 200 of 200 records.")
+
+    packed = tmp_path / "more.ndjson.gz"
+    packed.write_bytes(gzip.compress("\n".join(
+        json.dumps({"url": f"http://gz.example.com/{n}"}) for n in range(50)).encode()))
+    app._background_import(str(packed), "more.ndjson.gz")
+    assert app.get_import_progress()["message"].startswith("Imported 50 of 50 records.")
+    with app.app.app_context():
+        rows = app.query_db("SELECT url FROM urls WHERE url LIKE 'http://example.com/%' ORDER BY id")
+    assert [r["url"] for r in rows] == sorted(r["url"] for r in rows)
+
+
+def test_ndjson_ranges_split_on_line_boundaries(tmp_path):
+    path = tmp_path / "lines.ndjson"
+    path.write_bytes(b"".join(b'{"url": "http://example.com/%d"}\n' % n for n in range(30)))
+    with open(path, "rb") as fh:
+        ranges = list(import_utils.ndjson_ranges(fh, chunk_size=100))
+    assert ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+    rows = [row for start, end in ranges for row in import_utils.decode_ndjson_range(str(path), start, end)]
+    assert [r[0] for r in rows] == [f"http://example.com/{n}" for n in range(30)]
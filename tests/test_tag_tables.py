@@ -0,0 +1,114 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+import database
+from retrorecon import search_utils, subdomain_utils
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+    return app.app.config["DATABASE"]
+
+
+def url_tags(conn):
+    return sorted(tuple(r) for r in conn.execute("SELECT url_id, tag FROM url_tags"))
+
+
+def test_triggers_keep_url_tags_in_sync(tmp_path, monkeypatch):
+    conn = sqlite3.connect(setup_tmp(monkeypatch, tmp_path))
+    conn.execute("INSERT INTO urls (id, url, tags) VALUES (1, 'http://a/', ' foo, Bar ,foo,,')")
+    conn.execute("INSERT INTO urls (id, url, tags) VALUES (2, 'http://b/', 'say \"hi\",back\\slash')")
+    conn.execute("INSERT INTO urls (id, url) VALUES (3, 'http://c/')")
+    assert url_tags(conn) == [(1, 'Bar'), (1, 'foo'), (2, 'back\\slash'), (2, 'say "hi"')]
+    conn.execute("UPDATE urls SET tags = 'baz' WHERE id = 1")
+    conn.execute("DELETE FROM urls WHERE id = 2")
+    assert url_tags(conn) == [(1, 'baz')]
+    conn.close()
+
+
+def test_bulk_ingest_splits_tags_once_at_the_end(tmp_path, monkeypatch):
+    conn = sqlite3.connect(setup_tmp(monkeypatch, tmp_path))
+    with conn:
+        conn.execute("INSERT INTO urls (id, url, tags) VALUES (1, 'http://a/', 'old')")
+    with app.bulk_ingest(conn):
+        app.insert_urls([("http://b/?x=1&y=2", "b", None, None, None, "new,more")], db=conn)
+        with conn:
+            conn.execute("UPDATE urls SET tags = 'changed' WHERE id = 1")
+        assert url_tags(conn) == [(1, 'changed')]
+    assert url_tags(conn) == [(1, 'changed'), (2, 'more'), (2, 'new')]
+    assert sorted(r[0] for r in conn.execute("SELECT key FROM url_params WHERE url_id = 2")) == ['x', 'y']
+    with conn:
+        conn.execute("UPDATE urls SET tags = 'final' WHERE id = 2")
+    assert url_tags(conn) == [(1, 'changed'), (2, 'final')]
+    conn.close()
+
+
+def test_unfinished_bulk_ingest_is_repaired(tmp_path, monkeypatch):
+    path = setup_tmp(monkeypatch, tmp_path)
+    conn = sqlite3.connect(path)
+    database._defer_upkeep(conn)
+    with conn:
+        conn.execute("INSERT INTO urls (id, url, tags) VALUES (1, 'http://a/', 'lost')")
+    with app.app.app_context():
+        app.ensure_schema()
+    assert url_tags(conn) == [(1, 'lost')]
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'url_tags_a%'").fetchone()[0] == 3
+    conn.close()
+
+
+def test_existing_tags_are_migrated(tmp_path, monkeypatch):
+    path = setup_tmp(monkeypatch, tmp_path)
+    conn = sqlite3.connect(path)
+    for name in ('url_tags_ai', 'url_tags_ad', 'url_tags_au'):
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DELETE FROM url_tags")
+    conn.execute("INSERT INTO urls (id, url, tags) VALUES (1, 'http://a/', 'x,y')")
+    conn.commit()
+    conn.close()
+    with app.app.app_context():
+        app.ensure_schema()
+    conn = sqlite3.connect(path)
+    assert url_tags(conn) == [(1, 'x'), (1, 'y')]
+    conn.execute("INSERT INTO urls (id, url, tags) VALUES (2, 'http://b/', 'z')")
+    assert (2, 'z') in url_tags(conn)
+    conn.close()
+
+
+def test_tag_search_uses_tag_table(tmp_path, monkeypatch):
+    conn = sqlite3.connect(setup_tmp(monkeypatch, tmp_path))
+    conn.executemany(
+        "INSERT INTO urls (url, tags) VALUES (?, ?)",
+        [('http://a/', 'foo,bar'), ('http://b/', 'foo'), ('http://c/', 'BAR')],
+    )
+    sql, params = search_utils.build_search_sql('#foo AND #bar')
+    assert 'url_tags' in sql
+    rows = conn.execute(f"SELECT url FROM urls WHERE {sql}", params).fetchall()
+    assert [r[0] for r in rows] == ['http://a/']
+    sql, params = search_utils.build_search_sql('#bar AND NOT #foo')
+    rows = conn.execute(f"SELECT url FROM urls WHERE {sql}", params).fetchall()
+    assert [r[0] for r in rows] == ['http://c/']
+    conn.close()
+
+
+def test_domain_tag_search(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        database.execute_db(
+            "INSERT INTO domains (root_domain, subdomain, source, tags) VALUES "
+            "('example.com', 'a.example.com', 'crtsh', 'prod,api'),"
+            "('example.com', 'b.example.com', 'crtsh', 'prod')"
+        )
+        rows = subdomain_utils.search_subdomains('#prod AND NOT #api', 'example.com')
+        assert [r['subdomain'] for r in rows] == ['b.example.com']
+        subdomain_utils.clear_tags('example.com', 'a.example.com')
+        assert app.query_db("SELECT COUNT(*) AS c FROM domain_tags", one=True)['c'] == 1
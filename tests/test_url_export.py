@@ -0,0 +1,73 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import url_export
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.insert_urls([
+            (f"https://example.com/{n}", "example.com", f"2020010100000{n}", 200, "text/html", "a,b")
+            for n in range(7)
+        ] + [("https://example.com/<x>", "example.com", None, 404, None, "")])
+    monkeypatch.setattr(url_export, "CHUNK_SIZE", 3)
+
+
+def export(client, **args):
+    return client.get('/export_urls', query_string={'select_all_matching': 'true', **args})
+
+
+def test_iter_row_chunks_reads_in_chunks(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        chunks = list(url_export.iter_row_chunks(app.get_db(), "WHERE status_code = ?", [200], 3))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunks[0][0]['url'] == "https://example.com/0"
+
+
+def test_export_formats_stream(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        resp = export(client, format='json')
+        assert resp.is_streamed
+        rows = resp.get_json()
+        assert len(rows) == 8
+        assert rows[0] == {
+            'id': 1, 'url': "https://example.com/0", 'timestamp': "20200101000000",
+            'status_code': 200, 'mime_type': "text/html", 'tags': "a,b",
+        }
+        lines = export(client, format='ndjson').get_data(as_text=True).splitlines()
+        assert [json.loads(line)['url'] for line in lines] == [r['url'] for r in rows]
+        table = list(csv.reader(io.StringIO(export(client, format='csv').get_data(as_text=True))))
+        assert table[0] == ['url', 'timestamp', 'status_code', 'mime_type', 'tags']
+        assert table[1] == ["https://example.com/0", "20200101000000", "200", "text/html", "a,b"]
+        assert len(table) == 9
+        text = export(client, format='txt', q='http:404').get_data(as_text=True)
+        assert text == "https://example.com/<x>"
+        page = export(client, format='html').get_data(as_text=True)
+        assert page.count('<tr><td>') == 8
+        assert "&lt;x&gt;" in page and page.endswith('</html>')
+        assert export(client, format='json', q='http:500').get_json() == []
+
+
+def test_export_gzip(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.test_client() as client:
+        plain = export(client, format='md').get_data()
+        resp = export(client, format='md', gzip='1')
+    assert resp.mimetype == 'application/gzip'
+    assert 'urls.md.gz' in resp.headers['Content-Disposition']
+    assert gzip.decompress(resp.get_data()) == plain
@@ -0,0 +1,84 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import url_filter
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def test_known_url_filter_drops_stored_and_repeated(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        app.execute_db("INSERT INTO urls (url, domain) VALUES ('http://a.example.com/', 'a.example.com')")
+        known = url_filter.KnownUrlFilter.from_db(app.get_db())
+        assert url_filter.KnownUrlFilter.from_db(app.get_db(), max_rows=0) is not None
+    rows = [("http://a.example.com/",), ("http://b.example.com/",), ("http://b.example.com/",)]
+    assert list(known.filter(rows)) == [("http://b.example.com/",)]
+    assert known.skipped == 2
+
+
+def test_known_url_filter_respects_row_cap(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        for n in range(3):
+            app.execute_db("INSERT INTO urls (url, domain) VALUES (?, 'example.com')", [f"http://example.com/{n}"])
+        assert url_filter.KnownUrlFilter.from_db(app.get_db(), max_rows=2) is None
+
+
+def test_json_import_reports_skipped_urls(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        app.execute_db("INSERT INTO urls (url, domain) VALUES ('http://a.example.com/', 'a.example.com')")
+    data = [{"url": "http://a.example.com/"}, {"url": "http://b.example.com/"}]
+    upload = tmp_path / "upload.json"
+    upload.write_text(json.dumps(data))
+    monkeypatch.setitem(app.app.config, "URL_PREFILTER_MIN_ROWS", 0)
+    app._background_import(str(upload))
+    progress = app.get_import_progress()
+    assert progress["status"] == "done"
+    assert "Skipped 1 already stored" in progress["message"]
+    with app.app.app_context():
+        count = app.query_db("SELECT COUNT(*) AS cnt FROM urls", one=True)["cnt"]
+    assert count == 2
+
+
+def test_lazy_filter_loads_stored_urls_after_min_rows(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        for n in range(3):
+            app.execute_db("INSERT INTO urls (url, domain) VALUES (?, 'example.com')", [f"http://example.com/{n}"])
+    known = url_filter.KnownUrlFilter.lazy(app.app.config['DATABASE'], min_rows=2)
+    assert len(known) == 0
+    rows = [(f"http://example.com/{n}",) for n in (0, 7, 8, 2, 8)]
+    assert list(known.filter(rows)) == rows[:3]
+    assert len(known) == 6
+    assert known.skipped == 2
+
+
+def test_shared_filter_counts_every_skip_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    known = url_filter.KnownUrlFilter()
+    urls = [(f"http://example.com/{n}",) for n in range(2000)]
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            kept = sum(pool.map(lambda _: len(list(known.filter(urls))), range(8)))
+    finally:
+        sys.setswitchinterval(old)
+    assert kept == len(urls)
+    assert known.skipped == 7 * len(urls)
@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import pagination
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def seed(rows):
+    with app.app.app_context():
+        db = app.get_db()
+        db.executemany(
+            "INSERT INTO urls (url, domain, status_code, mime_type) VALUES (?, 'example.com', ?, ?)",
+            rows,
+        )
+        db.commit()
+
+
+def walk(client, **params):
+    seen = []
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query['cursor'] = cursor
+        data = client.get('/api/urls', query_string=query).get_json()
+        seen.extend(r['url'] for r in data['urls'])
+        cursor = data['next']
+        if not cursor:
+            return seen
+
+
+def test_api_urls_walks_every_row_once(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    statuses = [200, None, 404, 200, None, 500, 404, 200, 301, None, 200]
+    seed([(f"http://example.com/{i}", s, None if i % 3 else 'text/html') for i, s in enumerate(statuses)])
+    with app.app.test_client() as client:
+        for sort in ('id', 'status_code', 'mime_type', 'url'):
+            for direction in ('asc', 'desc'):
+                with app.app.app_context():
+                    expected = [
+                        r['url'] for r in app.query_db(
+                            f"SELECT url FROM urls ORDER BY {sort} {direction}, id {direction}"
+                        )
+                    ]
+                got = walk(client, sort=sort, dir=direction, limit=3)
+                assert got == expected, (sort, direction)
+
+
+def test_api_urls_prev_cursor_returns_previous_page(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    seed([(f"http://example.com/{i}", 200 if i % 2 else None, None) for i in range(9)])
+    with app.app.test_client() as client:
+        first = client.get('/api/urls', query_string={'sort': 'status_code', 'limit': 4}).get_json()
+        assert first['prev'] is None
+        second = client.get(
+            '/api/urls', query_string={'sort': 'status_code', 'limit': 4, 'cursor': first['next']}
+        ).get_json()
+        back = client.get(
+            '/api/urls', query_string={'sort': 'status_code', 'limit': 4, 'before': second['prev']}
+        ).get_json()
+        assert back['urls'] == first['urls']
+        assert back['prev'] is None
+
+
+def test_api_urls_filters_and_rejects_bad_cursor(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    seed([("http://example.com/a", 200, None), ("http://other.com/b", 200, None)])
+    with app.app.test_client() as client:
+        data = client.get('/api/urls', query_string={'q': 'other'}).get_json()
+        assert [r['url'] for r in data['urls']] == ["http://other.com/b"]
+        assert data['next'] is None
+        bad = client.get('/api/urls', query_string={'cursor': 'not-a-cursor'})
+        assert bad.status_code == 400
+        mismatched = pagination.encode_cursor('url', 'x', 1)
+        resp = client.get('/api/urls', query_string={'sort': 'id', 'cursor': mismatched})
+        assert resp.status_code == 400
+
+
+def test_index_seeks_with_cursor(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    seed([(f"http://example.com/{i}", 200, None) for i in range(25)])
+    rendered = {}
+    import retrorecon.routes.dynamic as dyn
+    monkeypatch.setattr(dyn, "dynamic_template", lambda tpl, **ctx: rendered.update(ctx) or "")
+    with app.app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['items_per_page'] = 10
+        client.get('/', query_string={'q': ''})
+        first = [r['url'] for r in rendered['urls']]
+        client.get('/', query_string={'q': '', 'page': 2, 'after': rendered['next_cursor']})
+        second = [r['url'] for r in rendered['urls']]
+        with app.app.app_context():
+            expected = [r['url'] for r in app.query_db("SELECT url FROM urls ORDER BY id DESC")]
+        assert first == expected[:10]
+        assert second == expected[10:20]
+        assert rendered['page'] == 2
+        client.get('/', query_string={'q': '', 'page': 1, 'before': rendered['prev_cursor']})
+        assert [r['url'] for r in rendered['urls']] == first
+
+
+def test_every_sort_column_seeks_through_an_index(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        db = app.get_db()
+        for sort, col in pagination.SORT_COLUMNS.items():
+            clause, params, order_by = pagination._segment_query(col, 'value', False, ('x', 1))
+            plan = db.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM urls WHERE {clause} ORDER BY {order_by} LIMIT 10", params
+            ).fetchall()
+            assert not any('TEMP B-TREE' in row[-1] for row in plan), sort
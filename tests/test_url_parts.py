@@ -0,0 +1,92 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import jobs as jobs_mod
+from retrorecon.search_utils import build_search_sql
+from retrorecon.url_parts import parse_url
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+
+
+def search(expr):
+    sql, params = build_search_sql(expr)
+    rows = app.query_db(f"SELECT url FROM urls WHERE {sql} ORDER BY id", params)
+    return [r['url'] for r in rows]
+
+
+def test_parse_url():
+    assert parse_url("HTTPS://Api.Example.com:8443/v1/app.JS?Redirect=1&b=&redirect=2#x") == (
+        'https', 'api.example.com', 8443, '/v1/app.JS', 'js', 'b,redirect'
+    )
+    assert parse_url("http://example.com") == ('http', 'example.com', None, '/', None, None)
+    assert parse_url("http://example.com/.env") == ('http', 'example.com', None, '/.env', None, None)
+    assert parse_url("http://[::1") == ('', None, None, None, None, None)
+
+
+def test_ingest_fills_parsed_columns_and_search(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        app.create_new_db("test")
+        app.insert_urls([
+            ("https://example.com/static/app.js", "example.com", None, 200, None, ""),
+            ("https://example.com/api/login?redirect=/home", "example.com", None, 302, None, ""),
+            ("https://cdn.example.com/api/v2/?id=1", "cdn.example.com", None, 200, None, ""),
+        ])
+        assert search("ext:js") == ["https://example.com/static/app.js"]
+        assert search("ext:.JS") == ["https://example.com/static/app.js"]
+        assert search("param:redirect") == ["https://example.com/api/login?redirect=/home"]
+        assert search("path:/api/") == [
+            "https://example.com/api/login?redirect=/home", "https://cdn.example.com/api/v2/?id=1"
+        ]
+        assert search("path:api/ AND host:cdn.example.com") == ["https://cdn.example.com/api/v2/?id=1"]
+        app.execute_db("DELETE FROM urls WHERE url LIKE '%redirect%'")
+        assert [r['key'] for r in app.query_db("SELECT key FROM url_params")] == ['id']
+
+
+def test_backfill_job_parses_existing_rows(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    conn = sqlite3.connect(app.app.config["DATABASE"])
+    conn.execute(
+        "CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE NOT NULL, domain TEXT,"
+        " timestamp TEXT, status_code INTEGER, mime_type TEXT, tags TEXT DEFAULT '')"
+    )
+    conn.executemany(
+        "INSERT INTO urls (url) VALUES (?)",
+        [(f"http://example.com/page{n}.php?q={n}",) for n in range(12)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr("retrorecon.url_parts.BACKFILL_BATCH_SIZE", 5)
+    with app.app.app_context():
+        app.ensure_schema()
+        job_ids = jobs_mod.unfinished_job_ids(app.get_db(), 'url_parse')
+    assert len(job_ids) == 1
+    app._background_url_parse(job_ids[0])
+    with app.app.app_context():
+        job = jobs_mod.get_job(app.get_db(), job_ids[0])
+        assert job['status'] == 'done'
+        assert job['progress'] == 12
+        assert len(search("ext:php AND param:q")) == 12
+        assert app.query_db("SELECT COUNT(*) AS c FROM urls WHERE scheme IS NULL", one=True)['c'] == 0
+
+
+def test_url_parse_route_reuses_unfinished_job(tmp_path, monkeypatch):
+    setup_tmp(monkeypatch, tmp_path)
+    with app.app.app_context():
+        app.create_new_db("test")
+    monkeypatch.setattr(app, "start_url_parse_job", lambda job_id: True)
+    with app.app.test_client() as client:
+        first = client.post('/url_parse').get_json()
+        second = client.post('/url_parse').get_json()
+    assert first['started'] is True
+    assert first['job_id'] == second['job_id']
@@ -0,0 +1,94 @@
+import gzip
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import app
+from retrorecon import warc_utils
+
+
+def setup_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.app, "root_path", str(tmp_path))
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "db").mkdir(exist_ok=True)
+    schema = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+    (tmp_path / "db" / "schema.sql").write_text(schema.read_text())
+    monkeypatch.setitem(app.app.config, "DATABASE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app, "IMPORT_PROGRESS_FILE", str(tmp_path / "progress.json"))
+    with app.app.app_context():
+        app.create_new_db("test")
+
+
+def warc_record(headers, block=b""):
+    head = "WARC/1.0\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    head += f"Content-Length: {len(block)}\r\n\r\n"
+    return head.encode() + block + b"\r\n\r\n"
+
+
+def sample_warc():
+    http = b"HTTP/1.1 404 Not Found\r\nContent-Type: text/html; charset=utf-8\r\n\r\n" + b"<html>" * 5000
+    records = [
+        warc_record({"WARC-Type": "warcinfo"}, b"software: test\r\n"),
+        warc_record({"WARC-Type": "request", "WARC-Target-URI": "http://example.com/a"}, b"GET /a HTTP/1.1\r\n\r\n"),
+        warc_record({"WARC-Type": "response", "WARC-Target-URI": "<http://example.com/a>",
+                     "WARC-Date": "2021-02-03T04:05:06Z", "Content-Type": "application/http; msgtype=response"}, http),
+        warc_record({"WARC-Type": "resource", "WARC-Target-URI": "http://example.com/logo.png",
+                     "WARC-Date": "2022-01-01T00:00:00Z", "Content-Type": "image/png"}, b"\x89PNG"),
+    ]
+    # .warc.gz files compress each record as its own gzip member.
+    return b"".join(gzip.compress(r) for r in records)
+
+
+def test_cdxj_and_classic_cdx_records():
+    data = (
+        b'!meta {"format": "cdxj"}\n'
+        b'com,example)/ 20200101000000 {"url": "http://example.com/", "mime": "text/html", "status": "200"}\n'
+        b'com,example)/x 20200102000000 {"url": "http://example.com/x", "mime": "warc/revisit", "status": "-"}\n'
+        b'bad line\n'
+    )
+    records = list(warc_utils.iter_cdxj_records(io.BytesIO(data)))
+    assert [(r["url"], r["timestamp"], r["status_code"], r["source_type"]) for r in records] == [
+        ("http://example.com/", "20200101000000", 200, "cdxj"),
+        ("http://example.com/x", "20200102000000", None, "cdxj"),
+    ]
+    classic = b" CDX N b a m s k r M S V g\ncom,example)/y 20200103000000 http://example.com/y text/html 301 - - - 10 0 f.warc.gz\n"
+    rec = next(warc_utils.iter_cdxj_records(io.BytesIO(classic)))
+    assert (rec["url"], rec["status_code"], rec["mime_type"], rec["domain"], rec["source_type"]) == (
+        "http://example.com/y", 301, "text/html", "example.com", "cdx_file")
+
+
+def test_warc_records_skip_bodies():
+    records = list(warc_utils.iter_warc_records(gzip.GzipFile(fileobj=io.BytesIO(sample_warc()))))
+    assert [(r["url"], r["timestamp"], r["status_code"], r["mime_type"]) for r in records] == [
+        ("http://example.com/a", "20210203040506", 404, "text/html"),
+        ("http://example.com/logo.png", "20220101000000", None, "image/png"),
+    ]
+
+
+def test_import_file_accepts_warc_and_cdxj(monkeypatch, tmp_path):
+    setup_tmp(monkeypatch, tmp_path)
+
+    class InlineThread:
+        def __init__(self, target, args):
+            self.target, self.args = target, args
+
+        def start(self):
+            self.target(*self.args)
+
+    monkeypatch.setattr(app.threading, "Thread", InlineThread)
+    cdxj = b'com,example)/z 20200101000000 {"url": "http://example.com/z", "status": "200"}\n'
+    with app.app.test_client() as client:
+        client.post("/import_file", data={"import_file": (io.BytesIO(sample_warc()), "crawl.warc.gz")},
+                    content_type="multipart/form-data")
+        assert app.get_import_progress()["message"].startswith("Imported 2 of 2 WARC records.")
+        client.post("/import_file", data={"import_file": (io.BytesIO(cdxj), "index.cdxj")},
+                    content_type="multipart/form-data")
+        assert app.get_import_progress()["message"].startswith("Imported 1 of 1 CDXJ records.")
+    with app.app.app_context():
+        rows = app.query_db("SELECT url, source_type, status_code FROM urls ORDER BY url")
+    assert [(r["url"], r["source_type"]) for r in rows] == [
+        ("http://example.com/a", "warc"),
+        ("http://example.com/logo.png", "warc"),
+        ("http://example.com/z", "cdxj"),
+    ]